@@ -0,0 +1,44 @@
+# asgi.py
+#
+# ASGI entry point. Serves the chat endpoints with asyncio so one worker can hold
+# many in-flight chats (each one mostly waiting on OpenAI) without a thread apiece;
+# every other route, and CORS preflight, still goes to the Flask app unchanged.
+#
+#   uvicorn asgi:application --workers 1 --port 5000
+#
+# The WSGI entry point (main:app) keeps working as before.
+
+from asgiref.wsgi import WsgiToAsgi
+from main import app
+from helpers import async_chat
+
+flask_asgi = WsgiToAsgi(app)
+
+# path -> async handler for POST requests
+ASYNC_ROUTES = {
+    "/chat": async_chat.chat,
+    "/chat/stream": async_chat.chat_stream,
+}
+
+
+async def _lifespan(receive, send):
+    # Nothing to set up per worker beyond what importing main already did
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+
+    handler = ASYNC_ROUTES.get(scope.get("path")) if scope["type"] == "http" and scope["method"] == "POST" else None
+    if handler is not None:
+        await handler(app, scope, receive, send)
+    else:
+        await flask_asgi(scope, receive, send)
@@ -0,0 +1,51 @@
+# benchmarks/bench_building_names.py
+#
+# Building-name filtering: leading-wildcard ILIKE vs the trigram BuildingNameIndex.
+#   python -m benchmarks.bench_building_names --buildings 5000
+
+import argparse
+from benchmarks.common import make_app, seed_inventory, time_call
+from config import Config
+from database import db
+from helpers.building_name_index import building_name_index
+from helpers.property_helpers import fetch_properties
+from models.sql_models import Building
+
+QUERIES = ["Sukhumvit 24", "sukhumvit 24", "Sukumvit 24", "Building 12"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buildings", type=int, default=5000)
+    parser.add_argument("--properties", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    Config.PROPERTY_CACHE_ENABLED = False
+    Config.PROPERTY_INDEX_ENABLED = False
+
+    app = make_app()
+    with app.app_context():
+        seed_inventory(args.buildings, args.properties)
+        building_name_index.load()
+
+        for name in QUERIES:
+            ilike = lambda: db.session.query(Building.id).filter(Building.name.ilike(f"%{name}%")).all()
+            resolve_sql = time_call(ilike, args.repeat)
+            resolve_index = time_call(lambda: building_name_index.match_ids(name), args.repeat)
+
+            Config.BUILDING_NAME_INDEX_ENABLED = False
+            sql_rows = len(fetch_properties({"building_name": name}))
+            fetch_sql = time_call(lambda: fetch_properties({"building_name": name}), args.repeat)
+            Config.BUILDING_NAME_INDEX_ENABLED = True
+            index_rows = len(fetch_properties({"building_name": name}))
+            fetch_index = time_call(lambda: fetch_properties({"building_name": name}), args.repeat)
+
+            print(f"{name!r}: ilike_buildings={len(ilike())} index_buildings={len(building_name_index.match_ids(name))}")
+            print(f"  resolve        ilike p50={resolve_sql['p50_ms']:.3f}ms  index p50={resolve_index['p50_ms']:.3f}ms")
+            print(f"  fetch rows     ilike={sql_rows} index={index_rows}")
+            print(f"  fetch latency  ilike p50={fetch_sql['p50_ms']:.2f}ms  index p50={fetch_index['p50_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_completion_cache.py
+#
+# Replays a mix of canned first-turn questions through /chat against the local fake
+# OpenAI server, with the completion cache off and then on.
+#   python -m benchmarks.bench_completion_cache --requests 60 --latency 0.3
+
+import argparse
+import random
+import time
+from benchmarks.common import make_chat_app, seed_inventory
+from benchmarks.fake_openai_server import FakeOpenAIConfig, start_server
+from config import Config
+from helpers.completion_cache import completion_cache
+
+QUESTIONS = [
+    "What's available near Asok?",
+    "what's available  near asok?",
+    "2 bed under 30k near BTS",
+    "Any 1 bed condos under 20k?",
+    "Show me 3 bed units",
+]
+
+
+def run(client, n: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    FakeOpenAIConfig.requests = 0
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        response = client.post("/chat", json={"message": rng.choice(QUESTIONS)})
+        assert response.status_code == 200, response.data
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "mean_ms": 1000 * sum(latencies) / n,
+        "p50_ms": 1000 * latencies[n // 2],
+        "upstream_calls": FakeOpenAIConfig.requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.3)
+    args = parser.parse_args()
+
+    _, base_url = start_server(latency=args.latency, tool_call_rate=1.0)
+    app = make_chat_app(base_url)
+    with app.app_context():
+        seed_inventory(200, 5000)
+    client = app.test_client()
+
+    Config.COMPLETION_CACHE_ENABLED = False
+    off = run(client, args.requests, seed=1)
+
+    Config.COMPLETION_CACHE_ENABLED = True
+    on = run(client, args.requests, seed=1)
+    stats = completion_cache.stats()
+    hit_rate = stats["hits"] / max(stats["hits"] + stats["misses"], 1)
+
+    print(f"cache off: mean={off['mean_ms']:.1f}ms p50={off['p50_ms']:.1f}ms upstream_calls={off['upstream_calls']}")
+    print(f"cache on:  mean={on['mean_ms']:.1f}ms p50={on['p50_ms']:.1f}ms upstream_calls={on['upstream_calls']}")
+    print(f"hit rate:  {hit_rate:.1%} ({stats['hits']} hits / {stats['misses']} misses)")
+
+
+if __name__ == "__main__":
+    main()
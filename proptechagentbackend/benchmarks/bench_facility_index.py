@@ -0,0 +1,81 @@
+# benchmarks/bench_facility_index.py
+#
+# Amenity filters: a SQL LIKE over the facilities JSON and a Python scan of every
+# building's facilities vs the bitmap FacilityIndex, with the building sets checked
+# against each other; then the cost of one incremental update vs a full load, and
+# fetch_properties with amenity + range filters end to end.
+#   python -m benchmarks.bench_facility_index --buildings 20000 --properties 20000
+
+import argparse
+import time
+from benchmarks.common import make_app, time_call
+from benchmarks.data_generator import seed
+from config import Config
+from database import db
+from helpers.facility_index import facility_index, facility_tokens, normalize_facility
+from helpers.property_helpers import fetch_properties
+from models.sql_models import Building
+
+# (all of, any of, the spellings stored in the generated data for the SQL LIKE)
+QUERIES = [
+    (["pool", "gym", "pet friendly"], [], ["Swimming Pool", "Fitness", "Pet Friendly"]),
+    (["Swimming Pool"], ["sauna", "jacuzzi"], None),
+    (["co-working space", "ev charger", "security"], [], ["Co-working Space", "EV Charger", "Security 24h"]),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buildings", type=int, default=20000)
+    parser.add_argument("--properties", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    Config.PROPERTY_CACHE_ENABLED = False
+    app = make_app()
+    with app.app_context():
+        seed(args.buildings, args.properties, seed=args.seed)
+        started = time.perf_counter()
+        facility_index.load()
+        load_ms = 1000 * (time.perf_counter() - started)
+
+        rows = db.session.query(Building.id, Building.facilities).all()
+        tokens_by_building = [(row.id, facility_tokens(row.facilities)) for row in rows]
+
+        def scan(all_of, any_of):
+            need = {normalize_facility(name) for name in all_of}
+            some = {normalize_facility(name) for name in any_of}
+            return [bid for bid, tokens in tokens_by_building if need <= tokens and (not some or some & tokens)]
+
+        for all_of, any_of, spellings in QUERIES:
+            expected = scan(all_of, any_of)
+            matched = facility_index.match_ids(all_of, any_of)
+            scan_time = time_call(lambda: scan(all_of, any_of), args.repeat)
+            bitmap_time = time_call(lambda: facility_index.match_ids(all_of, any_of), args.repeat)
+            line = (f"all={all_of} any={any_of}: buildings={len(matched)} match_scan={matched == expected}\n"
+                    f"  python scan p50={scan_time['p50_ms']:.3f}ms  bitmap p50={bitmap_time['p50_ms']:.3f}ms")
+            if spellings:
+                like = db.session.query(Building.id)
+                for spelling in spellings:
+                    like = like.filter(db.cast(Building.facilities, db.String).like(f'%"{spelling}"%'))
+                sql_time = time_call(lambda: like.all(), args.repeat)
+                line += f"  sql like p50={sql_time['p50_ms']:.3f}ms (buildings={len(like.all())})"
+            print(line)
+
+            filters = {"amenities": all_of, "any_amenities": any_of, "bedrooms": 2, "max_price": 40000}
+            fetched = time_call(lambda: fetch_properties(filters), 10)
+            print(f"  fetch_properties(+bedrooms=2, max_price=40000) rows={len(fetch_properties(filters))} "
+                  f"p50={fetched['p50_ms']:.2f}ms")
+
+        # Incremental upkeep: one building gains and loses amenities
+        building = db.session.get(Building, 1)
+        toggles = [["Swimming Pool", "Fitness"], ["Sauna", "Pet Friendly", "Tennis Court"]]
+        update_time = time_call(
+            lambda: facility_index.upsert(building.id, toggles[int(time.perf_counter_ns()) % 2]), args.repeat
+        )
+        print(f"full load {load_ms:.1f}ms, incremental building update p50={1000 * update_time['p50_ms']:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
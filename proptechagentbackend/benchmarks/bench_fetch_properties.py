@@ -0,0 +1,68 @@
+# benchmarks/bench_fetch_properties.py
+#
+# Latency and SQL statements per fetch_properties call (cache disabled).
+# Exits non-zero if any call issues more than one statement, so it doubles as
+# a guard against N+1 regressions in the serialization path.
+#   python -m benchmarks.bench_fetch_properties --properties 20000
+
+import argparse
+import sys
+from sqlalchemy import event
+from benchmarks.common import make_app, seed_inventory, time_call
+from config import Config
+from database import db
+from helpers.property_helpers import fetch_properties
+
+FILTERS = [
+    {},
+    {"bedrooms": 2, "max_bedrooms": 2, "max_price": 30000, "distance_from_bts": 0.5},
+    {"price": 50000, "max_price": 80000, "sq_meters": 60},
+    {"building_name": "Sukhumvit 24"},
+]
+
+
+def count_statements(fn) -> int:
+    count = 0
+
+    def before_cursor_execute(*args, **kwargs):
+        nonlocal count
+        count += 1
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buildings", type=int, default=500)
+    parser.add_argument("--properties", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Config.PROPERTY_CACHE_ENABLED = False
+    Config.PROPERTY_INDEX_ENABLED = False
+
+    app = make_app()
+    failed = False
+    with app.app_context():
+        seed_inventory(args.buildings, args.properties)
+        for filters in FILTERS:
+            rows = len(fetch_properties(filters))
+            statements = count_statements(lambda: fetch_properties(filters))
+            stats = time_call(lambda: fetch_properties(filters), args.repeat)
+            failed |= statements > 1
+            print(f"{filters}")
+            print(f"  rows={rows} statements={statements} "
+                  f"p50={stats['p50_ms']:.2f}ms p95={stats['p95_ms']:.2f}ms")
+
+    if failed:
+        print("FAIL: fetch_properties issued more than one statement per call")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
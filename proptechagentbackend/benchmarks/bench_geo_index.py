@@ -0,0 +1,83 @@
+# benchmarks/bench_geo_index.py
+#
+# Radius, k-nearest and near-station queries: a vectorized scan of every building's
+# coordinates vs the grid GeoIndex, with the results checked against each other,
+# then fetch_properties with a geo filter end to end.
+#   python -m benchmarks.bench_geo_index --buildings 20000 --properties 20000
+
+import argparse
+import random
+import numpy as np
+from benchmarks.common import make_app, time_call
+from benchmarks.data_generator import seed, STATIONS
+from config import Config
+from database import db
+from helpers.geo_index import geo_index, haversine_km
+from helpers.property_helpers import fetch_properties
+from models.sql_models import Building
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buildings", type=int, default=20000)
+    parser.add_argument("--properties", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius-km", type=float, default=0.5)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    Config.PROPERTY_CACHE_ENABLED = False
+    app = make_app()
+    with app.app_context():
+        seed(args.buildings, args.properties, seed=args.seed)
+        rows = db.session.query(Building.id, Building.latitude, Building.longitude).all()
+        ids = np.array([r.id for r in rows])
+        lat = np.array([r.latitude for r in rows])
+        lng = np.array([r.longitude for r in rows])
+        geo_index.load()
+
+        # Query points scattered over the same area as the buildings
+        rng = random.Random(args.seed)
+        points = [
+            (rng.uniform(lat.min(), lat.max()), rng.uniform(lng.min(), lng.max()))
+            for _ in range(args.queries)
+        ]
+
+        def scan_radius(point):
+            distances = haversine_km(point[0], point[1], lat, lng)
+            return set(ids[distances <= args.radius_km].tolist())
+
+        def scan_nearest(point):
+            distances = haversine_km(point[0], point[1], lat, lng)
+            return ids[np.argsort(distances, kind="stable")[:args.k]].tolist()
+
+        mismatches = 0
+        for point in points:
+            mismatches += scan_radius(point) != {b for b, _ in geo_index.within(*point, args.radius_km)}
+            mismatches += scan_nearest(point) != [b for b, _ in geo_index.nearest(*point, args.k)]
+        print(f"{len(rows)} buildings, {len(STATIONS)} stations, {args.queries} query points, "
+              f"{mismatches} mismatches vs full scan")
+
+        cycle = iter(points * 1000)
+        for name, scan, indexed in (
+            (f"radius {args.radius_km}km", scan_radius, lambda p: geo_index.within(*p, args.radius_km)),
+            (f"nearest k={args.k}", scan_nearest, lambda p: geo_index.nearest(*p, args.k)),
+        ):
+            full = time_call(lambda: scan(next(cycle)), args.queries)
+            grid = time_call(lambda: indexed(next(cycle)), args.queries)
+            print(f"{name:18s} scan p50={1000 * full['p50_ms']:7.1f}us  grid p50={1000 * grid['p50_ms']:7.1f}us "
+                  f"p95={1000 * grid['p95_ms']:7.1f}us")
+
+        for filters in ({"near_station": "Asok"}, {"station_line": "Sukhumvit", "radius_km": 0.5},
+                        {"station_line": "BTS", "radius_km": 0.3}):
+            resolve = time_call(lambda: geo_index.matches(filters), args.queries)
+            fetched = time_call(lambda: fetch_properties(dict(filters, bedrooms=2)), 20)
+            print(f"{str(filters):48s} buildings={len(geo_index.matches(filters)):5d} "
+                  f"resolve p50={1000 * resolve['p50_ms']:7.1f}us  "
+                  f"fetch_properties(+bedrooms=2) rows={len(fetch_properties(dict(filters, bedrooms=2)))} "
+                  f"p50={fetched['p50_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
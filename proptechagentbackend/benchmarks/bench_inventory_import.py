@@ -0,0 +1,53 @@
+# benchmarks/bench_inventory_import.py
+#
+# Import throughput and peak Python memory of helpers.inventory_import for JSONL
+# files of growing size (generated with benchmarks.data_generator). Peak memory
+# should track --batch-size, not the file size.
+#   python -m benchmarks.bench_inventory_import --sizes 20000,100000 --batch-size 2000
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import tracemalloc
+from datetime import datetime
+from benchmarks.common import make_app
+from benchmarks.data_generator import generate_buildings, generate_properties
+from helpers.inventory_import import import_inventory
+
+
+def write_file(path: str, n: int, seed: int = 42):
+    rng = random.Random(seed)
+    buildings = generate_buildings(max(n // 100, 10), rng)
+    names = {b["id"]: b["name"] for b in buildings}
+    with open(path, "w") as f:
+        for row in generate_properties(n, buildings, rng, datetime(2024, 1, 1)):
+            row["building_name"] = row["building_name"] or names[row["building_id"]]
+            for key in ("id", "building_id", "created_at"):
+                row.pop(key)
+            f.write(json.dumps(row, default=str) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="20000,100000")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    for size in [int(n) for n in args.sizes.split(",")]:
+        path = os.path.join(tempfile.gettempdir(), f"bench_import_{size}.jsonl")
+        write_file(path, size)
+        app = make_app()
+        with app.app_context():
+            tracemalloc.start()
+            stats = import_inventory(path, batch_size=args.batch_size)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        print(f"rows={size:7d} batch={args.batch_size}  {stats['rows_per_second']:8.0f} rows/s  "
+              f"upserted={stats['upserted']} rejected={stats['rejected']}  peak={peak / 2**20:.1f}MB")
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
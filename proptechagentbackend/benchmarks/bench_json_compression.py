@@ -0,0 +1,135 @@
+# benchmarks/bench_json_compression.py
+#
+# Encode time and bytes on the wire for the biggest responses: a /chat reply carrying
+# a long conversation_history, and a POST /properties/search result with full image
+# lists. Compares Flask's default provider with helpers/json_provider.py (stdlib and
+# orjson backends), then gzip / brotli on top, then the same search end to end
+# through the app with and without Accept-Encoding.
+#   python -m benchmarks.bench_json_compression --turns 30 --properties 20000
+
+import argparse
+import gzip
+import time
+from flask.json.provider import DefaultJSONProvider
+from benchmarks.common import make_app, time_call
+from benchmarks.bench_prompt_compaction import build_turns
+from benchmarks.data_generator import seed
+from config import Config
+from database import db
+from helpers import json_provider, response_compression
+from helpers.chat_tools import SYSTEM_MESSAGE
+from helpers.json_provider import FastJSONProvider
+from helpers.property_helpers import fetch_properties_batch
+from models.sql_models import Property
+from routes.property_routes import property_bp
+
+# Typical chat-sized searches: a few hundred rows in all
+SEARCHES = [
+    {"bedrooms": 1, "max_bedrooms": 1, "max_price": 15000},
+    {"bedrooms": 2, "max_price": 30000, "distance_from_bts": 0.3},
+    {"building_name": "Ideo Sukhumvit", "bedrooms": 1},
+]
+
+
+def chat_payload(turns: int) -> dict:
+    history = [{"role": "system", "content": SYSTEM_MESSAGE}]
+    for turn in build_turns(turns, seed=42):
+        history += turn
+    return {"assistant_message": history[-1]["content"], "conversation_history": history}
+
+
+def raw_rows(limit: int) -> list:
+    """Property rows with Decimal and datetime left as they come from the database."""
+    return [
+        {"property_code": p.property_code, "price": p.price, "size": p.size,
+         "created_at": p.created_at, "updated_at": p.updated_at, "photo_urls": p.photo_urls}
+        for p in db.session.query(Property).limit(limit)
+    ]
+
+
+def encoders(app) -> list:
+    flask_default = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+
+    def with_backend(name):
+        def encode(obj):
+            Config.JSON_ENCODER = name
+            return json_provider.dumps_bytes(obj)
+        return encode
+
+    result = [
+        ("flask default", lambda obj: flask_default.dumps(obj).encode()),
+        ("fast/stdlib", with_backend("stdlib")),
+    ]
+    if json_provider.orjson is not None:
+        result.append(("fast/orjson", with_backend("orjson")))
+    # Sanity check: the fast provider must round-trip through Flask's own parser
+    assert flask_default.loads(fast.dumps({"a": 1})) == {"a": 1}
+    return result
+
+
+def compressors() -> list:
+    result = [("gzip-1", lambda body: gzip.compress(body, 1, mtime=0)),
+              ("gzip-6", lambda body: gzip.compress(body, 6, mtime=0))]
+    if response_compression.brotli is not None:
+        brotli = response_compression.brotli
+        result += [("br-5", lambda body: brotli.compress(body, quality=5)),
+                   ("br-9", lambda body: brotli.compress(body, quality=9))]
+    return result
+
+
+def report(name: str, payload, app, repeat: int):
+    print(f"\n{name}")
+    body = None
+    for label, encode in encoders(app):
+        try:
+            body = encode(payload)
+        except TypeError as e:
+            print(f"  {label:14s} cannot encode: {e}")
+            continue
+        timing = time_call(lambda: encode(payload), repeat)
+        print(f"  {label:14s} encode p50={timing['p50_ms']:7.2f}ms  {len(body):9d} bytes")
+    for label, squeeze in compressors():
+        timing = time_call(lambda: squeeze(body), repeat)
+        size = len(squeeze(body))
+        print(f"  {label:14s} compress p50={timing['p50_ms']:7.2f}ms  {size:9d} bytes ({100 * size / len(body):.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--buildings", type=int, default=500)
+    parser.add_argument("--properties", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Config.PROPERTY_CACHE_ENABLED = False
+    app = make_app()
+    app.register_blueprint(property_bp)
+    with app.app_context():
+        seed(args.buildings, args.properties)
+        encoder = Config.JSON_ENCODER
+        report(f"/chat response, {args.turns}-turn conversation_history", chat_payload(args.turns), app, args.repeat)
+        report(f"/properties/search response, {len(SEARCHES)} filter sets", {"results": [
+            {"index": i, "count": len(rows), "properties": rows}
+            for i, rows in enumerate(fetch_properties_batch(SEARCHES))
+        ]}, app, args.repeat)
+        report("1000 raw rows with Decimal/datetime", raw_rows(1000), app, args.repeat)
+        Config.JSON_ENCODER = encoder
+
+        client = app.test_client()
+        print("\nPOST /properties/search through the app")
+        for accept in ("identity", "gzip", "br, gzip"):
+            samples, size, encoding = [], 0, None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = client.post("/properties/search", json={"filters": SEARCHES},
+                                       headers={"Accept-Encoding": accept})
+                samples.append(1000 * (time.perf_counter() - started))
+                size, encoding = len(response.data), response.headers.get("Content-Encoding", "identity")
+            samples.sort()
+            print(f"  Accept-Encoding: {accept:10s} -> {encoding:8s} {size:9d} bytes  p50={samples[len(samples) // 2]:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
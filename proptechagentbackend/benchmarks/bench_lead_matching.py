@@ -0,0 +1,81 @@
+# benchmarks/bench_lead_matching.py
+#
+# Lead matching: a per-client SQL query (the straightforward approach) vs the
+# vectorized block scorer, then a full run and an incremental run after a handful
+# of client/property edits.
+#   python -m benchmarks.bench_lead_matching --clients 2000 --properties 20000
+
+import argparse
+import random
+import time
+from benchmarks.common import make_app
+from benchmarks.data_generator import seed
+from config import Config
+from database import db
+from helpers.lead_matching import ClientArrays, PropertyArrays, compute_matches, run_matching
+from models.sql_models import Client, ClientProperty, Property
+
+
+def per_client_queries(k: int, limit: int) -> float:
+    """Hard requirements as one SQL query per client, ordered by price; returns seconds for `limit` clients."""
+    clients = db.session.query(Client).limit(limit).all()
+    started = time.perf_counter()
+    for client in clients:
+        query = db.session.query(Property.id).filter(db.or_(Property.status.is_(None), Property.status == "Available"))
+        if client.budget is not None:
+            query = query.filter(Property.price <= float(client.budget) * (1 + Config.LEAD_MATCH_BUDGET_SLACK))
+        if client.bedrooms is not None:
+            query = query.filter(Property.bedrooms.between(client.bedrooms, client.bedrooms + 1))
+        if client.size is not None:
+            query = query.filter(Property.size >= float(client.size) * (1 - Config.LEAD_MATCH_SIZE_SLACK))
+        query.order_by(Property.price.desc()).limit(k).all()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buildings", type=int, default=500)
+    parser.add_argument("--properties", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--edits", type=int, default=20, help="clients and properties edited before the incremental run")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed(args.buildings, args.properties, args.clients, seed=args.seed)
+
+        sample = min(args.clients, 200)
+        seconds = per_client_queries(args.top_k, sample)
+        print(f"per-client queries: {1000 * seconds / sample:.2f} ms/client "
+              f"(~{seconds / sample * args.clients:.2f}s for {args.clients} clients)")
+
+        started = time.perf_counter()
+        clients, properties = ClientArrays(), PropertyArrays()
+        loaded = time.perf_counter() - started
+        started = time.perf_counter()
+        matches = compute_matches(clients, properties, args.top_k)
+        scored = time.perf_counter() - started
+        print(f"vectorized: load {loaded:.2f}s, score {len(clients)}x{len(properties)} pairs in {scored:.2f}s "
+              f"({1000 * scored / max(len(clients), 1):.3f} ms/client), "
+              f"{sum(map(len, matches.values()))} matches")
+
+        full = run_matching(full=True, k=args.top_k)
+        print(f"full run:        {full}")
+        print(f"rows in client_properties: {db.session.query(ClientProperty).count()}")
+
+        # Edit a few clients and properties, then only those should be re-matched
+        rng = random.Random(args.seed)
+        for client in db.session.query(Client).filter(Client.id.in_(rng.sample(range(1, args.clients + 1), args.edits))):
+            client.budget = float(client.budget or 30000) * 1.2
+        for prop in db.session.query(Property).filter(Property.id.in_(rng.sample(range(1, args.properties + 1), args.edits))):
+            prop.price = float(prop.price or 20000) * 0.8
+        db.session.commit()
+
+        incremental = run_matching(k=args.top_k)
+        print(f"incremental run: {incremental}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_prompt_compaction.py
+#
+# Prompt tokens per model call over a long synthetic conversation, with and without
+# compaction (helpers/prompt_compactor.py). Every turn is a fetch_properties call
+# with a realistic tool result followed by an answer. Uses the extractive summary
+# so no model is needed.
+#   python -m benchmarks.bench_prompt_compaction --turns 30 --budget 4000
+
+import argparse
+import json
+import random
+import time
+from benchmarks.common import make_app
+from benchmarks.load_driver import make_questions, make_filters
+from config import Config
+from helpers.chat_tools import SYSTEM_MESSAGE
+from helpers.prompt_compactor import compact_prompt, count_tokens, summary_cache
+from helpers.tool_result_compactor import COLUMNS
+
+
+def fake_tool_result(rng: random.Random, rows: int) -> str:
+    """A fetch_properties tool result of the same shape the chat tool produces."""
+    table = [
+        [f"PC{rng.randint(1, 99999):06d}", f"Building {rng.randint(1, 500)} Sukhumvit", rng.randint(0, 3),
+         rng.randint(1, 3), float(rng.randrange(10000, 90000, 500)), round(rng.uniform(25, 120), 2),
+         rng.randint(0, 12), f"https://cdn.example.com/p/{rng.randint(1, 99999)}/0.jpg"]
+        for _ in range(rows)
+    ]
+    return json.dumps({"total": rows * 3, "offset": 0, "columns": COLUMNS, "rows": table,
+                       "next_cursor": "eyJvIjogMjB9"}, separators=(",", ":"))
+
+
+def build_turns(turns: int, seed: int) -> list:
+    rng = random.Random(seed)
+    questions, filters = make_questions(turns, seed), make_filters(turns, seed)
+    conversation = []
+    for i in range(turns):
+        call_id = f"call_{i}"
+        conversation.append([
+            {"role": "user", "content": questions[i]},
+            {"role": "assistant", "content": None, "tool_calls": [
+                {"id": call_id, "type": "function",
+                 "function": {"name": "fetch_properties", "arguments": json.dumps(filters[i])}}]},
+            {"role": "tool", "tool_call_id": call_id, "content": fake_tool_result(rng, rng.randint(5, 20))},
+            {"role": "assistant", "content": "Here are some options that match: " + ", ".join(
+                f"PC{rng.randint(1, 99999):06d}" for _ in range(5)) + ". Would you like to see photos?"},
+        ])
+    return conversation
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--budget", type=int, default=Config.CONVERSATION_TOKEN_BUDGET)
+    parser.add_argument("--keep-turns", type=int, default=Config.CONVERSATION_KEEP_TURNS)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=1000 * Config.PROMPT_PREFILL_SECONDS_PER_1K_TOKENS)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    make_app()
+    Config.CONVERSATION_COMPACTION_ENABLED = True
+    Config.CONVERSATION_TOKEN_BUDGET = args.budget
+    Config.CONVERSATION_KEEP_TURNS = args.keep_turns
+    Config.CONVERSATION_SUMMARY_MODEL = ""  # extractive summary, no model needed
+    summary_cache.clear()
+
+    history = [{"role": "system", "content": SYSTEM_MESSAGE}]
+    total_full = total_compacted = 0
+    compaction_ms = []
+    print(f"{'turn':>4s} {'full':>8s} {'compacted':>10s} {'saved':>7s} {'compact_ms':>10s}")
+    for number, turn in enumerate(build_turns(args.turns, args.seed), start=1):
+        # The two model calls of a turn: with the user message, then with the tool result
+        for upto in (1, 3):
+            messages = history + turn[:upto]
+            started = time.perf_counter()
+            prompt = compact_prompt(messages)
+            compaction_ms.append(1000 * (time.perf_counter() - started))
+            full, compacted = count_tokens(messages), count_tokens(prompt)
+            total_full += full
+            total_compacted += compacted
+        print(f"{number:4d} {full:8d} {compacted:10d} {full - compacted:7d} {compaction_ms[-1]:10.2f}")
+        history += turn
+
+    saved = total_full - total_compacted
+    compaction_ms.sort()
+    print(f"\nprompt tokens over {2 * args.turns} calls: full={total_full} compacted={total_compacted} "
+          f"saved={saved} ({100 * saved / total_full:.0f}%)")
+    print(f"estimated prefill saved: {saved / 1000 * args.prefill_ms_per_1k:.0f} ms total; "
+          f"compaction p50={compaction_ms[len(compaction_ms) // 2]:.2f} ms max={compaction_ms[-1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/bench_property_index.py
+#
+# Compare the SQL path of fetch_properties with the in-memory PropertyIndex path.
+#   python -m benchmarks.bench_property_index --properties 20000
+
+import argparse
+from benchmarks.common import make_app, seed_inventory, time_call
+from config import Config
+from helpers.property_helpers import fetch_properties
+from helpers.property_index import property_index
+
+FILTERS = [
+    {"bedrooms": 2, "max_bedrooms": 2, "max_price": 30000, "distance_from_bts": 0.5},
+    {"price": 50000, "max_price": 80000, "sq_meters": 60},
+    {"building_name": "Sukhumvit 24"},
+    {"bedrooms": 3, "bathrooms": 2},
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buildings", type=int, default=500)
+    parser.add_argument("--properties", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    # Measure the query paths themselves, not the result cache
+    Config.PROPERTY_CACHE_ENABLED = False
+
+    app = make_app()
+    with app.app_context():
+        seed_inventory(args.buildings, args.properties)
+        property_index.load()
+
+        for filters in FILTERS:
+            Config.PROPERTY_INDEX_ENABLED = False
+            expected = fetch_properties(filters)
+            sql = time_call(lambda: fetch_properties(filters), args.repeat)
+
+            Config.PROPERTY_INDEX_ENABLED = True
+            got = fetch_properties(filters)
+            indexed = time_call(lambda: fetch_properties(filters), args.repeat)
+
+            same = sorted(r["property_code"] for r in expected) == sorted(r["property_code"] for r in got)
+            print(f"{filters}")
+            print(f"  rows={len(expected)} same_result={same}")
+            print(f"  sql     p50={sql['p50_ms']:.2f}ms p95={sql['p95_ms']:.2f}ms")
+            print(f"  indexed p50={indexed['p50_ms']:.2f}ms p95={indexed['p95_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
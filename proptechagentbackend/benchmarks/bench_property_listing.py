@@ -0,0 +1,62 @@
+# benchmarks/bench_property_listing.py
+#
+# Peak Python memory of listing every property: fetch_properties({}) (one big list)
+# vs the streamed GET /properties?all=true, at a few table sizes. The streamed
+# peak should stay flat as the table grows.
+#   python -m benchmarks.bench_property_listing --sizes 5000,20000,50000
+
+import argparse
+import time
+import tracemalloc
+from benchmarks.common import make_app, seed_inventory
+from config import Config
+from helpers.property_helpers import fetch_properties
+
+
+def measure(fn) -> tuple:
+    """Run fn once; return (seconds, peak traced bytes)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="5000,20000,50000")
+    args = parser.parse_args()
+
+    Config.PROPERTY_CACHE_ENABLED = False
+    Config.PROPERTY_INDEX_ENABLED = False
+
+    from routes.property_routes import property_bp
+
+    for size in [int(n) for n in args.sizes.split(",")]:
+        app = make_app()
+        app.register_blueprint(property_bp)
+        with app.app_context():
+            seed_inventory(max(size // 40, 10), size)
+
+            def materialized():
+                return len(fetch_properties({}))
+
+        def streamed():
+            response = app.test_client().get("/properties?all=true", buffered=False)
+            total = 0
+            for chunk in response.response:
+                total += len(chunk)
+            response.close()
+            return total
+
+        with app.app_context():
+            list_time, list_peak = measure(materialized)
+        stream_time, stream_peak = measure(streamed)
+        print(f"rows={size:6d}  list: {list_time * 1000:7.0f}ms peak={list_peak / 2**20:6.1f}MB   "
+              f"stream: {stream_time * 1000:7.0f}ms peak={stream_peak / 2**20:6.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
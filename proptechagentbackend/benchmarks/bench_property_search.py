@@ -0,0 +1,62 @@
+# benchmarks/bench_property_search.py
+#
+# N separate fetch_properties calls vs one fetch_properties_batch call for the same
+# filter sets (cache and in-memory index disabled). Exits non-zero if the batch
+# issues more than one statement.
+#   python -m benchmarks.bench_property_search --sets 5 --properties 20000
+
+import argparse
+import sys
+from benchmarks.common import make_app, seed_inventory, time_call
+from benchmarks.bench_fetch_properties import count_statements
+from config import Config
+from helpers.property_helpers import fetch_properties, fetch_properties_batch
+
+FILTER_POOL = [
+    {"bedrooms": 1, "max_bedrooms": 1, "max_price": 25000},
+    {"bedrooms": 2, "max_bedrooms": 2, "max_price": 30000, "distance_from_bts": 0.5},
+    {"price": 50000, "max_price": 80000, "sq_meters": 60},
+    {"building_name": "Sukhumvit 24"},
+    {"bedrooms": 3, "distance_from_bts": 1.0},
+    {"max_price": 15000},
+    {"property_code": "PC000042"},
+    {"bathrooms": 2, "max_sq_meters": 90},
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buildings", type=int, default=500)
+    parser.add_argument("--properties", type=int, default=20000)
+    parser.add_argument("--sets", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Config.PROPERTY_CACHE_ENABLED = False
+    Config.PROPERTY_INDEX_ENABLED = False
+    filter_sets = [FILTER_POOL[i % len(FILTER_POOL)] for i in range(args.sets)]
+
+    app = make_app()
+    with app.app_context():
+        seed_inventory(args.buildings, args.properties)
+
+        def separate():
+            return [fetch_properties(f) for f in filter_sets]
+
+        def batched():
+            return fetch_properties_batch(filter_sets)
+
+        rows = sum(len(r) for r in batched())
+        for name, fn in (("separate", separate), ("batched", batched)):
+            statements = count_statements(fn)
+            stats = time_call(fn, args.repeat)
+            print(f"{name:9s} sets={args.sets} rows={rows} statements={statements} "
+                  f"p50={stats['p50_ms']:.2f}ms p95={stats['p95_ms']:.2f}ms")
+
+        if count_statements(batched) > 1:
+            print("FAIL: fetch_properties_batch issued more than one statement")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_read_model.py
+#
+# fetch_properties_json over the base-table join (join + per-row row_to_dict + dumps)
+# vs the property_search read model (one table, stored payloads joined as-is), with
+# the result cache and in-memory index disabled. Exits non-zero if the two paths
+# return different results or the read model fails its consistency check.
+#   python -m benchmarks.bench_read_model --properties 20000
+
+import argparse
+import json
+import sys
+import time
+from benchmarks.common import make_app, seed_inventory, time_call
+from benchmarks.bench_property_search import FILTER_POOL
+from config import Config
+from helpers.property_helpers import fetch_properties_json
+from helpers.property_read_model import rebuild, check_consistency
+
+WIDE_FILTERS = [{}, {"max_price": 100000}, {"bedrooms": 1}]
+
+
+def _sorted(serialized: str) -> list:
+    return sorted(json.loads(serialized), key=lambda item: item["property_code"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buildings", type=int, default=500)
+    parser.add_argument("--properties", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Config.PROPERTY_CACHE_ENABLED = False
+    Config.PROPERTY_INDEX_ENABLED = False
+
+    app = make_app()
+    with app.app_context():
+        seed_inventory(args.buildings, args.properties)
+        started = time.perf_counter()
+        stats = rebuild()
+        print(f"rebuild: {stats['written']} rows in {time.perf_counter() - started:.2f}s")
+
+        report = check_consistency()
+        if report["missing"] or report["stale"] or report["orphans"]:
+            print(f"FAIL: read model inconsistent after rebuild: {report}")
+            sys.exit(1)
+
+        failed = False
+        for filters in FILTER_POOL + WIDE_FILTERS:
+            timings, outputs = {}, {}
+            for name, enabled in (("join", False), ("read_model", True)):
+                Config.PROPERTY_READ_MODEL_ENABLED = enabled
+                outputs[name] = fetch_properties_json(filters)
+                timings[name] = time_call(lambda: fetch_properties_json(filters), args.repeat)
+            rows = len(json.loads(outputs["join"]))
+            speedup = timings["join"]["p50_ms"] / timings["read_model"]["p50_ms"]
+            print(f"{json.dumps(filters):70s} rows={rows:6d} "
+                  f"join p50={timings['join']['p50_ms']:8.2f}ms  "
+                  f"read_model p50={timings['read_model']['p50_ms']:8.2f}ms  x{speedup:.1f}")
+            if _sorted(outputs["join"]) != _sorted(outputs["read_model"]):
+                print(f"FAIL: results differ for {filters}")
+                failed = True
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/common.py
+#
+# Shared setup for the offline benchmarks. Defaults to a throwaway SQLite file so the
+# scripts run without Postgres; point BENCH_DATABASE_URL at a real database for
+# numbers that reflect production.
+
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+_default_db = os.path.join(tempfile.gettempdir(), "proptech_bench.db")
+os.environ.setdefault("DATABASE_URL", os.getenv("BENCH_DATABASE_URL", f"sqlite:///{_default_db}"))
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ.setdefault("CORS_ORIGINS", "http://localhost")
+
+from create_app import create_app  # noqa: E402
+from database import db  # noqa: E402
+from models.sql_models import Building, Property  # noqa: E402
+
+NO_IMAGE_URL = "https://pub-5639854ae5864779be6f398a0fa1c555.r2.dev/noimageyet.jpg"
+
+
+def make_app():
+    """Create the Flask app with a fresh schema."""
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def seed_inventory(n_buildings: int, n_properties: int, seed: int = 42):
+    """
+    Insert a compact synthetic inventory for the micro-benchmarks. Needs an app context.
+    For full-schema rows (every column, photo sets per room) use benchmarks.data_generator.
+    """
+    rng = random.Random(seed)
+    buildings = [
+        {
+            "id": i + 1,
+            "name": f"Building {i + 1} Sukhumvit {rng.randint(1, 101)}",
+            "distance_to_bts": round(rng.uniform(0.05, 3.0), 2),
+            "distance_to_mrt": round(rng.uniform(0.05, 3.0), 2),
+        }
+        for i in range(n_buildings)
+    ]
+    db.session.bulk_insert_mappings(Building, buildings)
+
+    properties = []
+    for i in range(n_properties):
+        building = buildings[rng.randrange(n_buildings)]
+        photos = [f"https://cdn.example.com/p/{i}/{j}.jpg" for j in range(rng.randint(0, 12))] or [NO_IMAGE_URL]
+        properties.append({
+            "id": i + 1,
+            "property_code": f"PC{i + 1:06d}",
+            "building_id": building["id"],
+            "building_name": building["name"] if rng.random() < 0.7 else None,
+            "unit": str(rng.randint(100, 4000)),
+            "bedrooms": rng.randint(0, 4),
+            "bathrooms": rng.randint(1, 4),
+            "price": rng.randrange(10000, 250000, 500),
+            "size": round(rng.uniform(22, 250), 2),
+            "photo_urls": {"living": photos[: len(photos) // 2], "bedroom": photos[len(photos) // 2:]},
+        })
+    db.session.bulk_insert_mappings(Property, properties)
+    db.session.commit()
+
+
+def time_call(fn, repeat: int) -> dict:
+    """Run fn `repeat` times and return latency stats in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": sum(samples) / len(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def percentiles(samples: list) -> dict:
+    """Nearest-rank latency summary of `samples` (seconds) in milliseconds."""
+    samples = sorted(samples)
+    if not samples:
+        return {}
+
+    def rank(q):
+        return 1000 * samples[min(len(samples) - 1, max(0, int(round(q * len(samples))) - 1))]
+
+    return {
+        "mean": 1000 * sum(samples) / len(samples),
+        "p50": rank(0.50),
+        "p95": rank(0.95),
+        "p99": rank(0.99),
+        "max": 1000 * samples[-1],
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_module(args: list, port: int, timeout: float = 120) -> subprocess.Popen:
+    """Start `python -m <args>` and wait until it accepts connections on `port`."""
+    proc = subprocess.Popen([sys.executable, "-m"] + args, env=os.environ.copy())
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{args[0]} exited with {proc.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{args[0]} did not start")
+
+
+def make_chat_app(openai_base_url: str):
+    """
+    Import the full app (all blueprints) talking to `openai_base_url`, with a fresh
+    schema. Must run before anything else imports the chat routes, since the
+    OpenAI clients are created at import time.
+    """
+    os.environ["OPENAI_BASE_URL"] = openai_base_url
+    import main  # noqa: E402
+    with main.app.app_context():
+        db.drop_all()
+        db.create_all()
+    return main.app
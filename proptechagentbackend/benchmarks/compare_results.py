@@ -0,0 +1,60 @@
+# benchmarks/compare_results.py
+#
+# Compare two load_driver result files (baseline first).
+#   python -m benchmarks.compare_results benchmarks/results/chat-before.json benchmarks/results/chat-after.json
+
+import argparse
+import json
+
+# metric -> True if higher is better
+METRICS = {
+    "throughput_rps": True,
+    "latency_ms.p50": False,
+    "latency_ms.p95": False,
+    "latency_ms.p99": False,
+    "latency_ms.max": False,
+    "db_statements_per_request": False,
+    "upstream_calls_per_request": False,
+    "errors": False,
+}
+
+
+def _get(result: dict, dotted: str):
+    value = result
+    for part in dotted.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        base = json.load(f)
+    with open(args.candidate) as f:
+        cand = json.load(f)
+
+    if base.get("scenario") != cand.get("scenario"):
+        print(f"[WARN] comparing different scenarios: {base.get('scenario')} vs {cand.get('scenario')}")
+    for key in ("dataset", "params"):
+        if base.get(key) != cand.get(key):
+            print(f"[WARN] {key} differs between runs")
+
+    print(f"{'metric':28s} {'baseline':>12s} {'candidate':>12s} {'change':>9s}")
+    for metric, higher_is_better in METRICS.items():
+        a, b = _get(base, metric), _get(cand, metric)
+        if a is None or b is None:
+            continue
+        change = ""
+        if a:
+            pct = 100 * (b - a) / a
+            better = (pct > 0) == higher_is_better
+            change = f"{pct:+.1f}%" + ("" if abs(pct) < 1 else (" +" if better else " -"))
+        print(f"{metric:28s} {a:12.2f} {b:12.2f} {change:>9s}")
+
+
+if __name__ == "__main__":
+    main()
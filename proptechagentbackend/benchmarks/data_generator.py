@@ -0,0 +1,202 @@
+# benchmarks/data_generator.py
+#
+# Deterministic synthetic inventory on the real schema (models/sql_models.py).
+# The same --seed always produces the same rows, so benchmark runs are comparable.
+#
+#   python -m benchmarks.data_generator --buildings 200 --properties 5000 --clients 500
+#
+# Uses DATABASE_URL / BENCH_DATABASE_URL like the other benchmarks (see common.py)
+# and recreates the schema first.
+
+import argparse
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+from benchmarks.common import NO_IMAGE_URL, make_app
+from database import db
+from models.sql_models import Building, Property, Client, Station
+
+BTS_STATIONS = [
+    ("Asok", "Sukhumvit"), ("Phrom Phong", "Phrom Phong"), ("Thong Lo", "Thonglor"),
+    ("Ekkamai", "Ekkamai"), ("Phra Khanong", "Phra Khanong"), ("On Nut", "On Nut"),
+    ("Nana", "Nana"), ("Chit Lom", "Chidlom"), ("Ratchadamri", "Ratchadamri"),
+    ("Sala Daeng", "Silom"), ("Chong Nonsi", "Sathorn"), ("Ari", "Phahonyothin"),
+    ("Victory Monument", "Ratchathewi"), ("Saphan Khwai", "Saphan Khwai"),
+]
+MRT_STATIONS = ["Sukhumvit", "Queen Sirikit", "Khlong Toei", "Lumphini", "Si Lom", "Phetchaburi", "Rama 9"]
+# Station reference rows for the names above: (code, name, line, system, latitude, longitude)
+STATIONS = [
+    ("N7", "Saphan Khwai", "Sukhumvit", "BTS", 13.7937, 100.5498),
+    ("N5", "Ari", "Sukhumvit", "BTS", 13.7796, 100.5446),
+    ("N3", "Victory Monument", "Sukhumvit", "BTS", 13.7627, 100.5372),
+    ("E1", "Chit Lom", "Sukhumvit", "BTS", 13.7441, 100.5430),
+    ("E3", "Nana", "Sukhumvit", "BTS", 13.7405, 100.5549),
+    ("E4", "Asok", "Sukhumvit", "BTS", 13.7370, 100.5603),
+    ("E5", "Phrom Phong", "Sukhumvit", "BTS", 13.7305, 100.5697),
+    ("E6", "Thong Lo", "Sukhumvit", "BTS", 13.7242, 100.5784),
+    ("E7", "Ekkamai", "Sukhumvit", "BTS", 13.7195, 100.5851),
+    ("E8", "Phra Khanong", "Sukhumvit", "BTS", 13.7152, 100.5917),
+    ("E9", "On Nut", "Sukhumvit", "BTS", 13.7057, 100.6010),
+    ("S1", "Ratchadamri", "Silom", "BTS", 13.7395, 100.5392),
+    ("S2", "Sala Daeng", "Silom", "BTS", 13.7286, 100.5343),
+    ("S3", "Chong Nonsi", "Silom", "BTS", 13.7237, 100.5294),
+    ("BL20", "Rama 9", "Blue", "MRT", 13.7578, 100.5653),
+    ("BL21", "Phetchaburi", "Blue", "MRT", 13.7490, 100.5633),
+    ("BL22", "Sukhumvit", "Blue", "MRT", 13.7385, 100.5614),
+    ("BL23", "Queen Sirikit", "Blue", "MRT", 13.7231, 100.5600),
+    ("BL24", "Khlong Toei", "Blue", "MRT", 13.7222, 100.5536),
+    ("BL25", "Lumphini", "Blue", "MRT", 13.7256, 100.5456),
+    ("BL26", "Si Lom", "Blue", "MRT", 13.7293, 100.5363),
+]
+NAME_PREFIXES = ["The", "Noble", "Park", "Life", "Rhythm", "Ideo", "Ashton", "Quattro", "Siri", "HQ", "Keyne", "Vtara"]
+NAME_SUFFIXES = ["Residence", "Place", "Tower", "Condominium", "Suites", "by Sansiri", "Mansion", "Court"]
+FACILITIES = [
+    "Swimming Pool", "Fitness", "Sauna", "Steam Room", "Co-working Space", "Library",
+    "Kids Playground", "Garden", "Rooftop Bar", "Parking", "Shuttle", "Security 24h",
+    "Pet Friendly", "EV Charger", "Jacuzzi", "Tennis Court",
+]
+ROOM_TYPES = ["living", "bedroom", "kitchen", "bathroom", "view", "facilities"]
+CDN = "https://pub-5639854ae5864779be6f398a0fa1c555.r2.dev"
+AREA_CODES = ["SK", "SL", "ST", "PK", "AR", "RT", "BN"]
+NATIONALITIES = ["Thai", "Japanese", "American", "British", "French", "Chinese", "Indian", "German"]
+
+
+def _photo_urls(rng: random.Random, prefix: str) -> dict:
+    """Photo URL dict keyed by room type, like the scraped listings (empty rooms get the placeholder)."""
+    photos = {}
+    for room in rng.sample(ROOM_TYPES, rng.randint(1, len(ROOM_TYPES))):
+        count = rng.choice([0, 1, 2, 3, 4, 6])
+        photos[room] = [f"{CDN}/{prefix}/{room}_{i}.jpg" for i in range(count)] or [NO_IMAGE_URL]
+    return photos
+
+
+def generate_buildings(n: int, rng: random.Random) -> list:
+    buildings, used = [], set()
+    for i in range(n):
+        station, district = rng.choice(BTS_STATIONS)
+        name = f"{rng.choice(NAME_PREFIXES)} {district} {rng.choice(NAME_SUFFIXES)}"
+        if name in used:
+            name = f"{name} {i + 1}"  # Building.name is unique
+        used.add(name)
+        buildings.append({
+            "id": i + 1,
+            "name": name,
+            "year_built": rng.randint(1995, 2024),
+            "nearest_bts": station,
+            "nearest_mrt": rng.choice(MRT_STATIONS),
+            "distance_to_bts": round(rng.expovariate(1 / 0.6), 2),
+            "distance_to_mrt": round(rng.uniform(0.1, 3.0), 2),
+            "facilities": rng.sample(FACILITIES, rng.randint(3, 10)),
+            "photo_urls": _photo_urls(rng, f"b/{i + 1}"),
+        })
+    return buildings
+
+
+def place_buildings(buildings: list, rng: random.Random):
+    """
+    Give each building coordinates distance_to_bts away from its nearest_bts station,
+    in a random direction. Uses its own generator so the other columns stay the same
+    for a given seed.
+    """
+    stations = {name: (lat, lng) for _, name, _, system, lat, lng in STATIONS if system == "BTS"}
+    for building in buildings:
+        lat, lng = stations[building["nearest_bts"]]
+        bearing = rng.uniform(0, 2 * math.pi)
+        km = building["distance_to_bts"]
+        building["latitude"] = round(lat + km * math.cos(bearing) / 111.195, 6)
+        building["longitude"] = round(lng + km * math.sin(bearing) / (111.195 * math.cos(math.radians(lat))), 6)
+
+
+def generate_properties(m: int, buildings: list, rng: random.Random, start: datetime) -> list:
+    properties = []
+    for i in range(m):
+        building = buildings[rng.randrange(len(buildings))]
+        bedrooms = rng.choices([0, 1, 2, 3, 4], weights=[10, 45, 30, 12, 3])[0]
+        size = round(rng.uniform(24, 40) + bedrooms * rng.uniform(20, 35), 2)
+        # Bangkok condo rents scale roughly with size and proximity to the BTS
+        price = round(size * rng.uniform(450, 1100) / (1 + building["distance_to_bts"]) / 500) * 500
+        properties.append({
+            "id": i + 1,
+            "property_code": f"PC{i + 1:06d}",
+            "building_id": building["id"],
+            "building_name": building["name"] if rng.random() < 0.7 else None,
+            "unit": f"{rng.randint(2, 45)}/{rng.randint(1, 40):02d}",
+            "owner": f"Owner {rng.randint(1, m // 3 + 1)}",
+            "contact": f"08{rng.randint(10000000, 99999999)}",
+            "size": size,
+            "bedrooms": bedrooms,
+            "bathrooms": max(1, bedrooms - rng.randint(0, 1)),
+            "year_built": building["year_built"],
+            "floor": rng.randint(2, 45),
+            "area": rng.choice(AREA_CODES),
+            "status": rng.choices(["Available", "Rented", "Reserved"], weights=[70, 25, 5])[0],
+            "price": max(price, 8000),
+            "sell_price": round(size * rng.uniform(90000, 220000), -3) if rng.random() < 0.3 else None,
+            "preferred_tenant": rng.choice([None, "Family", "Single", "No pets"]),
+            "sent": rng.choice(["Yes", "No"]),
+            "photo_urls": _photo_urls(rng, f"p/{i + 1}"),
+            "created_at": start + timedelta(minutes=i * 5, seconds=rng.randint(0, 299)),
+        })
+    return properties
+
+
+def generate_clients(k: int, rng: random.Random) -> list:
+    clients = []
+    for i in range(k):
+        bedrooms = rng.randint(1, 3)
+        clients.append({
+            "id": i + 1,
+            "code": f"CL{i + 1:05d}",
+            "title": rng.choice(["Mr.", "Ms.", "Mrs."]),
+            "first_name": f"Client{i + 1}",
+            "last_name": "Bench",
+            "nationality": rng.choice(NATIONALITIES),
+            "contact_type": rng.choice(["Line", "WhatsApp", "Email"]),
+            "contact": f"client{i + 1}@example.com",
+            "starting_date": date(2025, 1, 1) + timedelta(days=rng.randint(0, 365)),
+            "budget": rng.randrange(15000, 150000, 1000),
+            "bedrooms": bedrooms,
+            "bath": max(1, bedrooms - 1),
+            "area": rng.choice(BTS_STATIONS)[1],
+            "size": rng.randrange(30, 150),
+            "status": rng.choice(["New", "Searching", "Viewing", "Closed"]),
+        })
+    return clients
+
+
+def seed(n_buildings: int, n_properties: int, n_clients: int = 0, seed: int = 42) -> dict:
+    """Insert the generated rows in bulk. Needs an app context; returns row counts."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    buildings = generate_buildings(n_buildings, rng)
+    place_buildings(buildings, random.Random(seed + 1))
+    db.session.bulk_insert_mappings(Station, [
+        {"code": code, "name": name, "line": line, "system": system, "latitude": lat, "longitude": lng}
+        for code, name, line, system, lat, lng in STATIONS
+    ])
+    db.session.bulk_insert_mappings(Building, buildings)
+    db.session.bulk_insert_mappings(Property, generate_properties(n_properties, buildings, rng, start))
+    if n_clients:
+        db.session.bulk_insert_mappings(Client, generate_clients(n_clients, rng))
+    db.session.commit()
+    return {"buildings": n_buildings, "properties": n_properties, "clients": n_clients}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--buildings", type=int, default=200)
+    parser.add_argument("--properties", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        started = time.perf_counter()
+        counts = seed(args.buildings, args.properties, args.clients, args.seed)
+    print(f"Seeded {counts} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# benchmarks/fake_openai_server.py
+#
+# A local stand-in for the OpenAI Chat Completions API, for offline benchmarks.
+# Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+#
+#   python -m benchmarks.fake_openai_server --port 8099 --latency 0.8 --tool-call-rate 1.0
+#
+# Behaviour:
+#   - last message from the user and tools enabled -> with probability
+#     --tool-call-rate, a fetch_properties call with filters parsed from the text
+#     ("2 bed", "under 30k", "near asok"); otherwise a plain answer
+#   - last message is tool output -> a short answer mentioning the match count
+#   - stream=true is answered with SSE chunks, --token-delay apart
+#
+# Decisions are derived from the message text and --seed, not from a shared RNG, so
+# the same workload gets the same replies whatever the request interleaving.
+#
+# --script scenario.json overrides the built-in behaviour. First matching rule wins;
+# "match" is a case-insensitive regex on the last user message, and string
+# arguments may reference its groups (\\1). Anything unmatched falls back to the default.
+#   {
+#     "rules": [
+#       {"match": "near ([a-z ]+)", "latency": 1.2,
+#        "tool_calls": [{"name": "fetch_properties", "arguments": {"building_name": "\\1"}}]},
+#       {"match": "hello|hi", "reply": "Hi! Looking to rent or buy?"}
+#     ],
+#     "after_tool": {"reply": "{total} units match.", "latency": 0.4}
+#   }
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILTER_KEYS = [
+    "bedrooms", "max_bedrooms", "price", "max_price", "bathrooms", "max_bathrooms",
+    "sq_meters", "max_sq_meters", "distance_from_bts", "property_name", "building_name",
+    "property_code", "cursor",
+]
+
+
+class FakeOpenAIConfig:
+    latency = 0.5          # seconds before the first byte of every completion
+    token_delay = 0.01     # seconds between streamed chunks
+    tool_call_rate = 1.0   # probability of a tool call on a fresh user message
+    latency_jitter = 0.0   # +/- fraction of `latency`, drawn per request
+    seed = 0
+    script = None          # parsed --script file
+    requests = 0
+    lock = threading.Lock()
+
+
+def _filters_from_text(text: str) -> dict:
+    args = {key: None for key in FILTER_KEYS}
+    text = text.lower()
+    match = re.search(r"(\d+)\s*(?:bed|br)", text)
+    if match:
+        args["bedrooms"] = args["max_bedrooms"] = int(match.group(1))
+    match = re.search(r"under\s*(\d+)\s*(k?)", text)
+    if match:
+        args["max_price"] = float(match.group(1)) * (1000 if match.group(2) else 1)
+    match = re.search(r"near\s+([a-z ]+?)(?:\?|$|,)", text)
+    if match and match.group(1).strip() not in ("bts", "mrt"):
+        args["building_name"] = match.group(1).strip()
+    if "bts" in text:
+        args["distance_from_bts"] = 0.5
+    return args
+
+
+def _draw(text: str, salt: str) -> float:
+    """Deterministic value in [0, 1) for this text, salt and --seed."""
+    return (zlib.crc32(f"{FakeOpenAIConfig.seed}:{salt}:{text}".encode()) & 0xFFFFFFFF) / 2 ** 32
+
+
+def _tool_call(name: str, arguments: dict) -> dict:
+    return {
+        "id": f"call_{uuid.uuid4().hex[:12]}",
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)},
+    }
+
+
+def _expand(value, match):
+    if isinstance(value, str):
+        return match.expand(value)
+    if isinstance(value, dict):
+        return {k: _expand(v, match) for k, v in value.items()}
+    return value
+
+
+def _scripted_reply(last: dict, tools_on: bool):
+    """(reply, latency) from the --script rules, or None to use the default behaviour."""
+    script = FakeOpenAIConfig.script
+    if not script:
+        return None
+
+    if last.get("role") in ("tool", "function"):
+        rule = script.get("after_tool")
+        if not rule:
+            return None
+        try:
+            total = json.loads(last.get("content") or "{}").get("total", "some")
+        except Exception:
+            total = "some"
+        return {"role": "assistant", "content": rule["reply"].replace("{total}", str(total))}, rule.get("latency")
+
+    text = str(last.get("content") or "")
+    for rule in script.get("rules", []):
+        match = re.search(rule["match"], text, re.IGNORECASE)
+        if not match:
+            continue
+        if rule.get("tool_calls") and tools_on:
+            calls = [_tool_call(tc["name"], {**{key: None for key in FILTER_KEYS}, **_expand(tc.get("arguments", {}), match)})
+                     for tc in rule["tool_calls"]]
+            return {"role": "assistant", "content": None, "tool_calls": calls}, rule.get("latency")
+        if "reply" in rule:
+            return {"role": "assistant", "content": match.expand(rule["reply"])}, rule.get("latency")
+    return None
+
+
+def _plan_reply(body: dict) -> tuple:
+    """Decide the assistant message for this request. Returns (message, latency)."""
+    messages = body.get("messages", [])
+    last = messages[-1] if messages else {"role": "user", "content": ""}
+    tools_on = bool(body.get("tools")) and body.get("tool_choice", "auto") != "none"
+    text = str(last.get("content") or "")
+
+    latency = FakeOpenAIConfig.latency
+    if FakeOpenAIConfig.latency_jitter:
+        latency *= 1 + FakeOpenAIConfig.latency_jitter * (2 * _draw(f"{len(messages)}:{text}", "latency") - 1)
+
+    scripted = _scripted_reply(last, tools_on)
+    if scripted is not None:
+        reply, rule_latency = scripted
+        return reply, latency if rule_latency is None else rule_latency
+
+    if last.get("role") in ("tool", "function"):
+        try:
+            total = json.loads(last.get("content") or "{}").get("total", "some")
+        except Exception:
+            total = "some"
+        return {"role": "assistant", "content": f"I found {total} matching properties. Here are the best ones."}, latency
+
+    if tools_on and _draw(text, "tool") < FakeOpenAIConfig.tool_call_rate:
+        return {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [_tool_call("fetch_properties", _filters_from_text(text))],
+        }, latency
+
+    return {"role": "assistant", "content": "Happy to help! What area and budget do you have in mind?"}, latency
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        # Request counter, for load tests driving a server in another process
+        if self.path.rstrip("/") != "/stats":
+            self.send_error(404)
+            return
+        payload = json.dumps({"requests": FakeOpenAIConfig.requests}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with FakeOpenAIConfig.lock:
+            FakeOpenAIConfig.requests += 1
+
+        reply, latency = _plan_reply(body)
+        time.sleep(latency)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        finish = "tool_calls" if reply.get("tool_calls") else "stop"
+
+        if body.get("stream"):
+            self._stream(completion_id, body.get("model", "gpt-4o"), reply, finish)
+            return
+
+        payload = json.dumps({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": reply, "finish_reason": finish}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, completion_id, model, reply, finish):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(delta, finish_reason=None):
+            data = json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            })
+            self._write_chunk(f"data: {data}\n\n".encode())
+
+        chunk({"role": "assistant"})
+        if reply.get("tool_calls"):
+            for i, tc in enumerate(reply["tool_calls"]):
+                chunk({"tool_calls": [{"index": i, "id": tc["id"], "type": "function",
+                                       "function": {"name": tc["function"]["name"], "arguments": tc["function"]["arguments"]}}]})
+        else:
+            for word in re.findall(r"\S+\s*", reply["content"]):
+                time.sleep(FakeOpenAIConfig.token_delay)
+                chunk({"content": word})
+        chunk({}, finish)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_server(port: int = 0, latency: float = None, token_delay: float = None, tool_call_rate: float = None,
+                 latency_jitter: float = None, seed: int = None, script: dict = None):
+    """Start the fake server in a daemon thread. Returns (server, base_url)."""
+    if latency_jitter is not None:
+        FakeOpenAIConfig.latency_jitter = latency_jitter
+    if seed is not None:
+        FakeOpenAIConfig.seed = seed
+    if script is not None:
+        FakeOpenAIConfig.script = script
+    if latency is not None:
+        FakeOpenAIConfig.latency = latency
+    if token_delay is not None:
+        FakeOpenAIConfig.token_delay = token_delay
+    if tool_call_rate is not None:
+        FakeOpenAIConfig.tool_call_rate = tool_call_rate
+    ThreadingHTTPServer.request_queue_size = 1024  # load tests open many connections at once
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--tool-call-rate", type=float, default=1.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--script", help="JSON scenario file (see the module header)")
+    args = parser.parse_args()
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+    server, base_url = start_server(args.port, args.latency, args.token_delay, args.tool_call_rate,
+                                    args.latency_jitter, args.seed, script)
+    print(f"Fake OpenAI listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
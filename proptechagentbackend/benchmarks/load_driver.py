@@ -0,0 +1,273 @@
+# benchmarks/load_driver.py
+#
+# Reproducible load runs against the full app, offline: a seeded dataset
+# (benchmarks.data_generator), the fake OpenAI server in its own process, and a seeded
+# workload driven from --concurrency threads through Flask test clients.
+#
+#   python -m benchmarks.load_driver --scenario chat --requests 300 --concurrency 16
+#   python -m benchmarks.load_driver --scenario fetch --requests 2000 --concurrency 4
+#   python -m benchmarks.compare_results benchmarks/results/a.json benchmarks/results/b.json
+#
+# Scenarios:
+#   fetch         fetch_properties() with a mix of filters (no HTTP, no model)
+#   chat          POST /chat, one first-turn question per request
+#   chat_stream   POST /chat/stream, body read to the end
+#   conversation  POST /chat in conversation-ID mode, --turns turns per conversation
+#
+# Reports p50/p95/p99 latency, throughput, DB statements per request and upstream
+# (fake OpenAI) calls per request, and writes them to --out as JSON.
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+import httpx
+from benchmarks.common import free_port, percentiles, spawn_module
+
+DISTRICTS = ["Thonglor", "Ekkamai", "Phrom Phong", "Ari", "Silom", "Sathorn", "On Nut", "Nana"]
+QUESTION_TEMPLATES = [
+    "{bed} bed under {price}k near {district}",
+    "Any {bed} bed condos under {price}k?",
+    "Show me {bed} bed units near BTS",
+    "What's available near {district}?",
+    "I need a {bed} bedroom place, budget {price}k, close to the BTS",
+]
+
+
+def make_questions(n: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [
+        rng.choice(QUESTION_TEMPLATES).format(
+            bed=rng.randint(1, 3), price=rng.choice([20, 25, 30, 40, 60, 80]), district=rng.choice(DISTRICTS)
+        )
+        for _ in range(n)
+    ]
+
+
+def make_filters(n: int, seed: int) -> list:
+    """fetch_properties filter dicts in roughly the mix the model produces."""
+    rng = random.Random(seed)
+    filters = []
+    for _ in range(n):
+        f = {}
+        if rng.random() < 0.8:
+            f["bedrooms"] = rng.randint(0, 3)
+            if rng.random() < 0.5:
+                f["max_bedrooms"] = f["bedrooms"]
+        if rng.random() < 0.7:
+            f["max_price"] = float(rng.choice([20000, 30000, 45000, 60000, 100000]))
+        if rng.random() < 0.3:
+            f["distance_from_bts"] = rng.choice([0.3, 0.5, 1.0])
+        if rng.random() < 0.25:
+            f["building_name"] = rng.choice(DISTRICTS)
+        if rng.random() < 0.05:
+            f["property_code"] = f"PC{rng.randint(1, 5000):06d}"
+        filters.append(f)
+    return filters
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+class Run:
+    """Collects per-request latencies and errors from the worker threads."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool):
+        with self.lock:
+            self.latencies.append(seconds)
+            if not ok:
+                self.errors += 1
+
+
+def _drive(jobs: list, concurrency: int, make_worker) -> tuple:
+    """Run `jobs` over `concurrency` threads; make_worker() returns a job -> ok callable per thread."""
+    run = Run()
+    cursor = iter(jobs)
+    cursor_lock = threading.Lock()
+
+    def worker():
+        do_job = make_worker()
+        while True:
+            with cursor_lock:
+                job = next(cursor, None)
+            if job is None:
+                return
+            start = time.perf_counter()
+            try:
+                ok = do_job(job)
+            except Exception as e:
+                print(f"[ERR] {e}")
+                ok = False
+            run.record(time.perf_counter() - start, ok)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return run, time.perf_counter() - started
+
+
+def scenario_workers(scenario: str, app, turns: int):
+    """(make_worker, jobs_per_request) for a scenario."""
+    from helpers import metrics
+    from helpers.property_helpers import fetch_properties
+
+    if scenario == "fetch":
+        def make_worker():
+            def do_job(filters):
+                with app.app_context():
+                    metrics.begin_request("bench.fetch")
+                    fetch_properties(filters)
+                return True
+            return do_job
+        return make_worker
+
+    if scenario == "chat":
+        def make_worker():
+            client = app.test_client()
+            return lambda message: client.post("/chat", json={"message": message}).status_code == 200
+        return make_worker
+
+    if scenario == "chat_stream":
+        def make_worker():
+            client = app.test_client()
+
+            def do_job(message):
+                response = client.post("/chat/stream", json={"message": message}, buffered=True)
+                return response.status_code == 200 and b"event: done" in response.data
+            return do_job
+        return make_worker
+
+    if scenario == "conversation":
+        def make_worker():
+            client = app.test_client()
+
+            def do_job(messages):
+                conversation_id = None
+                for message in messages:
+                    response = client.post("/chat", json={"message": message, "conversation_id": conversation_id})
+                    if response.status_code != 200:
+                        return False
+                    conversation_id = response.get_json()["conversation_id"]
+                return True
+            return do_job
+        return make_worker
+
+    raise ValueError(f"Unknown scenario {scenario!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", choices=["fetch", "chat", "chat_stream", "conversation"], default="chat")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=3, help="turns per conversation (conversation scenario)")
+    parser.add_argument("--buildings", type=int, default=200)
+    parser.add_argument("--properties", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", type=float, default=0.3, help="fake OpenAI latency per completion")
+    parser.add_argument("--latency-jitter", type=float, default=0.2)
+    parser.add_argument("--token-delay", type=float, default=0.005)
+    parser.add_argument("--tool-call-rate", type=float, default=1.0)
+    parser.add_argument("--script", help="scenario file for the fake OpenAI server")
+    parser.add_argument("--label", default="", help="free-form tag stored with the results")
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "results"))
+    args = parser.parse_args()
+
+    openai_port = free_port()
+    openai_url = f"http://127.0.0.1:{openai_port}/v1"
+    upstream_args = ["benchmarks.fake_openai_server", "--port", str(openai_port),
+                     "--latency", str(args.latency), "--latency-jitter", str(args.latency_jitter),
+                     "--token-delay", str(args.token_delay), "--tool-call-rate", str(args.tool_call_rate),
+                     "--seed", str(args.seed)]
+    if args.script:
+        upstream_args += ["--script", args.script]
+    upstream = spawn_module(upstream_args, openai_port)
+
+    def upstream_requests():
+        return httpx.get(f"http://127.0.0.1:{openai_port}/stats").json()["requests"]
+
+    try:
+        from benchmarks.common import make_chat_app
+        from benchmarks.data_generator import seed
+        from database import db
+        from helpers import metrics
+
+        app = make_chat_app(openai_url)
+        with app.app_context():
+            dataset = seed(args.buildings, args.properties, seed=args.seed)
+            dialect = db.engine.dialect.name
+
+        total = args.warmup + args.requests
+        if args.scenario == "fetch":
+            jobs = make_filters(total, args.seed)
+        elif args.scenario == "conversation":
+            questions = make_questions(total * args.turns, args.seed)
+            jobs = [questions[i * args.turns:(i + 1) * args.turns] for i in range(total)]
+        else:
+            jobs = make_questions(total, args.seed)
+
+        make_worker = scenario_workers(args.scenario, app, args.turns)
+        if args.warmup:
+            _drive(jobs[:args.warmup], args.concurrency, make_worker)
+
+        statements_before = metrics.counter_value("db_statements_total")
+        upstream_before = upstream_requests()
+        run, elapsed = _drive(jobs[args.warmup:], args.concurrency, make_worker)
+        statements = metrics.counter_value("db_statements_total") - statements_before
+        upstream_calls = upstream_requests() - upstream_before
+    finally:
+        upstream.kill()
+
+    result = {
+        "scenario": args.scenario,
+        "label": args.label,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "database": dialect,
+        "params": vars(args),
+        "dataset": dataset,
+        "requests": args.requests,
+        "errors": run.errors,
+        "duration_s": elapsed,
+        "throughput_rps": args.requests / elapsed,
+        "latency_ms": percentiles(run.latencies),
+        "db_statements_per_request": statements / args.requests,
+        "upstream_calls_per_request": upstream_calls / args.requests,
+    }
+
+    os.makedirs(args.out, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(args.out, f"{args.scenario}-{stamp}{'-' + args.label if args.label else ''}.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+
+    latency = result["latency_ms"]
+    print(f"{args.scenario}: {result['throughput_rps']:.1f} req/s  p50={latency['p50']:.1f}ms  "
+          f"p95={latency['p95']:.1f}ms  p99={latency['p99']:.1f}ms  errors={run.errors}  "
+          f"db_statements/req={result['db_statements_per_request']:.2f}  "
+          f"upstream_calls/req={result['upstream_calls_per_request']:.2f}")
+    print(f"Saved {path}")
+
+
+if __name__ == "__main__":
+    main()
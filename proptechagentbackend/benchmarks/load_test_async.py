@@ -0,0 +1,154 @@
+# benchmarks/load_test_async.py
+#
+# Concurrent-chat capacity of ONE worker, WSGI vs ASGI, against the local fake OpenAI
+# server (so every chat spends most of its time waiting on the "model").
+#   python -m benchmarks.load_test_async --concurrency 64 --requests 256 --latency 0.5 --threads 8
+#
+#   sync:  the Flask app on a WSGI server with a fixed pool of --threads request
+#          threads (a gunicorn gthread worker, in effect)
+#   async: asgi:application on uvicorn, single process, single event loop
+#
+# Every chat makes two model calls (tool call + answer) and one fetch_properties.
+# The completion cache is switched off so each request really goes upstream.
+# The fake OpenAI server and the app worker each run in their own process, so the
+# load driver and the fake upstream don't compete with the worker for the GIL.
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from benchmarks.common import free_port, spawn_module
+
+QUESTIONS = [
+    "2 bed under 30k near BTS",
+    "Any 1 bed condos under 20k?",
+    "Show me 3 bed units",
+    "What's available near Asok?",
+]
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server handling requests on a bounded thread pool."""
+
+    request_queue_size = 1024
+
+    def __init__(self, host, port, app, threads: int):
+        super().__init__(host, port, app, handler=QuietHandler)
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def serve(mode: str, port: int, openai_url: str, threads: int):
+    """Worker process: seed a fresh database and serve the app in `mode` until killed."""
+    from benchmarks.common import make_chat_app, seed_inventory
+    from config import Config
+
+    app = make_chat_app(openai_url)
+    with app.app_context():
+        seed_inventory(200, 5000)
+    Config.COMPLETION_CACHE_ENABLED = False
+
+    if mode == "sync":
+        PooledWSGIServer("127.0.0.1", port, app, threads).serve_forever()
+    else:
+        import uvicorn
+        from asgi import application
+        uvicorn.run(application, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+
+
+def _upstream_requests(openai_url: str) -> int:
+    return httpx.get(openai_url.rsplit("/v1", 1)[0] + "/stats").json()["requests"]
+
+
+async def drive(base_url: str, n: int, concurrency: int) -> dict:
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        async def one(i: int):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/chat", json={"message": QUESTIONS[i % len(QUESTIONS)]})
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "throughput_rps": n / elapsed,
+        "p50_ms": 1000 * latencies[len(latencies) // 2],
+        "p95_ms": 1000 * latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--threads", type=int, default=8, help="request threads of the sync worker")
+    parser.add_argument("--modes", default="sync,async")
+    parser.add_argument("--serve", choices=["sync", "async"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--openai-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.openai_url, args.threads)
+        return
+
+    openai_port = free_port()
+    openai_url = f"http://127.0.0.1:{openai_port}/v1"
+    upstream = spawn_module(["benchmarks.fake_openai_server", "--port", str(openai_port),
+                       "--latency", str(args.latency), "--token-delay", "0", "--tool-call-rate", "1.0"], openai_port)
+
+    # Ideal per-chat time is two model round trips; a worker's capacity is how many
+    # of those it keeps in flight at once
+    ideal = 2 * args.latency
+    try:
+        for mode in args.modes.split(","):
+            port = free_port()
+            worker = spawn_module(["benchmarks.load_test_async", "--serve", mode, "--port", str(port),
+                             "--openai-url", openai_url, "--threads", str(args.threads)], port)
+            try:
+                before = _upstream_requests(openai_url)
+                result = asyncio.run(drive(f"http://127.0.0.1:{port}", args.requests, args.concurrency))
+                upstream_calls = _upstream_requests(openai_url) - before
+            finally:
+                worker.kill()
+                worker.wait()
+            capacity = result["throughput_rps"] * ideal
+            print(f"{mode:5s}  throughput={result['throughput_rps']:7.1f} req/s  "
+                  f"p50={result['p50_ms']:7.0f} ms  p95={result['p95_ms']:7.0f} ms  "
+                  f"concurrent chats~{capacity:5.1f}  errors={result['errors']}  "
+                  f"upstream_calls={upstream_calls}")
+    finally:
+        upstream.kill()
+
+
+if __name__ == "__main__":
+    main()
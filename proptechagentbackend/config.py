@@ -7,8 +7,132 @@ class Config:
 
     SQLALCHEMY_DATABASE_URI = db_url
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool for the single shared engine (flask_sqlalchemy's db.engine)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    SQLALCHEMY_ENGINE_OPTIONS = {"pool_pre_ping": True}
+    if db_url and not db_url.startswith("sqlite"):
+        SQLALCHEMY_ENGINE_OPTIONS.update({
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        })
     SECRET_KEY = os.getenv("SECRET_KEY")
 
     # CORS settings
     CORS_ORIGINS = os.getenv("CORS_ORIGINS")
     CORS_SUPPORTS_CREDENTIALS = True
+
+    # Server-side conversation store ("memory" or "sql")
+    CONVERSATION_STORE = os.getenv("CONVERSATION_STORE", "memory")
+    CONVERSATION_TTL_SECONDS = int(os.getenv("CONVERSATION_TTL_SECONDS", "86400"))
+    CONVERSATION_MAX_ENTRIES = int(os.getenv("CONVERSATION_MAX_ENTRIES", "10000"))
+
+    # Tool execution for /chat: max model<->tool rounds per turn and parallel workers
+    TOOL_MAX_ROUNDS = int(os.getenv("TOOL_MAX_ROUNDS", "4"))
+    TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+
+    # In-memory NumPy index for fetch_properties range filters
+    PROPERTY_INDEX_ENABLED = os.getenv("PROPERTY_INDEX_ENABLED", "false").lower() == "true"
+    PROPERTY_INDEX_REFRESH_SECONDS = float(os.getenv("PROPERTY_INDEX_REFRESH_SECONDS", "30"))
+    PROPERTY_INDEX_FULL_RELOAD_SECONDS = float(os.getenv("PROPERTY_INDEX_FULL_RELOAD_SECONDS", "3600"))
+
+    # How often each process checks the inventory_generation counter for building/property/station
+    # writes committed by other processes (helpers/inventory_sync.py); bounds how stale the
+    # result cache and the in-memory indexes can be after a CLI import or another worker's write
+    INVENTORY_SYNC_CHECK_SECONDS = float(os.getenv("INVENTORY_SYNC_CHECK_SECONDS", "5"))
+
+    # fetch_properties result cache (cleared when a Property/Building/Station write commits)
+    PROPERTY_CACHE_ENABLED = os.getenv("PROPERTY_CACHE_ENABLED", "true").lower() == "true"
+    PROPERTY_CACHE_TTL_SECONDS = float(os.getenv("PROPERTY_CACHE_TTL_SECONDS", "300"))
+    PROPERTY_CACHE_MAX_BYTES = int(os.getenv("PROPERTY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # Compaction of tool results before they go into the prompt
+    TOOL_RESULT_TOP_K = int(os.getenv("TOOL_RESULT_TOP_K", "20"))
+    TOOL_RESULT_TOKEN_BUDGET = int(os.getenv("TOOL_RESULT_TOKEN_BUDGET", "2000"))
+
+    # Prompt compaction before each /chat model call (helpers/prompt_compactor.py): recent turns
+    # kept verbatim, older tool outputs replaced by references, older turns summarized when the
+    # prompt is over the token budget
+    CONVERSATION_COMPACTION_ENABLED = os.getenv("CONVERSATION_COMPACTION_ENABLED", "true").lower() == "true"
+    CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "6000"))
+    CONVERSATION_KEEP_TURNS = int(os.getenv("CONVERSATION_KEEP_TURNS", "3"))
+    CONVERSATION_SUMMARY_MODEL = os.getenv("CONVERSATION_SUMMARY_MODEL", "gpt-4o-mini")  # Empty = extractive summary
+    CONVERSATION_SUMMARY_MAX_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", "400"))
+    CONVERSATION_SUMMARY_CACHE_ENTRIES = int(os.getenv("CONVERSATION_SUMMARY_CACHE_ENTRIES", "1000"))
+    # Estimated model prefill time per 1k prompt tokens, for the latency-saved metric
+    PROMPT_PREFILL_SECONDS_PER_1K_TOKENS = float(os.getenv("PROMPT_PREFILL_SECONDS_PER_1K_TOKENS", "0.05"))
+
+    # JSON encoding for responses (helpers/json_provider.py): "auto" uses orjson (pinned in
+    # requirements.txt) when installed, "orjson" requires it, "stdlib" forces the standard library encoder
+    JSON_ENCODER = os.getenv("JSON_ENCODER", "auto").lower()
+    # gzip/brotli response compression (helpers/response_compression.py); bodies under the
+    # threshold are sent as-is. Brotli is used when Brotli (pinned in requirements.txt) is installed.
+    RESPONSE_COMPRESSION_ENABLED = os.getenv("RESPONSE_COMPRESSION_ENABLED", "true").lower() == "true"
+    RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+    RESPONSE_COMPRESSION_GZIP_LEVEL = int(os.getenv("RESPONSE_COMPRESSION_GZIP_LEVEL", "6"))
+    RESPONSE_COMPRESSION_BROTLI_QUALITY = int(os.getenv("RESPONSE_COMPRESSION_BROTLI_QUALITY", "5"))
+
+    # POST /properties/search: max filter sets per request (all run in one statement)
+    PROPERTY_SEARCH_MAX_SETS = int(os.getenv("PROPERTY_SEARCH_MAX_SETS", "20"))
+
+    # Denormalized property_search read model (helpers/property_read_model.py): when enabled it is
+    # kept in sync on write and searches read it. Run `flask read-model rebuild` before switching on.
+    PROPERTY_READ_MODEL_ENABLED = os.getenv("PROPERTY_READ_MODEL_ENABLED", "false").lower() == "true"
+
+    # GET /properties: keyset page sizes and rows fetched per server-side cursor batch
+    PROPERTY_LISTING_PAGE_SIZE = int(os.getenv("PROPERTY_LISTING_PAGE_SIZE", "100"))
+    PROPERTY_LISTING_MAX_PAGE_SIZE = int(os.getenv("PROPERTY_LISTING_MAX_PAGE_SIZE", "1000"))
+    PROPERTY_LISTING_BATCH_SIZE = int(os.getenv("PROPERTY_LISTING_BATCH_SIZE", "500"))
+
+    # Lead matching (helpers/lead_matching.py): matches kept per client, how far over
+    # budget / under the wanted size a property may be, and clients scored per block
+    LEAD_MATCH_TOP_K = int(os.getenv("LEAD_MATCH_TOP_K", "10"))
+    LEAD_MATCH_BUDGET_SLACK = float(os.getenv("LEAD_MATCH_BUDGET_SLACK", "0.10"))
+    LEAD_MATCH_SIZE_SLACK = float(os.getenv("LEAD_MATCH_SIZE_SLACK", "0.15"))
+    LEAD_MATCH_CLIENT_BLOCK = int(os.getenv("LEAD_MATCH_CLIENT_BLOCK", "256"))
+
+    # Background jobs (helpers/job_scheduler.py, run with `flask jobs worker`)
+    JOB_WORKER_PROCESSES = int(os.getenv("JOB_WORKER_PROCESSES", "2"))
+    JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1.0"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))  # Doubles per attempt
+    JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "600"))
+    JOB_LOCK_TIMEOUT_SECONDS = float(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "900"))  # No heartbeat for longer = worker died
+    JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", str(JOB_LOCK_TIMEOUT_SECONDS / 3)))
+    # Directory import_inventory jobs may read from; unset = inventory files can only be imported with the CLI
+    JOB_IMPORT_DIR = os.getenv("JOB_IMPORT_DIR")
+    # Built-in recurring jobs (0 = not scheduled)
+    LEAD_MATCH_INTERVAL_SECONDS = int(os.getenv("LEAD_MATCH_INTERVAL_SECONDS", "900"))
+    PROPERTY_READ_MODEL_CHECK_SECONDS = int(os.getenv("PROPERTY_READ_MODEL_CHECK_SECONDS", "3600"))
+
+    # Geospatial index (helpers/geo_index.py): grid cell size, the radius used for station
+    # searches when none is given, and caps on what one query may ask for
+    GEO_INDEX_CELL_KM = float(os.getenv("GEO_INDEX_CELL_KM", "0.25"))
+    GEO_DEFAULT_RADIUS_KM = float(os.getenv("GEO_DEFAULT_RADIUS_KM", "0.5"))
+    GEO_MAX_RADIUS_KM = float(os.getenv("GEO_MAX_RADIUS_KM", "25"))
+    GEO_MAX_NEAREST = int(os.getenv("GEO_MAX_NEAREST", "200"))
+
+    # Trigram index used to resolve property_name/building_name filters to building IDs
+    BUILDING_NAME_INDEX_ENABLED = os.getenv("BUILDING_NAME_INDEX_ENABLED", "true").lower() == "true"
+    # Minimum rarity-weighted share of the query's trigrams a name must have (substrings score 1)
+    BUILDING_NAME_MATCH_THRESHOLD = float(os.getenv("BUILDING_NAME_MATCH_THRESHOLD", "0.6"))
+
+    # Tracing: fraction of requests whose internal spans are recorded (0.0 - 1.0)
+    METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "1.0"))
+
+    # Completion cache for /chat model calls
+    COMPLETION_CACHE_ENABLED = os.getenv("COMPLETION_CACHE_ENABLED", "true").lower() == "true"
+    COMPLETION_CACHE_MAX_ENTRIES = int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", "1000"))
+    COMPLETION_CACHE_TTL_SECONDS = float(os.getenv("COMPLETION_CACHE_TTL_SECONDS", "3600"))  # 0 = no expiry
+
+    # Assistants-API run waiting (helpers/chatbot_helper.py)
+    ASSISTANT_RUN_DEADLINE_SECONDS = float(os.getenv("ASSISTANT_RUN_DEADLINE_SECONDS", "120"))
+    ASSISTANT_POLL_INITIAL_SECONDS = float(os.getenv("ASSISTANT_POLL_INITIAL_SECONDS", "0.05"))
+    ASSISTANT_POLL_MAX_SECONDS = float(os.getenv("ASSISTANT_POLL_MAX_SECONDS", "1.0"))
+    ASSISTANT_RUN_STREAMING = os.getenv("ASSISTANT_RUN_STREAMING", "true").lower() == "true"
+    THREAD_MIRROR_MAX_THREADS = int(os.getenv("THREAD_MIRROR_MAX_THREADS", "1000"))
@@ -3,6 +3,14 @@ from flask import Flask
 from flask_cors import CORS
 from config import Config
 from database import db, bcrypt
+from database.session import TimedQueuePool, bind_session_factory, instrument_engine
+from database.upgrade import upgrade_db_command
+from helpers.inventory_import import import_inventory_command
+from helpers.property_read_model import read_model_cli
+from helpers.lead_matching import match_leads_command
+from helpers.job_scheduler import jobs_cli
+from helpers.json_provider import install_json_provider
+from helpers.response_compression import install_compression
 import os
 
 def create_app():
@@ -12,10 +20,32 @@ def create_app():
     # Apply configuration from Config class
     app.config.from_object(Config)
 
+    # Fast JSON encoding (Decimal/datetime aware) and gzip/brotli for large responses
+    install_json_provider(app)
+    install_compression(app)
+
+    # Time pool checkouts (SQLite uses its own pool types, so leave it alone)
+    engine_options = dict(app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+    if "pool_size" in engine_options:
+        engine_options["poolclass"] = TimedQueuePool
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+
     # Initialize SQLAlchemy and Bcrypt with the app instance
     db.init_app(app)
     bcrypt.init_app(app)
 
+    # One engine for everything: the request-scoped sessions share db.engine's pool
+    with app.app_context():
+        bind_session_factory(db.engine)
+        instrument_engine(db.engine)
+
+    # CLI commands (flask --app main <command>)
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(import_inventory_command)
+    app.cli.add_command(read_model_cli)
+    app.cli.add_command(match_leads_command)
+    app.cli.add_command(jobs_cli)
+
     # Setup CORS configuration
     allowed_origins = os.getenv("CORS_ORIGINS")
 
@@ -1,20 +1,42 @@
 # database/session.py
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
-import os
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from helpers import metrics
 
-# Get the raw database URL from the environment
-raw_db_url = os.getenv("DATABASE_URL")
 
-# If the URL starts with postgres://, replace it with postgresql://
-if raw_db_url and raw_db_url.startswith("postgres://"):
-    raw_db_url = raw_db_url.replace("postgres://", "postgresql://", 1)
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each connection checkout waited."""
 
-engine = create_engine(raw_db_url, pool_pre_ping=True)
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe("db_pool_checkout_wait_seconds", time.perf_counter() - start)
 
-# Create a configured "Session" class
-SessionFactory = sessionmaker(bind=engine)
 
-# Create a scoped session
-ScopedSession = scoped_session(SessionFactory)
+# Sessions outside flask_sqlalchemy's db.session (scripts, worker threads). It has no
+# engine of its own: create_app() binds it to db.engine so the whole app shares one pool.
+SessionFactory = sessionmaker()
+
+
+def bind_session_factory(engine):
+    SessionFactory.configure(bind=engine)
+
+
+def instrument_engine(engine):
+    """Record per-statement latency (sampled) and a statement count per endpoint."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter() if metrics.is_sampled() else None
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        endpoint = metrics.current_endpoint()
+        metrics.inc("db_statements_total", endpoint=endpoint)
+        if context._query_started is not None:
+            metrics.observe("db_query_seconds", time.perf_counter() - context._query_started, endpoint=endpoint)
@@ -0,0 +1,125 @@
+# database/upgrade.py
+#
+# Brings an existing database up to the current models. The app never runs
+# create_all() on startup, so tables that predate a column, index or constraint
+# don't get it on their own, and every ORM query naming the new column fails.
+#
+#   flask --app main upgrade-db
+#
+# Every step is idempotent, so it is safe to run on every deploy:
+#  - Missing tables are created by create_all(), which leaves existing tables alone.
+#  - Columns are only added when the table doesn't have them yet.
+#  - Indexes use CREATE INDEX IF NOT EXISTS.
+#  - Backfills only touch rows that are still NULL.
+#
+# Building coordinates can't be derived from anything already stored. Until they
+# are filled in, the geo index is empty and every geo filter matches nothing. Load
+# them (and the station list) with the importer; an upsert only writes the
+# columns present in the file:
+#   flask --app main import-inventory coordinates.csv --kind buildings --no-create-buildings
+#       (header: name,latitude,longitude)
+#   flask --app main import-inventory stations.csv --kind stations
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import inspect, text
+from database import db
+from models.sql_models import Building, Client, ClientProperty, Property
+
+# Columns added to tables that already existed: (model, column name)
+NEW_COLUMNS = [
+    (Client, "updated_at"),
+    (Building, "latitude"),
+    (Building, "longitude"),
+    (Property, "updated_at"),
+    (ClientProperty, "match_score"),
+]
+
+# (index name, table, columns, unique)
+NEW_INDEXES = [
+    # Property index refresh watermark, and the buildings join / building_id filters
+    ("ix_properties_updated_at_id", "properties", ("updated_at", "id"), False),
+    ("ix_properties_building_id", "properties", ("building_id",), False),
+    # Keyset order of the GET /properties listing
+    ("ix_properties_created_at_id", "properties", ("created_at", "id"), False),
+    ("ix_client_properties_client_id", "client_properties", ("client_id",), False),
+    # What write_matches' ON CONFLICT (client_id, property_id) targets
+    ("uq_client_properties_pair", "client_properties", ("client_id", "property_id"), True),
+]
+
+# Tables whose new updated_at starts out as created_at
+BACKFILL_UPDATED_AT = ["clients", "properties"]
+
+# Keeps one row per (client_id, property_id): the one an agent acted on, else the oldest
+DEDUPE_CLIENT_PROPERTIES = """
+DELETE FROM client_properties WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY client_id, property_id
+            ORDER BY CASE WHEN is_active THEN 0 ELSE 1 END,
+                     CASE WHEN comment IS NULL OR comment = '' THEN 1 ELSE 0 END,
+                     id
+        ) AS position
+        FROM client_properties
+    ) ranked
+    WHERE position > 1
+)
+"""
+
+
+def _add_columns(connection) -> list:
+    inspector = inspect(connection)
+    # Postgres can also guard the ALTER itself, in case two deploys run this at once
+    if_not_exists = " IF NOT EXISTS" if connection.dialect.name == "postgresql" else ""
+    added = []
+    for model, name in NEW_COLUMNS:
+        table = model.__table__
+        if name in {column["name"] for column in inspector.get_columns(table.name)}:
+            continue
+        column_type = table.c[name].type.compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN{if_not_exists} {name} {column_type}"))
+        added.append(f"{table.name}.{name}")
+    return added
+
+
+def _create_indexes(connection) -> list:
+    inspector = inspect(connection)
+    created = []
+    for name, table, columns, unique in NEW_INDEXES:
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        existing |= {constraint["name"] for constraint in inspector.get_unique_constraints(table)}
+        if name in existing:
+            continue
+        if name == "uq_client_properties_pair":
+            removed = connection.execute(text(DEDUPE_CLIENT_PROPERTIES)).rowcount
+            if removed:
+                print(f"[LOG] Removed {removed} duplicate client_properties rows")
+        connection.execute(text(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+        ))
+        created.append(name)
+    return created
+
+
+def upgrade(engine) -> dict:
+    """Apply every missing table, column and index. Returns what was changed."""
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        columns = _add_columns(connection)
+        indexes = _create_indexes(connection)
+        backfilled = {
+            table: connection.execute(
+                text(f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL AND created_at IS NOT NULL")
+            ).rowcount
+            for table in BACKFILL_UPDATED_AT
+        }
+    return {"columns": columns, "indexes": indexes, "backfilled": backfilled}
+
+
+@click.command("upgrade-db")
+@with_appcontext
+def upgrade_db_command():
+    """Add the tables, columns and indexes an existing database is missing."""
+    changes = upgrade(db.engine)
+    print(f"[LOG] Database upgraded: columns added {changes['columns'] or 'none'}, "
+          f"indexes created {changes['indexes'] or 'none'}, updated_at backfilled {changes['backfilled']}")
@@ -0,0 +1,246 @@
+# helpers/async_chat.py
+#
+# Asyncio implementation of POST /chat and POST /chat/stream for ASGI mode (see asgi.py).
+# Same request/response contract as routes/chat_routes.py, but a turn waiting on
+# OpenAI holds no thread: the model calls go through AsyncOpenAI and only the DB work
+# (tools, SQL conversation store) is offloaded to the shared tool pool.
+
+import os
+import copy
+import time
+import traceback
+from openai import AsyncOpenAI
+from config import Config
+from helpers.chat_turns import (
+    ChatRequestError, build_turn, finish_turn, assistant_message_dict,
+    merge_tool_call_deltas, completion_request, completion_cache_key
+)
+from helpers.tool_executor import offload, execute_tool_calls_async, iter_tool_results_async, tool_messages
+from helpers.sse_helpers import format_sse
+from helpers.completion_cache import completion_cache
+from helpers.property_cache import property_cache
+from helpers.prompt_compactor import compact_prompt_async
+from helpers.json_provider import dumps_bytes, loads
+from helpers.response_compression import compress_body
+from helpers import metrics
+
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+async def _complete(messages: list, tools_allowed: bool, data_generation: int) -> dict:
+    messages = await compact_prompt_async(messages)
+    key = completion_cache_key(messages, tools_allowed)
+    if key:
+        cached = completion_cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+    with metrics.span("llm_call", mode="json"):
+        completion = await async_client.chat.completions.create(**completion_request(messages, tools_allowed))
+    message = assistant_message_dict(completion.choices[0].message)
+    if key:
+        completion_cache.put(key, copy.deepcopy(message), messages, data_generation)
+    return message
+
+
+async def _stream_completion(messages: list, tools_allowed: bool, data_generation: int, emit) -> dict:
+    """Streamed completion; `emit` is awaited with each SSE token event. Returns the message dict."""
+    messages = await compact_prompt_async(messages)
+    key = completion_cache_key(messages, tools_allowed)
+    if key:
+        cached = completion_cache.get(key)
+        if cached is not None:
+            if cached["content"]:
+                await emit(format_sse("token", {"content": cached["content"]}))
+            return copy.deepcopy(cached)
+
+    content_parts = []
+    tool_calls = {}
+    with metrics.span("llm_call", mode="stream"):
+        stream = await async_client.chat.completions.create(stream=True, **completion_request(messages, tools_allowed))
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content_parts.append(delta.content)
+                await emit(format_sse("token", {"content": delta.content}))
+            merge_tool_call_deltas(tool_calls, delta.tool_calls)
+
+    message = {
+        "role": "assistant",
+        "content": "".join(content_parts) or None,
+        "tool_calls": [tool_calls[i] for i in sorted(tool_calls)] or None
+    }
+    if key:
+        completion_cache.put(key, copy.deepcopy(message), messages, data_generation)
+    return message
+
+
+async def _store_call(app, fn, *args):
+    # The in-memory store is a dict behind a lock; only the SQL store needs a thread and app context
+    if Config.CONVERSATION_STORE == "sql":
+        return await offload(app, fn, *args)
+    return fn(*args)
+
+
+# --- ASGI plumbing ---
+
+def _cors_headers(scope) -> list:
+    """Mirror flask-cors for the routes served here: echo an allowed Origin, with credentials."""
+    origin = None
+    for name, value in scope.get("headers", []):
+        if name == b"origin":
+            origin = value.decode("latin-1")
+    allowed = [o.strip() for o in (Config.CORS_ORIGINS or "").split(",") if o.strip()]
+    if not origin or not ("*" in allowed or origin in allowed):
+        return []
+    return [
+        (b"access-control-allow-origin", origin.encode("latin-1")),
+        (b"access-control-allow-credentials", b"true"),
+        (b"vary", b"Origin"),
+    ]
+
+
+async def _read_json(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    try:
+        return loads(body) if body else None
+    except ValueError:
+        return None
+
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+
+async def _send_json(send, scope, payload, status: int):
+    # Same encoder and compression rules as the Flask side (helpers/json_provider.py,
+    # helpers/response_compression.py)
+    body, encoding = compress_body(dumps_bytes(payload), _header(scope, b"accept-encoding"))
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+               (b"vary", b"Accept-Encoding")]
+    if encoding:
+        headers.append((b"content-encoding", encoding.encode()))
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": headers + _cors_headers(scope),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _observe_request(endpoint: str, started: float, status: int):
+    metrics.observe("http_request_seconds", time.perf_counter() - started,
+                    endpoint=endpoint, method="POST", status=str(status))
+
+
+async def chat(app, scope, receive, send):
+    """ASGI handler for POST /chat."""
+    endpoint = "chatbot_bp.chat"
+    metrics.begin_request(endpoint)
+    started = time.perf_counter()
+    status = 200
+    try:
+        with metrics.span("chat_parse"):
+            data = await _read_json(receive)
+            turn = await _store_call(app, build_turn, data)
+        conversation_history = turn["history"]
+
+        data_generation = property_cache.generation
+        for round_number in range(Config.TOOL_MAX_ROUNDS + 1):
+            tools_allowed = round_number < Config.TOOL_MAX_ROUNDS
+            message = await _complete(conversation_history, tools_allowed, data_generation)
+            conversation_history.append(message)
+            if not message["tool_calls"]:
+                break
+            conversation_history.extend(await execute_tool_calls_async(app, message["tool_calls"]))
+
+        payload = await _store_call(app, finish_turn, turn, message["content"] or "")
+        metrics.observe("chat_ttfb_seconds", time.perf_counter() - started, mode="json")
+    except ChatRequestError as e:
+        status, payload = e.status, {"error": e.message}
+    except Exception as e:
+        traceback.print_exc()
+        status, payload = 500, {"error": str(e)}
+
+    await _send_json(send, scope, payload, status)
+    _observe_request(endpoint, started, status)
+
+
+async def chat_stream(app, scope, receive, send):
+    """ASGI handler for POST /chat/stream (same SSE events as the Flask route)."""
+    endpoint = "chatbot_bp.chat_stream"
+    metrics.begin_request(endpoint)
+    started = time.perf_counter()
+    try:
+        with metrics.span("chat_parse"):
+            data = await _read_json(receive)
+            turn = await _store_call(app, build_turn, data)
+    except ChatRequestError as e:
+        await _send_json(send, scope, {"error": e.message}, e.status)
+        _observe_request(endpoint, started, e.status)
+        return
+    conversation_history = turn["history"]
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ] + _cors_headers(scope),
+    })
+
+    first_event = True
+
+    async def emit(event: str):
+        nonlocal first_event
+        if first_event:
+            first_event = False
+            metrics.observe("chat_ttfb_seconds", time.perf_counter() - started, mode="stream")
+        await send({"type": "http.response.body", "body": event.encode("utf-8"), "more_body": True})
+
+    try:
+        data_generation = property_cache.generation
+        for round_number in range(Config.TOOL_MAX_ROUNDS + 1):
+            tools_allowed = round_number < Config.TOOL_MAX_ROUNDS
+            message = await _stream_completion(conversation_history, tools_allowed, data_generation, emit)
+            conversation_history.append(message)
+            if not message["tool_calls"]:
+                break
+
+            tool_calls = message["tool_calls"]
+            for tc in tool_calls:
+                await emit(format_sse("tool_call", {
+                    "id": tc["id"],
+                    "name": tc["function"]["name"],
+                    "arguments": tc["function"]["arguments"]
+                }))
+
+            results = {}
+            async for index, result in iter_tool_results_async(app, tool_calls):
+                results[index] = result
+                result_event = {"id": result["id"], "name": result["name"], "ok": result["ok"]}
+                if not result["ok"]:
+                    result_event["error"] = result["content"]
+                await emit(format_sse("tool_result", result_event))
+            conversation_history.extend(tool_messages(tool_calls, results))
+
+        await emit(format_sse("done", await _store_call(app, finish_turn, turn, message["content"] or "")))
+        metrics.observe("chat_stream_total_seconds", time.perf_counter() - started)
+    except Exception as e:
+        traceback.print_exc()
+        await emit(format_sse("error", {"error": str(e)}))
+
+    await send({"type": "http.response.body", "body": b""})
+    _observe_request(endpoint, started, 200)
@@ -0,0 +1,184 @@
+# helpers/building_name_index.py
+
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from config import Config
+from database import db
+from models.sql_models import Building
+from helpers import inventory_sync
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """Lower-case, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def trigrams(normalized: str) -> set:
+    """
+    Character trigrams per word, padded like pg_trgm ("  ab", " ab", "ab ") so
+    short words and word boundaries still produce grams.
+    """
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class BuildingNameIndex:
+    """
+    In-memory inverted index from character trigram to building IDs.
+
+    A query is scored against each candidate building by the share of the query's
+    trigrams that the building name contains (like pg_trgm's word_similarity), with
+    each trigram weighted by its rarity. Words that appear in most names
+    ("sukhumvit", "residence") therefore count for little and the distinctive part
+    of the query decides the match: at the default BUILDING_NAME_MATCH_THRESHOLD of
+    0.6, "ashtn asok" still finds "Ashton Asoke" (about 0.67) but not "Celes Asoke"
+    (about 0.33). A name that contains the query, mid-word too, always scores 1. Once loaded it follows committed Building writes
+    from this process, and reloads when another process changed the inventory
+    (helpers/inventory_sync.py).
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(set)  # trigram -> {building_id}
+        self._names = {}                   # building_id -> normalized name
+        self._grams = {}                   # building_id -> trigrams of the name
+        self._lock = threading.RLock()
+        self.loaded = False
+
+    def load(self):
+        """Full rebuild from the buildings table. Needs an app context."""
+        rows = db.session.query(Building.id, Building.name).all()
+        with self._lock:
+            self._postings = defaultdict(set)
+            self._names = {}
+            self._grams = {}
+            for row in rows:
+                self._add(row.id, row.name)
+            self.loaded = True
+
+    def ensure_loaded(self):
+        inventory_sync.check()
+        if not self.loaded:
+            self.load()
+
+    def invalidate(self):
+        """Drop the index; the next ensure_loaded() rebuilds it."""
+        self.loaded = False
+
+    def _add(self, building_id: int, name: str):
+        normalized = normalize_name(name)
+        grams = trigrams(normalized)
+        self._names[building_id] = normalized
+        self._grams[building_id] = grams
+        for gram in grams:
+            self._postings[gram].add(building_id)
+
+    def remove(self, building_id: int):
+        with self._lock:
+            for gram in self._grams.pop(building_id, ()):
+                ids = self._postings.get(gram)
+                if ids is not None:
+                    ids.discard(building_id)
+                    if not ids:
+                        del self._postings[gram]
+            self._names.pop(building_id, None)
+
+    def upsert(self, building_id: int, name: str):
+        with self._lock:
+            self.remove(building_id)
+            self._add(building_id, name)
+
+    def _literal(self, normalized: str) -> set:
+        # Caller holds the lock. A plain scan over the names, like the ILIKE it stands
+        # in for: the trigram postings can't find a query that starts mid-word ("hton"),
+        # since its padded first grams ("  h", " ht") are in no name.
+        return {building_id for building_id, name in self._names.items() if normalized in name}
+
+    def search(self, query: str, threshold: float = None) -> list:
+        """
+        Return [(building_id, score)] for names scoring at least `threshold`,
+        best first. Names containing the query score 1.
+        """
+        if threshold is None:
+            threshold = Config.BUILDING_NAME_MATCH_THRESHOLD
+        normalized = normalize_name(query)
+        query_grams = trigrams(normalized)
+        if not query_grams:
+            return []
+
+        with self._lock:
+            literal = self._literal(normalized)
+            total_names = max(len(self._names), 1)
+            weights = {}
+            for gram in query_grams:
+                df = len(self._postings.get(gram, ()))
+                weights[gram] = math.log(1.0 + total_names / df) if df else None
+            # Grams no building has (typos, noise) still count against the query, but at
+            # the average weight of the rest: being unknown says nothing about rarity
+            known = [weight for weight in weights.values() if weight is not None]
+            unknown_weight = sum(known) / len(known) if known else 1.0
+            weights = {gram: unknown_weight if weight is None else weight for gram, weight in weights.items()}
+            query_weight = sum(weights.values())
+
+            # Candidate generation: walk posting lists from rarest to most common and stop
+            # once the grams left could not lift a building without them to the threshold.
+            # The common grams are the long posting lists, so this is where the time goes.
+            candidates = set()
+            remaining = query_weight
+            for gram in sorted(query_grams, key=weights.get, reverse=True):
+                if remaining < threshold * query_weight:
+                    break
+                candidates.update(self._postings.get(gram, ()))
+                remaining -= weights[gram]
+
+            scored = [(building_id, 1.0) for building_id in literal]
+            for building_id in candidates - literal:
+                score = sum(weights[g] for g in query_grams & self._grams[building_id]) / query_weight
+                if score >= threshold:
+                    scored.append((building_id, score))
+
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored
+
+    def match_ids(self, query: str, threshold: float = None) -> list:
+        """
+        Building IDs whose name contains `query` (what the ILIKE filter matched), or,
+        when no name does, the fuzzy matches. Lookalikes of a name that exists
+        ("Ekkamai Tower" vs other "... Tower"s) would only widen the result.
+        """
+        normalized = normalize_name(query)
+        if normalized:
+            with self._lock:
+                literal = self._literal(normalized)
+            if literal:
+                return sorted(literal)
+        return [building_id for building_id, _ in self.search(query, threshold)]
+
+
+building_name_index = BuildingNameIndex()
+
+
+@inventory_sync.on_change
+def _on_inventory_change(changes):
+    if not building_name_index.loaded:
+        return
+    if changes is None:
+        # Bulk write or another process: no per-row details, rebuild on next use
+        building_name_index.invalidate()
+        return
+    for change in changes:
+        if change.model is not Building:
+            continue
+        if change.action == "deleted":
+            building_name_index.remove(change.id)
+        elif "name" in change.values:
+            building_name_index.upsert(change.id, change.values["name"])
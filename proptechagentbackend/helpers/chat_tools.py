@@ -0,0 +1,212 @@
+# helpers/chat_tools.py
+
+import json
+from helpers.property_helpers import fetch_properties, fetch_properties_batch
+from helpers.tool_result_compactor import compact_property_results
+from helpers.geo_index import validate_geo_filters
+from helpers.facility_index import FACILITY_SYNONYMS, validate_facility_filters
+
+# System prompt used when a conversation starts without any history
+SYSTEM_MESSAGE = (
+    "You are a property agent named Patrica. "
+    "Help users with property-related queries and use function calling if you need to fetch property details."
+)
+
+CHAT_MODEL = "gpt-4o"
+
+tools = [{
+    "type": "function",
+    "function": {
+        "name": "fetch_properties",
+        "description": "Get property details based on filter criteria. Users can provide minimal or partial filters such as just the building name, or a range for bedrooms, price, etc. Pass null for every filter the user did not specify. Results are ranked by closeness to the filters and paged; use next_cursor to see more.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "bedrooms": {
+                    "type": ["integer", "null"],
+                    "description": "Minimum number of bedrooms"
+                },
+                "max_bedrooms": {
+                    "type": ["integer", "null"],
+                    "description": "Maximum number of bedrooms"
+                },
+                "price": {
+                    "type": ["number", "null"],
+                    "description": "Minimum rental price"
+                },
+                "max_price": {
+                    "type": ["number", "null"],
+                    "description": "Maximum rental price"
+                },
+                "bathrooms": {
+                    "type": ["integer", "null"],
+                    "description": "Minimum number of bathrooms"
+                },
+                "max_bathrooms": {
+                    "type": ["integer", "null"],
+                    "description": "Maximum number of bathrooms"
+                },
+                "sq_meters": {
+                    "type": ["number", "null"],
+                    "description": "Minimum size of the property in square meters"
+                },
+                "max_sq_meters": {
+                    "type": ["number", "null"],
+                    "description": "Maximum size of the property in square meters"
+                },
+                "distance_from_bts": {
+                    "type": ["number", "null"],
+                    "description": "Maximum distance from the nearest BTS station in kilometers"
+                },
+                "property_name": {
+                    "type": ["string", "null"],
+                    "description": "Name of the property (if applicable)"
+                },
+                "building_name": {
+                    "type": ["string", "null"],
+                    "description": "Name of the building"
+                },
+                "property_code": {
+                    "type": ["string", "null"],
+                    "description": "Unique code for the property"
+                },
+                "latitude": {
+                    "type": ["number", "null"],
+                    "description": "Latitude of a map point to search around (requires longitude)"
+                },
+                "longitude": {
+                    "type": ["number", "null"],
+                    "description": "Longitude of a map point to search around (requires latitude)"
+                },
+                "radius_km": {
+                    "type": ["number", "null"],
+                    "description": "Search radius in kilometers around the map point or the stations (default 0.5)"
+                },
+                "nearest": {
+                    "type": ["integer", "null"],
+                    "description": "Only properties in this many buildings closest to the map point"
+                },
+                "near_station": {
+                    "type": ["string", "null"],
+                    "description": "Station name or code to search around, e.g. 'Asok' or 'E4'"
+                },
+                "station_line": {
+                    "type": ["string", "null"],
+                    "description": "Search around every station of a line or system, e.g. 'Sukhumvit', 'Silom', 'MRT Blue' or 'BTS'"
+                },
+                "amenities": {
+                    "type": ["array", "null"],
+                    "items": {"type": "string"},
+                    "description": "Amenities the building must have, all of them. Known amenities: " + ", ".join(FACILITY_SYNONYMS)
+                },
+                "any_amenities": {
+                    "type": ["array", "null"],
+                    "items": {"type": "string"},
+                    "description": "Amenities of which the building must have at least one"
+                },
+                "cursor": {
+                    "type": ["string", "null"],
+                    "description": "next_cursor from a previous fetch_properties result with the same filters, to get the next page"
+                },
+            },
+            "required": [
+            "bedrooms",
+            "max_bedrooms",
+            "price",
+            "max_price",
+            "bathrooms",
+            "max_bathrooms",
+            "sq_meters",
+            "max_sq_meters",
+            "distance_from_bts",
+            "property_name",
+            "building_name",
+            "property_code",
+            "latitude",
+            "longitude",
+            "radius_km",
+            "nearest",
+            "near_station",
+            "station_line",
+            "amenities",
+            "any_amenities",
+            "cursor"
+            ],
+            "additionalProperties": False
+        },
+        "strict": True
+    }
+}]
+
+
+def _clean_filter_args(func_args: dict) -> dict:
+    """
+    Strict mode makes the model send every key, using null for "not specified".
+    Drop those (and blank strings) so they don't become filters.
+    """
+    return {
+        key: value for key, value in func_args.items()
+        if value is not None and not (isinstance(value, str) and not value.strip())
+    }
+
+
+def _parse_tool_args(args_str: str) -> dict:
+    try:
+        func_args = json.loads(args_str or "{}")
+    except Exception:
+        raise ValueError("Error parsing tool arguments.")
+    if not isinstance(func_args, dict):
+        raise ValueError("Error parsing tool arguments.")
+    return func_args
+
+
+def _property_tool_content(results: list, filter_params: dict, cursor) -> str:
+    # The model gets a ranked, paged, compact table rather than every full row
+    compact = compact_property_results(results, filter_params, cursor)
+    return json.dumps(compact, separators=(",", ":"))
+
+
+def execute_tool_call(func_name: str, args_str: str) -> str:
+    """
+    Runs a single tool requested by the model and returns the content to send back
+    to it. Both the JSON and the streaming chat endpoints go through here so the
+    two paths can't drift apart.
+
+    :raises ValueError: if the arguments are not valid JSON or the tool is unknown.
+    """
+    func_args = _parse_tool_args(args_str)
+
+    if func_name == "fetch_properties":
+        filter_params = _clean_filter_args(func_args)
+        cursor = filter_params.pop("cursor", None)
+        return _property_tool_content(fetch_properties(filter_params), filter_params, cursor)
+
+    raise ValueError(f"Unknown tool '{func_name}' called.")
+
+
+def execute_fetch_properties_batch(args_strs: list) -> list:
+    """
+    Run several fetch_properties tool calls from one model turn as a single batched
+    search. Returns one (ok, content) pair per call, in order; a call with bad
+    arguments fails alone without affecting the others.
+    """
+    outcomes = [None] * len(args_strs)
+    valid = []  # (position, filter_params, cursor)
+    for position, args_str in enumerate(args_strs):
+        try:
+            filter_params = _clean_filter_args(_parse_tool_args(args_str))
+            validate_geo_filters(filter_params)
+            validate_facility_filters(filter_params)
+        except ValueError as tool_err:
+            outcomes[position] = (False, str(tool_err))
+            continue
+        cursor = filter_params.pop("cursor", None)
+        valid.append((position, filter_params, cursor))
+
+    batch_results = fetch_properties_batch([filter_params for _, filter_params, _ in valid])
+    for (position, filter_params, cursor), results in zip(valid, batch_results):
+        try:
+            outcomes[position] = (True, _property_tool_content(results, filter_params, cursor))
+        except ValueError as tool_err:
+            outcomes[position] = (False, str(tool_err))
+    return outcomes
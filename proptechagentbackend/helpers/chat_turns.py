@@ -0,0 +1,142 @@
+# helpers/chat_turns.py
+#
+# Framework-free pieces of a /chat turn, shared by the Flask routes and the
+# async (ASGI) chat handler.
+
+from config import Config
+from helpers.chat_tools import tools, SYSTEM_MESSAGE, CHAT_MODEL
+from helpers.conversation_store import get_conversation_store
+from helpers.completion_cache import completion_key
+
+
+class ChatRequestError(Exception):
+    """A client error in the /chat body; carries the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def build_turn(data) -> dict:
+    """
+    Validate a /chat body and return the turn state:
+      - "history": the full message list to send to the model (new messages get appended to it)
+      - "conversation_id": set when the client uses the server-side conversation store
+      - "delta_start": index in "history" where this turn's new messages begin
+
+    The SQL conversation store needs an app context.
+
+    :raises ChatRequestError: on a missing message or unknown conversation_id.
+    """
+    if not data:
+        raise ChatRequestError("Missing JSON body")
+
+    user_message = data.get("message", "").strip()
+    if not user_message:
+        raise ChatRequestError("No 'message' provided")
+
+    conversation_id = None
+    if "conversation_id" in data:
+        # Conversation-ID mode: history lives on the server, client sends only the new message
+        store = get_conversation_store()
+        conversation_id = data.get("conversation_id")
+        if conversation_id:
+            conversation_history = store.load(conversation_id)
+            if conversation_history is None:
+                raise ChatRequestError("Unknown or expired conversation_id", 404)
+        else:
+            conversation_id = store.create()
+            conversation_history = []
+    else:
+        conversation_history = data.get("conversation_history", [])
+        if not isinstance(conversation_history, list):
+            conversation_history = []
+
+    delta_start = len(conversation_history)
+
+    # If no conversation history, add a system message to define the assistant's identity
+    if not conversation_history:
+        conversation_history.append({"role": "system", "content": SYSTEM_MESSAGE})
+
+    # Append the new user message to the conversation history
+    conversation_history.append({"role": "user", "content": user_message})
+    return {
+        "history": conversation_history,
+        "conversation_id": conversation_id,
+        "delta_start": delta_start
+    }
+
+
+def finish_turn(turn: dict, assistant_response: str) -> dict:
+    """
+    Build the response payload for a completed turn. In conversation-ID mode the new
+    messages are appended to the store and only they are returned; otherwise the
+    whole history goes back to the client as before.
+    """
+    if turn["conversation_id"] is None:
+        return {
+            "assistant_message": assistant_response,
+            "conversation_history": turn["history"]
+        }
+
+    new_messages = turn["history"][turn["delta_start"]:]
+    get_conversation_store().append(
+        turn["conversation_id"], new_messages, previous=turn["history"][:turn["delta_start"]]
+    )
+    return {
+        "assistant_message": assistant_response,
+        "conversation_id": turn["conversation_id"],
+        "messages": new_messages
+    }
+
+
+def assistant_message_dict(message) -> dict:
+    """Convert an SDK assistant message into the plain dict we keep in the history."""
+    return {
+        "role": "assistant",
+        "content": message.content,
+        "tool_calls": [
+            {
+                "id": tc.id,
+                "type": tc.type,
+                "function": {
+                    "name": tc.function.name,
+                    "arguments": tc.function.arguments
+                }
+            }
+            for tc in message.tool_calls
+        ] if message.tool_calls else None
+    }
+
+
+def merge_tool_call_deltas(tool_calls: dict, deltas):
+    """Fold streamed tool call fragments into `tool_calls` (index -> call dict)."""
+    for tc in deltas or []:
+        entry = tool_calls.setdefault(tc.index, {
+            "id": None,
+            "type": "function",
+            "function": {"name": "", "arguments": ""}
+        })
+        if tc.id:
+            entry["id"] = tc.id
+        if tc.function and tc.function.name:
+            entry["function"]["name"] += tc.function.name
+        if tc.function and tc.function.arguments:
+            entry["function"]["arguments"] += tc.function.arguments
+
+
+def completion_request(messages: list, tools_allowed: bool) -> dict:
+    """Keyword arguments for client.chat.completions.create for one round."""
+    return {
+        "model": CHAT_MODEL,
+        "messages": messages,
+        "tools": tools,
+        "tool_choice": "auto" if tools_allowed else "none"
+    }
+
+
+def completion_cache_key(messages: list, tools_allowed: bool):
+    if not Config.COMPLETION_CACHE_ENABLED:
+        return None
+    return completion_key(CHAT_MODEL, tools, "auto" if tools_allowed else "none", messages)
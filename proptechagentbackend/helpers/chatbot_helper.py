@@ -2,113 +2,271 @@
 
 import os
 import json
+import asyncio
+import queue
+import threading
 import time
+import random
 import traceback
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+from config import Config
 from helpers.property_helpers import fetch_properties
+from helpers.thread_mirror import ThreadMirror
+from helpers.tool_executor import offload
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 client = OpenAI(api_key=OPENAI_API_KEY)
 assistant_id = os.getenv("OPENAI_ASSISTANT_ID")
 
-def continue_conversation(user_input: str, thread_id: str = None, system_msg: str = None) -> dict:
+# Incremental local copy of thread messages, reused across turns of the same thread
+thread_mirror = ThreadMirror(client, Config.THREAD_MIRROR_MAX_THREADS)
+
+# Run states after which there is nothing more to wait for
+TERMINAL_RUN_STATUSES = {"completed", "requires_action", "failed", "incomplete", "cancelled", "expired"}
+
+# How often a wait on a silent run stream rechecks the deadline and the cancel flag
+STREAM_CHECK_SECONDS = 0.1
+
+_STREAM_END = object()
+
+
+def _cancel_run(thread_id: str, run_id: str):
+    try:
+        client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+    except Exception as cancel_err:
+        print(f"[ERR] Cancelling run {run_id} failed: {cancel_err}")
+
+
+def _stop_reason(deadline: float, cancel_event) -> str:
+    """Return "cancelled"/"timed_out" if the wait should stop now, else None."""
+    if cancel_event is not None and cancel_event.is_set():
+        return "cancelled"
+    if time.monotonic() >= deadline:
+        return "timed_out"
+    return None
+
+
+def _poll_backoff(delay: float, deadline: float) -> tuple:
+    """(seconds to sleep now, delay for the next round): jittered, capped by the deadline."""
+    sleep_for = min(random.uniform(delay / 2, delay), max(deadline - time.monotonic(), 0))
+    return sleep_for, min(delay * 2, Config.ASSISTANT_POLL_MAX_SECONDS)
+
+
+def _run_event(event):
+    """(run_id, status) from a streamed run event, or None for step/message/delta events."""
+    if event.event.startswith("thread.run.") and not event.event.startswith("thread.run.step"):
+        return event.data.id, event.data.status
+    return None
+
+
+def _event_run_id(event):
+    """The run a streamed event belongs to: run events carry it as id, steps and messages as run_id."""
+    if _run_event(event):
+        return event.data.id
+    return getattr(event.data, "run_id", None)
+
+
+def _stream_wait(deadline: float) -> float:
+    return min(STREAM_CHECK_SECONDS, max(deadline - time.monotonic(), 0))
+
+
+def _pump_stream(stream, events: queue.Queue):
+    """Read a run event stream into `events`, then _STREAM_END or the exception that ended it."""
+    try:
+        with stream:
+            for event in stream:
+                events.put(event)
+    except Exception as stream_err:
+        events.put(stream_err)
+        return
+    events.put(_STREAM_END)
+
+
+def _find_started_run(thread_id: str, since: float):
     """
-    Continues or starts a new conversation (thread) with the assistant using the older
-    client.beta.threads approach. We also do a basic check for function calls if status == requires_action.
+    The run a failed create(stream=True) may still have started: the thread's newest
+    run, if it was created at or after `since` (Unix time). None when there is none.
+    """
+    try:
+        runs = client.beta.threads.runs.list(thread_id=thread_id, limit=1, order="desc")
+    except Exception as list_err:
+        print(f"[ERR] Listing runs of thread {thread_id} failed: {list_err}")
+        return None
+    for run in runs.data:
+        if run.created_at >= int(since):  # created_at has one-second resolution
+            return run.id
+    return None
+
+
+def _poll_run(thread_id: str, run_id: str, deadline: float, cancel_event=None) -> str:
+    """
+    Poll a run until it reaches a terminal status, starting at
+    ASSISTANT_POLL_INITIAL_SECONDS and backing off exponentially (with jitter) up to
+    ASSISTANT_POLL_MAX_SECONDS. Short runs are noticed within tens of milliseconds
+    without hammering the API on long ones.
+
+    :return: the run status, or "timed_out"/"cancelled" (the run is cancelled server-side too).
+    """
+    delay = Config.ASSISTANT_POLL_INITIAL_SECONDS
+    while True:
+        run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+        if run.status in TERMINAL_RUN_STATUSES:
+            return run.status
+
+        reason = _stop_reason(deadline, cancel_event)
+        if reason:
+            _cancel_run(thread_id, run_id)
+            return reason
+
+        sleep_for, delay = _poll_backoff(delay, deadline)
+        if cancel_event is not None:
+            cancel_event.wait(sleep_for)  # Wakes up immediately on cancel
+        else:
+            time.sleep(sleep_for)
+
+
+def _run_and_wait(thread_id: str, deadline: float, cancel_event=None) -> tuple:
+    """
+    Start a run on the thread and wait for it to finish.
+
+    Uses streamed run events when enabled, so completion is noticed the moment it
+    happens. The stream is read on a helper thread, so a stream that goes quiet
+    still gives way to the deadline and to cancel_event. If streaming fails or ends
+    early, the run it started (from its events, or else the thread's run list) is
+    polled; a second run is only created when the stream never started one.
+
+    :return: (run_id, status) where status may also be "timed_out" or "cancelled".
+    """
+    if Config.ASSISTANT_RUN_STREAMING:
+        run_id = None
+        started = time.time()
+        try:
+            remaining = max(deadline - time.monotonic(), 1.0)
+            stream = client.with_options(timeout=remaining).beta.threads.runs.create(
+                thread_id=thread_id,
+                assistant_id=assistant_id,
+                stream=True
+            )
+            events = queue.Queue()
+            threading.Thread(target=_pump_stream, args=(stream, events), name=f"run-stream-{thread_id}",
+                             daemon=True).start()
+            while True:
+                reason = _stop_reason(deadline, cancel_event)
+                if reason:
+                    # Cancelling the run server-side also ends the stream the helper thread is reading
+                    run_id = run_id or _find_started_run(thread_id, started)
+                    if run_id:
+                        _cancel_run(thread_id, run_id)
+                    return run_id, reason
+                try:
+                    event = events.get(timeout=_stream_wait(deadline))
+                except queue.Empty:
+                    continue
+                if event is _STREAM_END:
+                    break
+                if isinstance(event, Exception):
+                    raise event
+                run_id = _event_run_id(event) or run_id
+                update = _run_event(event)
+                if update and update[1] in TERMINAL_RUN_STATUSES:
+                    return update
+        except Exception as stream_err:
+            print(f"[ERR] Run streaming failed, falling back to polling: {stream_err}")
+        run_id = run_id or _find_started_run(thread_id, started)
+        if run_id:
+            return run_id, _poll_run(thread_id, run_id, deadline, cancel_event)
+
+    run = client.beta.threads.runs.create(
+        thread_id=thread_id,
+        assistant_id=assistant_id
+    )
+    print(f"[LOG] Created run. ID: {run.id}, status={run.status}")
+    return run.id, _poll_run(thread_id, run.id, deadline, cancel_event)
+
+
+def _final_message(run_status: str, final_text) -> str:
+    """The assistant_message to return for a run that ended with `run_status`."""
+    if run_status == "completed":
+        return final_text if final_text is not None else "No assistant response found."
+    elif run_status == "failed":
+        return "Run ended with status: failed. The model encountered an error."
+    elif run_status == "incomplete":
+        return "Run ended with status: incomplete. Possibly waiting for more info."
+    elif run_status == "timed_out":
+        return "The assistant took too long to respond. Please try again."
+    else:
+        return f"Run ended with status: {run_status}, no final message produced."
+
+
+def _parse_function_call(assistant_text: str):
+    """Return the fetch_properties filter_params from a JSON "function call" message, else None."""
+    parsed = json.loads(assistant_text)
+    if parsed.get("name") != "fetch_properties":
+        return None
+    return parsed.get("arguments", {}).get("filter_params", {})
+
+
+def _conversation_flow(user_input: str, thread_id: str, system_msg: str):
+    """
+    The continue_conversation flow, written once for both the sync and the async
+    client. It does no I/O itself: it yields (operation, kwargs) steps and is sent
+    each step's result (or has its exception thrown in) by _drive / _drive_async,
+    so the two entry points cannot drift apart. Returns the response dict.
+
+    Operations: create_thread, create_message, run_and_wait, latest_assistant_text,
+    fetch_properties.
     """
     try:
         # 1) Create or reuse the conversation thread
         if not thread_id:
-            thread = client.beta.threads.create()
+            thread = yield "create_thread", {}
             thread_id = thread.id
             print(f"[LOG] Created NEW thread: {thread_id}")
             if system_msg:
-                client.beta.threads.messages.create(
-                    thread_id=thread.id,
-                    role="system",
-                    content=system_msg
-                )
+                yield "create_message", {"thread_id": thread_id, "role": "system", "content": system_msg}
         else:
             print(f"[LOG] Reusing EXISTING thread: {thread_id}")
-            thread_stub = type("ThreadStub", (), {})()
-            thread_stub.id = thread_id
-            thread = thread_stub
 
         # 2) Add the user's message to the thread
-        user_message = client.beta.threads.messages.create(
-            thread_id=thread.id,
-            role="user",
-            content=user_input
-        )
+        user_message = yield "create_message", {"thread_id": thread_id, "role": "user", "content": user_input}
         print(f"[LOG] Added user message. ID: {user_message.id}")
 
-        # 3) Start a run
-        run = client.beta.threads.runs.create(
-            thread_id=thread.id,
-            assistant_id=assistant_id
-        )
-        print(f"[LOG] Created run. ID: {run.id}, status={run.status}")
-
-        # 4) Poll until the run ends
-        while True:
-            updated_run = client.beta.threads.runs.retrieve(
-                thread_id=thread.id,
-                run_id=run.id
-            )
-            if updated_run.status in ["completed", "requires_action", "failed", "incomplete"]:
-                break
-            time.sleep(1)
-
-        print(f"[LOG] Polled run => status: {updated_run.status}")
+        # 3) + 4) Start a run and wait until it ends
+        run_id, run_status = yield "run_and_wait", {"thread_id": thread_id}
+        print(f"[LOG] Run {run_id} finished => status: {run_status}")
 
         # 5) If the run requires_action => the LLM may want a “function call”
-        if updated_run.status == "requires_action":
+        if run_status == "requires_action":
             # We'll check the messages to see if there's a special “function_call” request
-            msgs = client.beta.threads.messages.list(thread_id=thread.id).data
             # Often the newest assistant message might contain something like JSON "function_call"
-            assistant_msg = next((m for m in msgs if m.role == "assistant"), None)
-            if assistant_msg and hasattr(assistant_msg, "content"):
+            assistant_text = yield "latest_assistant_text", {"thread_id": thread_id}
+            if assistant_text:
                 # Suppose the model tried to produce a JSON chunk. You have to define your own pattern:
                 # e.g. content could be: {"name": "fetch_properties", "arguments": {...}}
                 try:
-                    parsed = json.loads(assistant_msg.content[0].text.value)
-                    func_name = parsed.get("name")
-                    arguments = parsed.get("arguments", {})
-                    if func_name == "fetch_properties":
+                    filter_params = _parse_function_call(assistant_text)
+                    if filter_params is not None:
                         # 5a) call your local function
-                        filter_params = arguments.get("filter_params", {})
-                        results = fetch_properties(filter_params)
+                        results = yield "fetch_properties", {"filter_params": filter_params}
 
                         # 5b) Add a new message with role="function" containing the result
                         # This is how the new function-calling approach wants it,
                         # but you have to see if `beta.threads` supports role="function"
                         # or if you can emulate it with role="tool".
-                        func_msg = client.beta.threads.messages.create(
-                            thread_id=thread.id,
-                            role="assistant",  # or possibly "tool" if "function" isn't recognized
-                            content=json.dumps(results)
-                        )
+                        yield "create_message", {
+                            "thread_id": thread_id,
+                            "role": "assistant",  # or possibly "tool" if "function" isn't recognized
+                            "content": json.dumps(results)
+                        }
 
                         # 5c) Re-run so the LLM can incorporate the tool’s response
-                        run2 = client.beta.threads.runs.create(
-                            thread_id=thread.id,
-                            assistant_id=assistant_id
-                        )
-                        while True:
-                            updated_run2 = client.beta.threads.runs.retrieve(
-                                thread_id=thread.id,
-                                run_id=run2.id
-                            )
-                            if updated_run2.status in ["completed", "requires_action", "failed", "incomplete"]:
-                                break
-                            time.sleep(1)
-
-                        if updated_run2.status == "completed":
-                            # retrieve final messages again
-                            msgs2 = client.beta.threads.messages.list(thread_id=thread.id).data
-                            final_assistant = [m for m in msgs2 if m.role == "assistant"]
-                            if final_assistant:
-                                final_text = final_assistant[-1].content[0].text.value
+                        # (shares the overall deadline with the first run)
+                        _, run2_status = yield "run_and_wait", {"thread_id": thread_id}
+
+                        if run2_status == "completed":
+                            # pick up only the messages added by the second run
+                            final_text = yield "latest_assistant_text", {"thread_id": thread_id}
+                            if final_text is not None:
                                 return {"assistant_message": final_text, "thread_id": thread_id}
 
                     # If unrecognized function name or parse error, just skip
@@ -116,30 +274,10 @@ def continue_conversation(user_input: str, thread_id: str = None, system_msg: st
                     print("[ERR] Parsing function call failed:", parse_err)
 
         # 6) If we reach here or run was completed, fetch the final assistant message
-        if updated_run.status == "completed":
-            msgs = client.beta.threads.messages.list(thread_id=thread.id).data
-            assistant_msgs = [m for m in msgs if m.role == "assistant"]
-            if assistant_msgs:
-                final_text = assistant_msgs[-1].content[0].text.value
-                return {"assistant_message": final_text, "thread_id": thread_id}
-            else:
-                return {"assistant_message": "No assistant response found.", "thread_id": thread_id}
-
-        elif updated_run.status == "failed":
-            return {
-                "assistant_message": "Run ended with status: failed. The model encountered an error.",
-                "thread_id": thread_id
-            }
-        elif updated_run.status == "incomplete":
-            return {
-                "assistant_message": "Run ended with status: incomplete. Possibly waiting for more info.",
-                "thread_id": thread_id
-            }
-        else:
-            return {
-                "assistant_message": f"Run ended with status: {updated_run.status}, no final message produced.",
-                "thread_id": thread_id
-            }
+        final_text = None
+        if run_status == "completed":
+            final_text = yield "latest_assistant_text", {"thread_id": thread_id}
+        return {"assistant_message": _final_message(run_status, final_text), "thread_id": thread_id}
 
     except Exception as e:
         print("[ERROR] Exception in continue_conversation():")
@@ -148,3 +286,195 @@ def continue_conversation(user_input: str, thread_id: str = None, system_msg: st
             "assistant_message": f"An error occurred: {str(e)}",
             "thread_id": thread_id
         }
+
+
+def _drive(flow, execute):
+    """Run a _conversation_flow with a blocking execute(operation, kwargs)."""
+    value, error = None, None
+    while True:
+        try:
+            operation, kwargs = flow.throw(error) if error else flow.send(value)
+        except StopIteration as done:
+            return done.value
+        try:
+            value, error = execute(operation, kwargs), None
+        except Exception as step_err:
+            value, error = None, step_err
+
+
+def continue_conversation(user_input: str, thread_id: str = None, system_msg: str = None,
+                          cancel_event=None, deadline_seconds: float = None) -> dict:
+    """
+    Continues or starts a new conversation (thread) with the assistant using the older
+    client.beta.threads approach. We also do a basic check for function calls if status == requires_action.
+
+    :param cancel_event: optional threading.Event; setting it stops the wait and cancels the run.
+    :param deadline_seconds: overall time budget for all runs of this call
+        (defaults to Config.ASSISTANT_RUN_DEADLINE_SECONDS).
+    """
+    deadline = time.monotonic() + (deadline_seconds or Config.ASSISTANT_RUN_DEADLINE_SECONDS)
+
+    def execute(operation, kwargs):
+        if operation == "create_thread":
+            return client.beta.threads.create()
+        if operation == "create_message":
+            return client.beta.threads.messages.create(**kwargs)
+        if operation == "run_and_wait":
+            return _run_and_wait(kwargs["thread_id"], deadline, cancel_event)
+        if operation == "latest_assistant_text":
+            return thread_mirror.latest_assistant_text(kwargs["thread_id"])
+        if operation == "fetch_properties":
+            return fetch_properties(kwargs["filter_params"])
+        raise ValueError(f"Unknown operation '{operation}'")
+
+    return _drive(_conversation_flow(user_input, thread_id, system_msg), execute)
+
+
+# --- asyncio variant (ASGI mode) ---
+
+async_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+
+async def _cancel_run_async(thread_id: str, run_id: str):
+    try:
+        await async_client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+    except Exception as cancel_err:
+        print(f"[ERR] Cancelling run {run_id} failed: {cancel_err}")
+
+
+async def _poll_run_async(thread_id: str, run_id: str, deadline: float, cancel_event=None) -> str:
+    """_poll_run for the event loop; cancel_event is an asyncio.Event here."""
+    delay = Config.ASSISTANT_POLL_INITIAL_SECONDS
+    while True:
+        run = await async_client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+        if run.status in TERMINAL_RUN_STATUSES:
+            return run.status
+
+        reason = _stop_reason(deadline, cancel_event)
+        if reason:
+            await _cancel_run_async(thread_id, run_id)
+            return reason
+
+        sleep_for, delay = _poll_backoff(delay, deadline)
+        if cancel_event is not None:
+            try:
+                await asyncio.wait_for(cancel_event.wait(), sleep_for)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(sleep_for)
+
+
+async def _find_started_run_async(thread_id: str, since: float):
+    """_find_started_run on AsyncOpenAI."""
+    try:
+        runs = await async_client.beta.threads.runs.list(thread_id=thread_id, limit=1, order="desc")
+    except Exception as list_err:
+        print(f"[ERR] Listing runs of thread {thread_id} failed: {list_err}")
+        return None
+    for run in runs.data:
+        if run.created_at >= int(since):
+            return run.id
+    return None
+
+
+async def _pump_stream_async(stream, events: asyncio.Queue):
+    try:
+        async with stream:
+            async for event in stream:
+                await events.put(event)
+    except Exception as stream_err:
+        await events.put(stream_err)
+        return
+    await events.put(_STREAM_END)
+
+
+async def _run_and_wait_async(thread_id: str, deadline: float, cancel_event=None) -> tuple:
+    """_run_and_wait on AsyncOpenAI: streamed run events, falling back to polling the same run."""
+    if Config.ASSISTANT_RUN_STREAMING:
+        run_id = None
+        started = time.time()
+        pump = None
+        try:
+            remaining = max(deadline - time.monotonic(), 1.0)
+            stream = await async_client.with_options(timeout=remaining).beta.threads.runs.create(
+                thread_id=thread_id,
+                assistant_id=assistant_id,
+                stream=True
+            )
+            events = asyncio.Queue()
+            pump = asyncio.ensure_future(_pump_stream_async(stream, events))
+            while True:
+                reason = _stop_reason(deadline, cancel_event)
+                if reason:
+                    run_id = run_id or await _find_started_run_async(thread_id, started)
+                    if run_id:
+                        await _cancel_run_async(thread_id, run_id)
+                    return run_id, reason
+                try:
+                    event = await asyncio.wait_for(events.get(), _stream_wait(deadline))
+                except asyncio.TimeoutError:
+                    continue
+                if event is _STREAM_END:
+                    break
+                if isinstance(event, Exception):
+                    raise event
+                run_id = _event_run_id(event) or run_id
+                update = _run_event(event)
+                if update and update[1] in TERMINAL_RUN_STATUSES:
+                    return update
+        except Exception as stream_err:
+            print(f"[ERR] Run streaming failed, falling back to polling: {stream_err}")
+        finally:
+            if pump is not None and not pump.done():
+                pump.cancel()  # Closes the stream through its async with
+        run_id = run_id or await _find_started_run_async(thread_id, started)
+        if run_id:
+            return run_id, await _poll_run_async(thread_id, run_id, deadline, cancel_event)
+
+    run = await async_client.beta.threads.runs.create(
+        thread_id=thread_id,
+        assistant_id=assistant_id
+    )
+    print(f"[LOG] Created run. ID: {run.id}, status={run.status}")
+    return run.id, await _poll_run_async(thread_id, run.id, deadline, cancel_event)
+
+
+async def _drive_async(flow, execute):
+    """_drive with an awaitable execute(operation, kwargs)."""
+    value, error = None, None
+    while True:
+        try:
+            operation, kwargs = flow.throw(error) if error else flow.send(value)
+        except StopIteration as done:
+            return done.value
+        try:
+            value, error = await execute(operation, kwargs), None
+        except Exception as step_err:
+            value, error = None, step_err
+
+
+async def continue_conversation_async(app, user_input: str, thread_id: str = None, system_msg: str = None,
+                                      cancel_event=None, deadline_seconds: float = None) -> dict:
+    """
+    continue_conversation for the event loop. Same flow and return value; the
+    fetch_properties call runs on the tool pool inside `app`'s context.
+
+    :param cancel_event: optional asyncio.Event; setting it stops the wait and cancels the run.
+    """
+    deadline = time.monotonic() + (deadline_seconds or Config.ASSISTANT_RUN_DEADLINE_SECONDS)
+
+    async def execute(operation, kwargs):
+        if operation == "create_thread":
+            return await async_client.beta.threads.create()
+        if operation == "create_message":
+            return await async_client.beta.threads.messages.create(**kwargs)
+        if operation == "run_and_wait":
+            return await _run_and_wait_async(kwargs["thread_id"], deadline, cancel_event)
+        if operation == "latest_assistant_text":
+            return await thread_mirror.latest_assistant_text_async(async_client, kwargs["thread_id"])
+        if operation == "fetch_properties":
+            return await offload(app, fetch_properties, kwargs["filter_params"])
+        raise ValueError(f"Unknown operation '{operation}'")
+
+    return await _drive_async(_conversation_flow(user_input, thread_id, system_msg), execute)
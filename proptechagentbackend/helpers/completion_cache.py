@@ -0,0 +1,122 @@
+# helpers/completion_cache.py
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+from helpers import metrics
+from helpers.property_cache import property_cache
+
+
+def normalize_messages(messages: list) -> list:
+    """
+    Reduce a message list to what determines the model's answer. Whitespace in text
+    is collapsed and tool call IDs (random per call) are replaced by their position,
+    so the same exchange in two conversations produces the same key.
+    """
+    call_positions = {}
+    normalized = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str) and message.get("role") != "tool":
+            content = " ".join(content.split())
+        entry = {"role": message.get("role"), "content": content}
+
+        for tc in message.get("tool_calls") or []:
+            call_positions.setdefault(tc.get("id"), len(call_positions))
+            entry.setdefault("tool_calls", []).append({
+                "name": tc["function"]["name"],
+                "arguments": tc["function"]["arguments"],
+            })
+        if message.get("role") == "tool":
+            entry["tool_call"] = call_positions.get(message.get("tool_call_id"))
+        if message.get("name"):
+            entry["name"] = message["name"]
+        normalized.append(entry)
+    return normalized
+
+
+def completion_key(model: str, tools: list, tool_choice: str, messages: list) -> str:
+    payload = {
+        "model": model,
+        "tools": tools,
+        "tool_choice": tool_choice,
+        "messages": normalize_messages(messages),
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _has_tool_output(messages: list) -> bool:
+    return any(m.get("role") in ("tool", "function") for m in messages)
+
+
+class CompletionCache:
+    """
+    Exact-match LRU of assistant messages keyed by completion_key(), with an
+    optional TTL.
+
+    A completion that was given tool output is only reused while the property
+    data is unchanged (property_cache.generation). After an edit, the cached
+    answer may describe rows that no longer look like that.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at or None, data_generation or None, message)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, generation, message = entry
+                expired = expires_at is not None and expires_at < time.monotonic()
+                stale = generation is not None and generation != property_cache.generation
+                if expired or stale:
+                    del self._entries[key]
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: str, message: dict, messages: list, generation: int):
+        """
+        Store `message`. `generation` is property_cache.generation read before the
+        request's tool results were fetched.
+        """
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else None
+        data_generation = generation if _has_tool_output(messages) else None
+        with self._lock:
+            if data_generation is not None and data_generation != property_cache.generation:
+                return
+            self._entries[key] = (expires_at, data_generation, message)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+completion_cache = CompletionCache(Config.COMPLETION_CACHE_MAX_ENTRIES, Config.COMPLETION_CACHE_TTL_SECONDS)
+
+
+def _cache_metrics():
+    return [
+        (f"completion_cache_{name}_total", {}, value, "counter") if name in ("hits", "misses")
+        else (f"completion_cache_{name}", {}, value)
+        for name, value in completion_cache.stats().items()
+    ]
+
+
+metrics.register_collector(_cache_metrics)
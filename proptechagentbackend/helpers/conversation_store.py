@@ -0,0 +1,152 @@
+# helpers/conversation_store.py
+
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from config import Config
+from database import db
+from models.sql_models import Conversation, ConversationMessage
+
+
+class ConversationStore(ABC):
+    """
+    Keeps chat history on the server so /chat clients only send the new message and a
+    conversation ID. Writes are append-only: a turn adds its new messages and never
+    rewrites what is already stored.
+    """
+
+    @abstractmethod
+    def create(self) -> str:
+        """Start an empty conversation and return its ID."""
+
+    @abstractmethod
+    def load(self, conversation_id: str):
+        """Return the full message list, or None if the ID is unknown or expired."""
+
+    @abstractmethod
+    def append(self, conversation_id: str, messages: list, previous: list = None):
+        """
+        Append new messages to the end of the conversation. `previous` is the history
+        the turn started from; a store that lost the conversation in the meantime
+        (e.g. evicted it) may use it to recreate the entry.
+        """
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    Process-local LRU with a TTL. Fast, but conversations are lost on restart and are
+    not shared between workers, so use the SQL store when running more than one process.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # conversation_id -> [expires_at, messages]
+        self._lock = threading.Lock()
+
+    def create(self) -> str:
+        conversation_id = str(uuid.uuid4())
+        with self._lock:
+            self._entries[conversation_id] = [time.monotonic() + self.ttl_seconds, []]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return conversation_id
+
+    def load(self, conversation_id: str):
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[conversation_id]
+                return None
+            self._entries.move_to_end(conversation_id)
+            # Copy the list (not the messages) so the caller can append freely
+            return list(entry[1])
+
+    def append(self, conversation_id: str, messages: list, previous: list = None):
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                # Evicted or expired while the turn was running: put it back rather
+                # than fail a turn whose model work is already done
+                entry = self._entries[conversation_id] = [0.0, list(previous or [])]
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            entry[0] = time.monotonic() + self.ttl_seconds
+            entry[1].extend(messages)
+            self._entries.move_to_end(conversation_id)
+
+
+class SqlConversationStore(ConversationStore):
+    """
+    Stores one row per message in `conversation_messages`. Appending a turn inserts
+    only that turn's rows and bumps the counter on `conversations`, so the write cost
+    does not grow with the length of the conversation.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+
+    def create(self) -> str:
+        conversation = Conversation(id=str(uuid.uuid4()), message_count=0)
+        db.session.add(conversation)
+        db.session.commit()
+        return conversation.id
+
+    def load(self, conversation_id: str):
+        conversation = db.session.get(Conversation, conversation_id)
+        if conversation is None:
+            return None
+        if conversation.updated_at and conversation.updated_at < datetime.utcnow() - timedelta(seconds=self.ttl_seconds):
+            return None
+        rows = (
+            db.session.query(ConversationMessage.message)
+            .filter(ConversationMessage.conversation_id == conversation_id)
+            .order_by(ConversationMessage.seq)
+            .all()
+        )
+        return [row.message for row in rows]
+
+    def append(self, conversation_id: str, messages: list, previous: list = None):
+        # Reserve the seq range with one atomic increment. The row lock it takes is held
+        # until commit, so a concurrent turn on the same conversation gets the next
+        # range instead of colliding on (conversation_id, seq).
+        count = db.session.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(message_count=Conversation.message_count + len(messages), updated_at=datetime.utcnow())
+            .returning(Conversation.message_count)
+        ).scalar()
+        if count is None:
+            db.session.rollback()
+            raise KeyError(conversation_id)
+        start = count - len(messages)
+        db.session.add_all([
+            ConversationMessage(conversation_id=conversation_id, seq=start + i, message=message)
+            for i, message in enumerate(messages)
+        ])
+        db.session.commit()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """Return the process-wide store selected by Config.CONVERSATION_STORE."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if Config.CONVERSATION_STORE == "sql":
+                    _store = SqlConversationStore(Config.CONVERSATION_TTL_SECONDS)
+                else:
+                    _store = InMemoryConversationStore(
+                        Config.CONVERSATION_MAX_ENTRIES, Config.CONVERSATION_TTL_SECONDS
+                    )
+    return _store
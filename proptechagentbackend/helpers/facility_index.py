@@ -0,0 +1,268 @@
+# helpers/facility_index.py
+
+import threading
+from functools import lru_cache
+import numpy as np
+from database import db
+from models.sql_models import Building
+from helpers.building_name_index import normalize_name
+from helpers import inventory_sync
+
+# Canonical amenity token -> the spellings seen in listings (matched after normalize_name).
+# Facilities not listed here still get indexed, under their own normalized name.
+FACILITY_SYNONYMS = {
+    "pool": ["swimming pool", "pool", "infinity pool", "salt water pool", "swimming"],
+    "gym": ["gym", "fitness", "fitness center", "fitness centre", "fitness room"],
+    "sauna": ["sauna"],
+    "steam_room": ["steam room", "steam"],
+    "jacuzzi": ["jacuzzi", "hot tub", "whirlpool"],
+    "coworking": ["co working space", "coworking space", "co working", "coworking", "working space"],
+    "library": ["library", "reading room"],
+    "playground": ["kids playground", "playground", "kids room", "kids club"],
+    "garden": ["garden", "green area"],
+    "rooftop": ["rooftop bar", "rooftop", "sky lounge", "sky bar"],
+    "parking": ["parking", "car park", "carpark"],
+    "shuttle": ["shuttle", "shuttle bus", "shuttle service"],
+    "security": ["security 24h", "24h security", "24 hour security", "security", "cctv", "keycard access"],
+    "pet_friendly": ["pet friendly", "pets allowed", "pet allowed", "pets"],
+    "ev_charger": ["ev charger", "ev charging", "electric car charger"],
+    "tennis": ["tennis court", "tennis"],
+}
+
+# fetch_properties filter keys answered by this index
+FACILITY_FILTER_KEYS = ("amenities", "any_amenities")
+
+_ALIASES = {
+    normalize_name(spelling): token
+    for token, spellings in FACILITY_SYNONYMS.items()
+    for spelling in spellings + [token]
+}
+
+
+@lru_cache(maxsize=4096)
+def normalize_facility(text: str):
+    """
+    Map a free-form facility ("Swimming Pool", "fitness", "Pet-friendly") to its
+    amenity token ("pool", "gym", "pet_friendly"). Unknown facilities become their
+    normalized name with underscores; blank input gives None. Cached: listings
+    repeat the same few spellings over and over.
+    """
+    normalized = normalize_name(str(text))
+    if not normalized:
+        return None
+    for candidate in (normalized, normalized.rstrip("s")):
+        if candidate in _ALIASES:
+            return _ALIASES[candidate]
+    return normalized.replace(" ", "_")
+
+
+def facility_tokens(facilities) -> set:
+    """
+    Amenity tokens of a Building.facilities value. The column is free-form JSON:
+    a list of names (the usual shape), a {name: flag} dict, or a comma-separated string.
+    """
+    if isinstance(facilities, dict):
+        names = [name for name, present in facilities.items() if present]
+    elif isinstance(facilities, str):
+        names = facilities.split(",")
+    elif isinstance(facilities, list):
+        names = [name for name in facilities if isinstance(name, str)]
+    else:
+        names = []
+    return {token for token in map(normalize_facility, names) if token}
+
+
+def parse_amenities(value) -> list:
+    """
+    An amenity filter value as a list of names: a list of strings, or one
+    comma-separated string (the query-string form).
+
+    :raises ValueError: for anything else.
+    """
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+        raise ValueError("Amenities must be a list of names")
+    return [name.strip() for name in value if name.strip()]
+
+
+def _ids_bitmap(ids: list) -> int:
+    """Bitmap with the bits of `ids` set."""
+    if not ids:
+        return 0
+    bits = np.zeros(max(ids) + 1, dtype=bool)
+    bits[ids] = True
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+def _bitmap_ids(bitmap: int) -> list:
+    """Set bit positions of a bitmap (building IDs), ascending."""
+    if not bitmap:
+        return []
+    raw = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little")).tolist()
+
+
+class FacilityIndex:
+    """
+    Inverted bitmap index over Building.facilities.
+
+    Every amenity token gets a bit in the vocabulary, and each building an integer
+    bitset of its tokens. Each token also has a posting bitmap over building IDs
+    (bit N set = building N has it), held as a Python int so AND/OR across amenities
+    is a handful of big-integer operations however many buildings there are.
+    Committed Building writes update only the postings whose bits changed for that
+    building, once the index is loaded; bulk writes and writes from other processes
+    (seen through inventory_sync) mark it stale for a full reload.
+    """
+
+    def __init__(self):
+        self._vocabulary = {}  # token -> bit
+        self._tokens = []      # bit -> token
+        self._postings = []    # bit -> bitmap of building IDs
+        self._buildings = {}   # building_id -> bitset of tokens
+        self._lock = threading.RLock()
+        self.loaded = False
+        self._stale = False
+
+    def load(self):
+        """Full rebuild from the buildings table. Needs an app context."""
+        # Cleared before reading, so a write landing mid-load marks it stale again
+        self._stale = False
+        rows = db.session.query(Building.id, Building.facilities).all()
+        with self._lock:
+            self._vocabulary, self._tokens, self._postings, self._buildings = {}, [], [], {}
+            # Postings are built from ID lists in one go rather than bit by bit
+            posting_ids = {}
+            for row in rows:
+                bits = 0
+                for token in facility_tokens(row.facilities):
+                    bit = self._bit(token)
+                    posting_ids.setdefault(bit, []).append(row.id)
+                    bits |= 1 << bit
+                if bits:
+                    self._buildings[row.id] = bits
+            for bit, ids in posting_ids.items():
+                self._postings[bit] = _ids_bitmap(ids)
+            self.loaded = True
+        print(f"[LOG] Facility index loaded: {len(rows)} buildings, {len(self._tokens)} amenities")
+
+    def ensure_loaded(self):
+        inventory_sync.check()
+        if not self.loaded or self._stale:
+            self.load()
+
+    def invalidate(self):
+        self._stale = True
+
+    def _bit(self, token: str) -> int:
+        bit = self._vocabulary.get(token)
+        if bit is None:
+            bit = self._vocabulary[token] = len(self._tokens)
+            self._tokens.append(token)
+            self._postings.append(0)
+        return bit
+
+    def _set(self, building_id: int, facilities):
+        new = 0
+        for token in facility_tokens(facilities):
+            new |= 1 << self._bit(token)
+        old = self._buildings.get(building_id, 0)
+        # Only the tokens the building gained or lost touch their postings
+        changed, building_bit = old ^ new, 1 << building_id
+        while changed:
+            bit = (changed & -changed).bit_length() - 1
+            self._postings[bit] ^= building_bit
+            changed &= changed - 1
+        if new:
+            self._buildings[building_id] = new
+        else:
+            self._buildings.pop(building_id, None)
+
+    def upsert(self, building_id: int, facilities):
+        with self._lock:
+            self._set(building_id, facilities)
+
+    def remove(self, building_id: int):
+        with self._lock:
+            self._set(building_id, None)
+
+    def building_tokens(self, building_id: int) -> list:
+        bits = self._buildings.get(building_id, 0)
+        return [token for bit, token in enumerate(self._tokens) if bits >> bit & 1]
+
+    def match_bitmap(self, all_of=(), any_of=()) -> int:
+        """Bitmap of buildings having every amenity in `all_of` and at least one in `any_of`."""
+        with self._lock:
+            result = None
+            for name in all_of:
+                bit = self._vocabulary.get(normalize_facility(name))
+                if bit is None:
+                    return 0  # Nobody has an amenity we've never seen
+                result = self._postings[bit] if result is None else result & self._postings[bit]
+            if any_of:
+                union = 0
+                for name in any_of:
+                    bit = self._vocabulary.get(normalize_facility(name))
+                    if bit is not None:
+                        union |= self._postings[bit]
+                result = union if result is None else result & union
+        return result or 0
+
+    def match_ids(self, all_of=(), any_of=()) -> list:
+        """Building IDs having every amenity in `all_of` and at least one in `any_of`, ascending."""
+        return _bitmap_ids(self.match_bitmap(all_of, any_of))
+
+    def vocabulary(self) -> list:
+        """[(token, building_count)], most common first."""
+        with self._lock:
+            counts = [(token, self._postings[bit].bit_count()) for token, bit in self._vocabulary.items()]
+        return sorted((item for item in counts if item[1]), key=lambda item: (-item[1], item[0]))
+
+
+facility_index = FacilityIndex()
+
+
+def validate_facility_filters(filter_params: dict):
+    """:raises ValueError: if an amenity filter is not a list of names (or a comma-separated string)."""
+    for key in FACILITY_FILTER_KEYS:
+        if key in filter_params:
+            try:
+                parse_amenities(filter_params[key])
+            except ValueError:
+                raise ValueError(f"'{key}' must be a list of amenity names")
+
+
+def facility_building_ids(filter_params: dict):
+    """
+    Resolve the amenity filters of a fetch_properties filter dict to building IDs.
+    Returns None when there are no amenity filters, else a sorted (maybe empty) list.
+
+    :raises ValueError: see validate_facility_filters.
+    """
+    if not any(key in filter_params for key in FACILITY_FILTER_KEYS):
+        return None
+    validate_facility_filters(filter_params)
+    all_of = parse_amenities(filter_params.get("amenities") or [])
+    any_of = parse_amenities(filter_params.get("any_amenities") or [])
+    if not all_of and not any_of:
+        return None
+    facility_index.ensure_loaded()
+    return facility_index.match_ids(all_of, any_of)
+
+
+@inventory_sync.on_change
+def _on_inventory_change(changes):
+    if not facility_index.loaded:
+        return
+    if changes is None:
+        # Bulk write or another process: no per-row details, rebuild on next use
+        facility_index.invalidate()
+        return
+    for change in changes:
+        if change.model is not Building:
+            continue
+        if change.action == "deleted":
+            facility_index.remove(change.id)
+        elif "facilities" in change.values:
+            facility_index.upsert(change.id, change.values["facilities"])
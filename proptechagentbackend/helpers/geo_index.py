@@ -0,0 +1,333 @@
+# helpers/geo_index.py
+
+import math
+import threading
+import numpy as np
+from config import Config
+from database import db
+from models.sql_models import Building, Station
+from helpers.building_name_index import normalize_name
+from helpers import inventory_sync
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Below this many buildings one vectorized pass over every row beats walking grid cells
+SCAN_ALL_BELOW = 2048
+
+# fetch_properties filter keys answered by this index
+GEO_FILTER_KEYS = ("latitude", "longitude", "radius_km", "nearest", "near_station", "station_line")
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometers. Arguments may be NumPy arrays (they broadcast)."""
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _line_key(text: str) -> str:
+    # "Sukhumvit Line", "sukhumvit line" and "Sukhumvit" all name the same line
+    normalized = normalize_name(text)
+    return normalized[:-5].strip() if normalized.endswith(" line") else normalized
+
+
+class _GeoSnapshot:
+    """
+    Buildings with coordinates bucketed into a uniform grid of `cell_km` squares
+    (equirectangular projection, so cells are the same size in both directions
+    around the data's mean latitude). A query reads only the cells its circle's
+    bounding box overlaps and checks exact great-circle distances for those
+    candidates. Immutable once built, like the property index snapshots.
+    """
+
+    def __init__(self, buildings: list, stations: list, cell_km: float):
+        self.cell_km = cell_km
+        self.ids = np.fromiter((b.id for b in buildings), dtype=np.int64, count=len(buildings))
+        self.lat = np.fromiter((b.latitude for b in buildings), dtype=np.float64, count=len(buildings))
+        self.lng = np.fromiter((b.longitude for b in buildings), dtype=np.float64, count=len(buildings))
+        self.names = {b.id: b.name for b in buildings}
+        self.ref_cos = math.cos(math.radians(float(self.lat.mean()))) if len(buildings) else 1.0
+
+        # (cell_x, cell_y) -> row positions in that cell
+        self.cells = {}
+        self.bounds = (0, 0, -1, -1)
+        if len(buildings):
+            cx, cy = self._cell(self.lat, self.lng)
+            order = np.lexsort((cy, cx))
+            keys = np.stack([cx[order], cy[order]], axis=1)
+            splits = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+            for group in np.split(order, splits):
+                self.cells[(int(cx[group[0]]), int(cy[group[0]]))] = group
+            self.bounds = (int(cx.min()), int(cy.min()), int(cx.max()), int(cy.max()))
+
+        self.stations = [
+            {
+                "code": s.code, "name": s.name, "line": s.line, "system": s.system,
+                "latitude": s.latitude, "longitude": s.longitude,
+                "_name": normalize_name(s.name), "_line": _line_key(s.line), "_system": normalize_name(s.system),
+            }
+            for s in stations
+        ]
+
+    def _cell(self, lat, lng):
+        x = np.asarray(lng, dtype=np.float64) * KM_PER_DEGREE * self.ref_cos
+        y = np.asarray(lat, dtype=np.float64) * KM_PER_DEGREE
+        return np.floor(x / self.cell_km).astype(np.int64), np.floor(y / self.cell_km).astype(np.int64)
+
+    def _positions(self, cx0: int, cy0: int, cx1: int, cy1: int) -> np.ndarray:
+        """Row positions in the cell rectangle; a rectangle bigger than the grid just takes every row."""
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            return np.arange(len(self.ids))
+        groups = [
+            self.cells[(x, y)]
+            for x in range(cx0, cx1 + 1)
+            for y in range(cy0, cy1 + 1)
+            if (x, y) in self.cells
+        ]
+        return np.concatenate(groups) if groups else np.empty(0, dtype=np.int64)
+
+    def within(self, lat: float, lng: float, radius_km: float):
+        """(positions, distances_km) of the rows within `radius_km`, in no particular order."""
+        if not len(self.ids):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # Latitude/longitude bounding box of the circle, widened slightly for the
+        # small-angle approximation of the longitude span
+        dlat = radius_km / KM_PER_DEGREE
+        widest = min(max(abs(lat - dlat), abs(lat + dlat)), 89.0)
+        dlng = 1.01 * radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest)))
+        (cx0, cx1), (cy0, cy1) = self._cell([lat - dlat, lat + dlat], [lng - dlng, lng + dlng])
+        positions = self._positions(int(cx0), int(cy0), int(cx1), int(cy1))
+        distances = haversine_km(lat, lng, self.lat[positions], self.lng[positions])
+        keep = distances <= radius_km
+        return positions[keep], distances[keep]
+
+    def nearest(self, lat: float, lng: float, k: int):
+        """(positions, distances_km) of the `k` closest rows, closest first."""
+        if not len(self.ids) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        # Walk square rings of cells outward from the query until they hold k rows.
+        # The k-th closest of those is an upper bound on the answer, and a radius
+        # query with that bound returns the exact k nearest.
+        (qx,), (qy,) = self._cell([lat], [lng])
+        qx, qy = int(qx), int(qy)
+        min_x, min_y, max_x, max_y = self.bounds
+        # Rings closer than the grid's bounding box are empty; start at the box
+        ring = max(min_x - qx, qx - max_x, min_y - qy, qy - max_y, 0)
+        last_ring = max(qx - min_x, max_x - qx, qy - min_y, max_y - qy)
+        groups, found = [], 0
+        if len(self.ids) < SCAN_ALL_BELOW:
+            groups, found = [np.arange(len(self.ids))], len(self.ids)
+        while found < k and ring <= last_ring:
+            if 8 * ring > len(self.cells):
+                # Sparse grid: the ring has more cells than the grid has, scan every row instead
+                groups, found = [np.arange(len(self.ids))], len(self.ids)
+                break
+            if ring == 0:
+                ring_cells = [(qx, qy)]
+            else:
+                ring_cells = [(x, y) for x in range(qx - ring, qx + ring + 1) for y in (qy - ring, qy + ring)]
+                ring_cells += [(x, y) for y in range(qy - ring + 1, qy + ring) for x in (qx - ring, qx + ring)]
+            for cell in ring_cells:
+                group = self.cells.get(cell)
+                if group is not None:
+                    groups.append(group)
+                    found += len(group)
+            ring += 1
+
+        candidates = np.concatenate(groups)
+        distances = haversine_km(lat, lng, self.lat[candidates], self.lng[candidates])
+        if found >= k and found < len(self.ids):
+            bound = float(np.partition(distances, k - 1)[k - 1])
+            candidates, distances = self.within(lat, lng, bound)
+        order = np.argsort(distances, kind="stable")[:k]
+        return candidates[order], distances[order]
+
+    def near_points(self, points: list, radius_km: float):
+        """(positions, distances_km) within `radius_km` of any of `points`, by distance to the closest."""
+        best = np.full(len(self.ids), np.inf)
+        for lat, lng in points:
+            positions, distances = self.within(lat, lng, radius_km)
+            np.minimum.at(best, positions, distances)
+        positions = np.flatnonzero(np.isfinite(best))
+        return positions, best[positions]
+
+
+class GeoIndex:
+    """
+    In-process spatial index over building coordinates plus the station reference
+    table. Loaded lazily on first use; committed Building and Station writes (from
+    this process or, via inventory_sync, any other) mark it stale and the next
+    query reloads it (a few thousand rows, a few milliseconds).
+    Buildings without coordinates are left out and never match a geo filter.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._stale = True
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def load(self):
+        """Full rebuild from the buildings and stations tables. Needs an app context."""
+        with self._lock:
+            # Cleared before reading, so a write landing mid-load marks it stale again
+            self._stale = False
+            buildings = db.session.query(Building.id, Building.name, Building.latitude, Building.longitude).filter(
+                Building.latitude.isnot(None), Building.longitude.isnot(None)
+            ).order_by(Building.id).all()
+            stations = db.session.query(Station).order_by(Station.id).all()
+            self._snapshot = _GeoSnapshot(buildings, stations, Config.GEO_INDEX_CELL_KM)
+        print(f"[LOG] Geo index loaded: {len(buildings)} buildings, {len(stations)} stations")
+
+    def ensure_loaded(self):
+        inventory_sync.check()
+        if self._snapshot is None or self._stale:
+            self.load()
+
+    def invalidate(self):
+        self._stale = True
+
+    def building_name(self, building_id: int):
+        self.ensure_loaded()
+        return self._snapshot.names.get(building_id)
+
+    def within(self, lat: float, lng: float, radius_km: float) -> list:
+        """[(building_id, distance_km)] within `radius_km` of the point, closest first."""
+        self.ensure_loaded()
+        snapshot = self._snapshot
+        positions, distances = snapshot.within(lat, lng, radius_km)
+        order = np.argsort(distances, kind="stable")
+        return list(zip(snapshot.ids[positions[order]].tolist(), distances[order].tolist()))
+
+    def nearest(self, lat: float, lng: float, k: int) -> list:
+        """[(building_id, distance_km)] for the `k` buildings closest to the point, closest first."""
+        self.ensure_loaded()
+        snapshot = self._snapshot
+        positions, distances = snapshot.nearest(lat, lng, k)
+        return list(zip(snapshot.ids[positions].tolist(), distances.tolist()))
+
+    def find_stations(self, name: str = None, line: str = None) -> list:
+        """
+        Stations matching a name (or operator code) and/or a line. The line may
+        also be a system ("BTS", "MRT") or both ("BTS Sukhumvit"). An exact name
+        wins over partial matches, so "Sukhumvit" is the MRT station, not every
+        station whose name merely contains the word.
+        """
+        self.ensure_loaded()
+        stations = self._snapshot.stations
+        if line:
+            key = _line_key(line)
+            stations = [
+                s for s in stations
+                if key in (s["_line"], s["_system"], f"{s['_system']} {s['_line']}")
+            ]
+        if name:
+            needle = normalize_name(name)
+            exact = [s for s in stations if s["_name"] == needle or s["code"].lower() == name.strip().lower()]
+            stations = exact or [s for s in stations if needle and needle in s["_name"]]
+        return [{key: value for key, value in s.items() if not key.startswith("_")} for s in stations]
+
+    def near_stations(self, stations: list, radius_km: float) -> list:
+        """[(building_id, distance_km)] within `radius_km` of any of `stations`, by distance to the closest one."""
+        self.ensure_loaded()
+        snapshot = self._snapshot
+        positions, distances = snapshot.near_points(
+            [(station["latitude"], station["longitude"]) for station in stations], radius_km
+        )
+        order = np.argsort(distances, kind="stable")
+        return list(zip(snapshot.ids[positions[order]].tolist(), distances[order].tolist()))
+
+    def matches(self, filter_params: dict) -> list:
+        """
+        [(building_id, distance_km)] satisfying every geo filter in `filter_params`,
+        closest first. The distance is to the map point when one is given, else to
+        the nearest matching station. Call validate_geo_filters first.
+        """
+        self.ensure_loaded()
+        has_point = "latitude" in filter_params
+        has_station = "near_station" in filter_params or "station_line" in filter_params
+        radius = float(filter_params["radius_km"]) if "radius_km" in filter_params else None
+
+        by_station = None
+        if has_station:
+            stations = self.find_stations(filter_params.get("near_station"), filter_params.get("station_line"))
+            by_station = self.near_stations(stations, radius or Config.GEO_DEFAULT_RADIUS_KM)
+            if not has_point:
+                return by_station
+            by_station = {building_id for building_id, _ in by_station}
+
+        lat, lng = float(filter_params["latitude"]), float(filter_params["longitude"])
+        if "nearest" in filter_params:
+            found = self.nearest(lat, lng, int(filter_params["nearest"]))
+            if radius is not None:
+                found = [(building_id, distance) for building_id, distance in found if distance <= radius]
+        else:
+            found = self.within(lat, lng, radius or Config.GEO_DEFAULT_RADIUS_KM)
+        if by_station is not None:
+            found = [(building_id, distance) for building_id, distance in found if building_id in by_station]
+        return found
+
+
+def _number(filter_params: dict, key: str, low: float, high: float) -> float:
+    try:
+        value = float(filter_params[key])
+    except (TypeError, ValueError):
+        raise ValueError(f"'{key}' must be a number")
+    if not low <= value <= high:
+        raise ValueError(f"'{key}' must be between {low:g} and {high:g}")
+    return value
+
+
+def validate_geo_filters(filter_params: dict):
+    """
+    Check the geo keys of a fetch_properties filter dict.
+
+    :raises ValueError: for a half-given point, out-of-range values, or a radius/nearest
+        without anything to measure from.
+    """
+    has_point = "latitude" in filter_params or "longitude" in filter_params
+    if has_point:
+        if "latitude" not in filter_params or "longitude" not in filter_params:
+            raise ValueError("'latitude' and 'longitude' must be given together")
+        _number(filter_params, "latitude", -90, 90)
+        _number(filter_params, "longitude", -180, 180)
+    has_station = "near_station" in filter_params or "station_line" in filter_params
+    if "nearest" in filter_params:
+        if not has_point:
+            raise ValueError("'nearest' needs 'latitude' and 'longitude'")
+        if _number(filter_params, "nearest", 1, Config.GEO_MAX_NEAREST) != int(float(filter_params["nearest"])):
+            raise ValueError("'nearest' must be a whole number")
+    if "radius_km" in filter_params:
+        if not (has_point or has_station):
+            raise ValueError("'radius_km' needs 'latitude'/'longitude', 'near_station' or 'station_line'")
+        if _number(filter_params, "radius_km", 0, Config.GEO_MAX_RADIUS_KM) <= 0:
+            raise ValueError("'radius_km' must be greater than 0")
+
+
+def geo_building_ids(filter_params: dict):
+    """
+    Resolve the geo filters of a fetch_properties filter dict to building IDs.
+    Returns None when there are no geo filters (nothing to restrict), else a
+    sorted list, empty when nothing is in range.
+
+    :raises ValueError: see validate_geo_filters.
+    """
+    if not any(key in filter_params for key in GEO_FILTER_KEYS):
+        return None
+    validate_geo_filters(filter_params)
+    return sorted(building_id for building_id, _ in geo_index.matches(filter_params))
+
+
+# Process-wide index used by fetch_properties and GET /properties/nearby
+geo_index = GeoIndex()
+
+
+@inventory_sync.on_change
+def _on_inventory_change(changes):
+    # None: bulk write or another process, so anything may have moved
+    if changes is None or any(change.model in (Building, Station) for change in changes):
+        geo_index.invalidate()
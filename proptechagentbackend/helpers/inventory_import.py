@@ -0,0 +1,336 @@
+# helpers/inventory_import.py
+#
+# Streaming bulk import of buildings, properties and stations from CSV or JSONL.
+#
+#   flask --app main import-inventory listings.csv --kind properties --batch-size 2000
+#   flask --app main import-inventory buildings.jsonl --kind buildings
+#   flask --app main import-inventory stations.csv --kind stations
+#
+# Rows are read one at a time, validated against the model columns, and written
+# in multi-row INSERT ... ON CONFLICT batches (properties on property_code,
+# buildings on name, stations on code). Memory is bounded by the batch size plus the
+# building name -> id map, not by the file size.
+
+import csv
+import json
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, func
+from database import db
+from models.sql_models import Building, Property, Station
+from helpers.property_index import property_index
+from helpers import property_read_model, inventory_sync
+from config import Config
+
+# Columns the importer never takes from the file
+SERVER_COLUMNS = {"id", "created_at", "updated_at"}
+# Set on insert only; an upsert that hits an existing row leaves them alone
+INSERT_ONLY_COLUMNS = {"id", "created_at"}
+# --kind -> (model, conflict column)
+IMPORT_KINDS = {
+    "properties": (Property, "property_code"),
+    "buildings": (Building, "name"),
+    "stations": (Station, "code"),
+}
+
+
+class RowError(ValueError):
+    """A row that fails validation; it is skipped and reported, the import goes on."""
+
+
+def iter_records(path: str, file_format: str = None):
+    """
+    Yield (line_number, dict) from a CSV (header row required) or JSONL file,
+    one row at a time. The format comes from the extension unless given.
+    """
+    file_format = file_format or ("jsonl" if path.endswith((".jsonl", ".ndjson", ".json")) else "csv")
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if file_format == "csv":
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, row
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError:
+                    yield line_number, RowError("Invalid JSON")
+
+
+def _parse_photo_urls(value):
+    """Same rules as Property.set_photo_urls: a dict, or a JSON object string; a bare URL list is kept under "all"."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, list):
+        return {"all": value}
+    try:
+        parsed = json.loads(value)
+    except (TypeError, ValueError):
+        urls = [url.strip() for url in str(value).replace("|", ",").split(",") if url.strip()]
+        return {"all": urls} if urls else None
+    if isinstance(parsed, list):
+        return {"all": parsed}
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _coerce(column, value, optional: bool = False):
+    """Convert one raw cell to the column's Python type, enforcing length and nullability."""
+    if isinstance(value, str):
+        value = value.strip()
+    if value is None or value == "":
+        if not column.nullable and not optional:
+            raise RowError(f"'{column.name}' is required")
+        return None
+
+    if isinstance(column.type, db.JSON):
+        if column.name == "photo_urls":
+            return _parse_photo_urls(value)
+        if isinstance(value, str):
+            try:
+                return json.loads(value)
+            except ValueError:
+                return [item.strip() for item in value.split(",") if item.strip()]
+        return value
+
+    python_type = column.type.python_type
+    try:
+        if python_type is int:
+            return int(float(value))
+        if python_type is Decimal:
+            return Decimal(str(value).replace(",", ""))
+        if python_type is float:
+            return float(str(value).replace(",", ""))
+        if python_type is bool:
+            return str(value).lower() in ("1", "true", "yes", "y")
+        if python_type is datetime:
+            return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    except (ValueError, InvalidOperation):
+        raise RowError(f"'{column.name}' has an invalid value: {value!r}")
+
+    value = str(value)
+    length = getattr(column.type, "length", None)
+    if length and len(value) > length:
+        raise RowError(f"'{column.name}' is longer than {length} characters")
+    return value
+
+
+def validate_row(model, raw: dict, filled_later: set = frozenset()) -> dict:
+    """
+    Validate a raw record against `model`'s columns; unknown keys are ignored.
+    Columns in `filled_later` may be missing (e.g. building_id, resolved from building_name).
+    """
+    if isinstance(raw, Exception):
+        raise raw
+    if not isinstance(raw, dict):
+        raise RowError("Row is not an object")
+    row = {}
+    for column in model.__table__.columns:
+        if column.name in SERVER_COLUMNS:
+            continue
+        if column.name in raw or not column.nullable:
+            row[column.name] = _coerce(column, raw.get(column.name), column.name in filled_later)
+    return row
+
+
+def _insert(table):
+    """Dialect-specific INSERT that supports ON CONFLICT (Postgres and SQLite)."""
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+def _upsert(table, rows: list, conflict_column: str):
+    """
+    INSERT ... ON CONFLICT DO UPDATE for the batch. Passing the rows as parameters
+    (not .values(rows)) keeps the statement cacheable; SQLAlchemy's "insertmanyvalues"
+    then sends them as multi-row VALUES pages on Postgres.
+    """
+    stmt = _insert(table)
+    updatable = set(rows[0]) - {conflict_column} - INSERT_ONLY_COLUMNS
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[conflict_column],
+        set_={key: stmt.excluded[key] for key in sorted(updatable)}
+    )
+    db.session.execute(stmt, rows)
+
+
+class BuildingMap:
+    """
+    Lowercased building name -> id, loaded once. Names missing from the database
+    are created in bulk (ON CONFLICT DO NOTHING) when `create_missing` is set.
+    """
+
+    def __init__(self, create_missing: bool):
+        self.create_missing = create_missing
+        self.ids = {
+            name.strip().lower(): building_id
+            for building_id, name in db.session.execute(select(Building.id, Building.name))
+        }
+        self.created = 0
+
+    def resolve(self, names: set) -> dict:
+        missing = {name for name in names if name.strip().lower() not in self.ids}
+        if missing and self.create_missing:
+            now = datetime.utcnow()
+            inserted = db.session.execute(
+                _insert(Building.__table__)
+                .values([{"name": name, "created_at": now} for name in sorted(missing)])
+                .on_conflict_do_nothing(index_elements=["name"])
+            ).rowcount
+            lowered = [name.strip().lower() for name in missing]
+            for building_id, name in db.session.execute(
+                select(Building.id, Building.name).where(func.lower(Building.name).in_(lowered))
+            ):
+                self.ids[name.strip().lower()] = building_id
+            # Only the rows actually inserted: names another writer created meanwhile hit the conflict
+            self.created += max(inserted, 0)
+        return {name: self.ids.get(name.strip().lower()) for name in names}
+
+
+def import_inventory(path: str, kind: str = "properties", batch_size: int = 1000, file_format: str = None,
+                     create_buildings: bool = True, errors_path: str = None, progress=None) -> dict:
+    """
+    Stream `path` into the buildings, properties or stations table. Needs an app context.
+
+    Each batch is validated, deduplicated on its conflict key (last row wins) and
+    written with one multi-row upsert, then committed. Rejected rows are counted,
+    the first few kept in the report, and all of them written to `errors_path`
+    (JSONL) when given.
+
+    :param progress: optional callable(stats_dict) called after every batch.
+    :return: stats dict (read, upserted, rejected, buildings_created, seconds, rows_per_second, errors).
+    """
+    model, conflict_column = IMPORT_KINDS[kind]
+    buildings = BuildingMap(create_buildings) if kind == "properties" else None
+    stats = {"read": 0, "upserted": 0, "rejected": 0, "buildings_created": 0, "errors": []}
+    errors_file = open(errors_path, "w") if errors_path else None
+    started = time.perf_counter()
+
+    def reject(line_number, message):
+        stats["rejected"] += 1
+        if len(stats["errors"]) < 20:
+            stats["errors"].append({"line": line_number, "error": message})
+        if errors_file:
+            errors_file.write(json.dumps({"line": line_number, "error": message}) + "\n")
+
+    def flush(batch: dict):
+        if kind == "properties":
+            # Resolve building_name -> building_id for the whole batch at once
+            names = {row["building_name"] for _, row in batch.values() if not row.get("building_id")}
+            resolved = buildings.resolve(names) if names else {}
+            for key in list(batch):
+                line_number, row = batch[key]
+                if not row.get("building_id"):
+                    row["building_id"] = resolved.get(row["building_name"])
+                    if row["building_id"] is None:
+                        reject(line_number, f"Unknown building '{row['building_name']}'")
+                        del batch[key]
+        if batch:
+            now = datetime.utcnow()
+            stamps = {"created_at": now, "updated_at": now} if "updated_at" in model.__table__.c else {"created_at": now}
+            rows = [dict(row, **stamps) for _, row in batch.values()]
+            # Every row in one VALUES list must have the same keys, and a column a row
+            # leaves out must keep its stored value, not be overwritten with NULL. So
+            # rows are upserted in groups sharing a column set, each updating only those.
+            groups = {}
+            for row in rows:
+                groups.setdefault(frozenset(row), []).append(row)
+            for group in groups.values():
+                _upsert(model.__table__, group, conflict_column)
+            if Config.PROPERTY_READ_MODEL_ENABLED and kind != "stations":
+                _refresh_read_model(kind, [row[conflict_column] for row in rows])
+            # Bulk statements fire no ORM events: flag the commit so this and every other
+            # process drop their caches over the inventory (helpers/inventory_sync.py)
+            inventory_sync.mark_changed()
+            db.session.commit()
+            stats["upserted"] += len(rows)
+        if progress:
+            progress(_finish(stats, started))
+
+    try:
+        batch = {}  # conflict key -> (line_number, row); later duplicates replace earlier ones
+        for line_number, raw in iter_records(path, file_format):
+            stats["read"] += 1
+            try:
+                row = validate_row(model, raw, {"building_id"} if kind == "properties" else frozenset())
+                if kind == "properties" and not row.get("building_id") and not row.get("building_name"):
+                    raise RowError("'building_name' or 'building_id' is required")
+            except RowError as row_err:
+                reject(line_number, str(row_err))
+                continue
+            batch[row[conflict_column]] = (line_number, row)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = {}
+        if batch:
+            flush(batch)
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if errors_file:
+            errors_file.close()
+        if buildings:
+            stats["buildings_created"] = buildings.created
+        _reload_local_indexes()
+
+    return _finish(stats, started)
+
+
+def _finish(stats: dict, started: float) -> dict:
+    seconds = time.perf_counter() - started
+    stats["seconds"] = round(seconds, 3)
+    stats["rows_per_second"] = round(stats["read"] / seconds, 1) if seconds else 0.0
+    return stats
+
+
+def _refresh_read_model(kind: str, keys: list):
+    """Rebuild the read-model rows a batch touched, in the batch's transaction."""
+    connection = db.session.connection()
+    if kind == "properties":
+        property_read_model.refresh_by_codes(connection, keys)
+    else:
+        building_ids = db.session.execute(select(Building.id).where(Building.name.in_(keys))).scalars().all()
+        property_read_model.refresh_buildings(connection, building_ids)
+
+
+def _reload_local_indexes():
+    # The result cache and the building-name, geo and facility indexes follow the
+    # mark_changed() commits. The property index is only reloaded in the importing
+    # process; a web worker's picks the rows up on its next refresh (they carry a new
+    # updated_at).
+    if property_index.loaded:
+        property_index.load()
+
+
+@click.command("import-inventory")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--kind", type=click.Choice(list(IMPORT_KINDS)), default="properties")
+@click.option("--batch-size", type=int, default=1000, show_default=True)
+@click.option("--format", "file_format", type=click.Choice(["csv", "jsonl"]), default=None,
+              help="Defaults to the file extension.")
+@click.option("--create-buildings/--no-create-buildings", default=True,
+              help="Create buildings named in the property file that don't exist yet.")
+@click.option("--errors", "errors_path", type=click.Path(dir_okay=False), default=None,
+              help="Write every rejected row to this JSONL file.")
+@with_appcontext
+def import_inventory_command(path, kind, batch_size, file_format, create_buildings, errors_path):
+    """Bulk upsert buildings, properties or stations from a CSV or JSONL file."""
+    def progress(stats):
+        print(f"[LOG] {stats['read']} read, {stats['upserted']} upserted, {stats['rejected']} rejected "
+              f"({stats['rows_per_second']:.0f} rows/s)")
+
+    stats = import_inventory(path, kind, batch_size, file_format, create_buildings, errors_path, progress)
+    print(f"[LOG] Import finished in {stats['seconds']}s: {stats['upserted']} upserted, "
+          f"{stats['rejected']} rejected, {stats['buildings_created']} buildings created, "
+          f"{stats['rows_per_second']:.0f} rows/s")
+    for error in stats["errors"]:
+        print(f"[ERR] line {error['line']}: {error['error']}")
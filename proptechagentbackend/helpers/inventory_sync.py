@@ -0,0 +1,157 @@
+# helpers/inventory_sync.py
+#
+# Keeps the per-process caches and indexes over the inventory tables (buildings,
+# properties, stations) in step with committed writes.
+#
+#  - Writes made in this process: ORM changes are collected at flush and handed to
+#    the registered listeners only after the transaction commits, and dropped if it
+#    rolls back. Nothing reacts to rows a reader could not see yet, or never will.
+#  - Writes made by other processes (the importer CLI, job workers, other web
+#    workers): every commit that touched the inventory bumps a counter in the
+#    inventory_generation table. check() reads it at most every
+#    INVENTORY_SYNC_CHECK_SECONDS and, when someone else moved it, tells every
+#    listener to drop what it holds.
+#
+# Bulk statements (INSERT ... ON CONFLICT, query.update(), raw SQL) fire no ORM
+# events; code running them calls mark_changed(session) before committing.
+
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import event, inspect, select, update, insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from config import Config
+from database import db
+from models.sql_models import Building, Property, Station, InventoryGeneration
+
+INVENTORY_MODELS = (Building, Property, Station)
+
+# One committed ORM write: model class, "saved" or "deleted", primary key, and the
+# column values as flushed (empty for deletes)
+InventoryChange = namedtuple("InventoryChange", "model action id values")
+
+_listeners = []
+_lock = threading.Lock()
+_seen_generation = None  # Last generation this process is known to be up to date with
+_next_check = 0.0
+
+
+def on_change(callback):
+    """
+    Register callback(changes) to run after inventory writes commit. `changes` is a
+    list of InventoryChange for this process's ORM writes, or None when the details
+    are unknown (bulk statements, another process) and everything should be reloaded.
+    """
+    _listeners.append(callback)
+    return callback
+
+
+def mark_changed(session=None):
+    """Flag the session's transaction as an inventory write the ORM events can't see."""
+    (session or db.session).info["inventory_bulk"] = True
+
+
+def _notify(changes):
+    for callback in _listeners:
+        try:
+            callback(changes)
+        except Exception as e:
+            # A cache that failed to update must not fail the commit that triggered it
+            print(f"[ERR] Inventory change listener {callback.__qualname__} failed: {e}")
+
+
+def _read_generation(connection) -> int:
+    return connection.execute(
+        select(InventoryGeneration.generation).where(InventoryGeneration.id == 1)
+    ).scalar() or 0
+
+
+def _bump_generation(engine) -> int:
+    """Increment the shared counter in its own short transaction; returns the new value."""
+    table = InventoryGeneration.__table__
+    for _ in range(2):
+        try:
+            with engine.begin() as connection:
+                updated = connection.execute(
+                    update(table).where(table.c.id == 1)
+                    .values(generation=table.c.generation + 1, updated_at=datetime.utcnow())
+                ).rowcount
+                if not updated:
+                    connection.execute(insert(table).values(id=1, generation=1, updated_at=datetime.utcnow()))
+                return _read_generation(connection)
+        except IntegrityError:
+            continue  # Another process created the row first; update it instead
+    return None
+
+
+def check(force: bool = False):
+    """
+    Notice writes committed by other processes. Cheap when called on every search:
+    the database is only asked every INVENTORY_SYNC_CHECK_SECONDS. Needs an app context.
+    """
+    global _seen_generation, _next_check
+    now = time.monotonic()
+    if not force and now < _next_check:
+        return
+    _next_check = now + Config.INVENTORY_SYNC_CHECK_SECONDS
+    try:
+        with db.engine.connect() as connection:
+            generation = _read_generation(connection)
+    except SQLAlchemyError as e:
+        # Missing table or database hiccup: keep serving, the caches' own TTLs still apply
+        print(f"[ERR] Inventory generation check failed: {e}")
+        return
+    with _lock:
+        changed = _seen_generation is not None and generation != _seen_generation
+        _seen_generation = generation
+    if changed:
+        _notify(None)
+
+
+def _collect_changes(session, flush_context):
+    # new/dirty/deleted still describe what this flush wrote. Values come from the
+    # instance state only, so nothing here emits SQL.
+    pending = session.info.setdefault("inventory_changes", [])
+    for action, objects in (("saved", session.new), ("saved", session.dirty), ("deleted", session.deleted)):
+        for obj in objects:
+            if not isinstance(obj, INVENTORY_MODELS):
+                continue
+            if action == "saved" and obj not in session.new and not session.is_modified(obj):
+                continue
+            state = inspect(obj)
+            values = {} if action == "deleted" else {
+                attr.key: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict
+            }
+            pending.append(InventoryChange(type(obj), action, state.dict.get("id"), values))
+
+
+def _publish_changes(session):
+    global _seen_generation
+    changes = session.info.pop("inventory_changes", None)
+    bulk = session.info.pop("inventory_bulk", False)
+    if not changes and not bulk:
+        return
+    try:
+        generation = _bump_generation(session.get_bind())
+    except SQLAlchemyError as e:
+        print(f"[ERR] Inventory generation bump failed: {e}")
+        generation = None
+    with _lock:
+        # Only our own bump since the last check: other processes have nothing we lack
+        if generation is not None and _seen_generation is not None and generation == _seen_generation + 1:
+            _seen_generation = generation
+    _notify(None if bulk else changes)
+
+
+def _discard_changes(session):
+    session.info.pop("inventory_changes", None)
+    session.info.pop("inventory_bulk", None)
+
+
+# On the Session class, so flask_sqlalchemy's db.session and sessions from
+# database/session.py's SessionFactory are both covered
+event.listen(Session, "after_flush", _collect_changes)
+event.listen(Session, "after_commit", _publish_changes)
+event.listen(Session, "after_rollback", _discard_changes)
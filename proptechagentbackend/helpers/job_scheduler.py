@@ -0,0 +1,436 @@
+# helpers/job_scheduler.py
+#
+# Background jobs, kept in the database (models.sql_models.Job / JobSchedule) so
+# slow work runs in worker processes instead of request threads.
+#
+#   flask --app main jobs worker --processes 4
+#   flask --app main jobs enqueue match_leads --args '{"full": true}'
+#   POST /scheduler/jobs
+#
+# - One-off jobs: a Job row with run_at = now (or later, for a delayed job).
+# - Recurring jobs: a JobSchedule row; workers enqueue a Job for it every
+#   interval_seconds (never more than one queued/running at a time).
+# - Workers claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+#   of processes (on any number of hosts) can poll the same table without two of
+#   them taking the same job. The claim is also a conditional UPDATE on the status,
+#   which keeps it safe on SQLite, where there are no row locks.
+# - A failed attempt is retried after JOB_RETRY_BASE_SECONDS * 2^(attempt - 1)
+#   (capped at JOB_RETRY_MAX_SECONDS, with jitter) until max_attempts is reached.
+# - While a job runs, its worker refreshes locked_at every JOB_HEARTBEAT_SECONDS.
+#   A job whose lock is older than JOB_LOCK_TIMEOUT_SECONDS (worker died) counts as
+#   a failed attempt and is requeued; the old worker, if it was only slow, finds its
+#   lock taken and drops its outcome instead of overwriting the new attempt's.
+# - Job args are checked against the task's signature when the job is queued, so a
+#   bad request fails with a ValueError instead of burning every retry.
+
+import inspect
+import json
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import IntegrityError
+from config import Config
+from database import db
+from models.sql_models import Job, JobSchedule
+from helpers import metrics
+
+# Task name -> callable(**args) returning a JSON-serializable result (or None)
+TASKS = {}
+
+
+def task(name: str):
+    """Register a function as a job task under `name`."""
+    def register(fn):
+        TASKS[name] = fn
+        return fn
+    return register
+
+
+@task("match_leads")
+def _match_leads(full: bool = False, client_ids: list = None, top_k: int = None):
+    from helpers.lead_matching import run_matching
+    return run_matching(full=full, client_ids=client_ids, k=top_k)
+
+
+@task("check_read_model")
+def _check_read_model(repair: bool = True):
+    from helpers.property_read_model import check_consistency
+    return check_consistency(repair=repair)
+
+
+@task("rebuild_read_model")
+def _rebuild_read_model(batch_size: int = 2000):
+    from helpers.property_read_model import rebuild
+    return rebuild(batch_size)
+
+
+def _import_path(path) -> str:
+    """
+    `path` resolved inside JOB_IMPORT_DIR (relative paths are taken from there).
+    Raises ValueError when imports aren't enabled for jobs or the path leaves the directory.
+    """
+    if not Config.JOB_IMPORT_DIR:
+        raise ValueError("Inventory imports can't be queued (JOB_IMPORT_DIR is not set); use `flask import-inventory`")
+    if not isinstance(path, str) or not path:
+        raise ValueError("'path' must be a file name")
+    root = os.path.realpath(Config.JOB_IMPORT_DIR)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError("'path' must be inside JOB_IMPORT_DIR")
+    return resolved
+
+
+@task("import_inventory")
+def _import_inventory(path: str, kind: str = "properties", batch_size: int = 1000, create_buildings: bool = True):
+    from helpers.inventory_import import import_inventory
+    return import_inventory(_import_path(path), kind, batch_size, create_buildings=create_buildings)
+
+
+# Extra checks on a task's args beyond its signature, run when the job is queued
+ARG_CHECKS = {
+    "import_inventory": lambda args: _import_path(args.get("path")),
+}
+
+
+# --- Enqueueing -------------------------------------------------------------------
+
+def validate_args(task_name: str, args: dict):
+    """Raise ValueError unless `task_name` exists and can be called with `args`."""
+    if task_name not in TASKS:
+        raise ValueError(f"Unknown task '{task_name}'")
+    try:
+        inspect.signature(TASKS[task_name]).bind(**(args or {}))
+    except TypeError as e:
+        raise ValueError(f"Invalid args for task '{task_name}': {e}") from None
+    if task_name in ARG_CHECKS:
+        ARG_CHECKS[task_name](args or {})
+
+
+def enqueue(task_name: str, args: dict = None, run_at: datetime = None, max_attempts: int = None,
+            schedule_id: int = None) -> Job:
+    """Add a job and commit. Raises ValueError for an unknown task or args it can't take."""
+    validate_args(task_name, args)
+    now = datetime.utcnow()
+    job = Job(
+        task=task_name,
+        args=args or {},
+        status="queued",
+        run_at=run_at or now,
+        max_attempts=max_attempts or Config.JOB_MAX_ATTEMPTS,
+        schedule_id=schedule_id,
+        enqueued_at=now,
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def ensure_schedule(name: str, task_name: str, interval_seconds: int, args: dict = None,
+                    enabled: bool = True) -> JobSchedule:
+    """Create or update the recurring schedule `name`. A new schedule is due immediately."""
+    validate_args(task_name, args)
+    if interval_seconds <= 0:
+        raise ValueError("interval_seconds must be positive")
+    schedule = db.session.execute(select(JobSchedule).where(JobSchedule.name == name)).scalar()
+    if schedule is None:
+        schedule = JobSchedule(name=name, next_run_at=datetime.utcnow())
+        db.session.add(schedule)
+    schedule.task = task_name
+    schedule.args = args or {}
+    schedule.interval_seconds = interval_seconds
+    schedule.enabled = enabled
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another process created it first; theirs has the same settings
+        db.session.rollback()
+        schedule = db.session.execute(select(JobSchedule).where(JobSchedule.name == name)).scalar()
+    return schedule
+
+
+def install_default_schedules():
+    """Recurring jobs the app always wants, from Config (an interval of 0 disables one)."""
+    defaults = [
+        ("lead-matching", "match_leads", Config.LEAD_MATCH_INTERVAL_SECONDS, True),
+        ("read-model-check", "check_read_model", Config.PROPERTY_READ_MODEL_CHECK_SECONDS,
+         Config.PROPERTY_READ_MODEL_ENABLED),
+    ]
+    for name, task_name, interval, wanted in defaults:
+        if wanted and interval > 0:
+            ensure_schedule(name, task_name, interval)
+        else:
+            db.session.execute(update(JobSchedule).where(JobSchedule.name == name).values(enabled=False))
+            db.session.commit()
+
+
+# --- Claiming and running -----------------------------------------------------------
+
+def enqueue_due_schedules() -> int:
+    """Enqueue one job per due schedule. Returns how many were enqueued."""
+    now = datetime.utcnow()
+    due = db.session.execute(
+        select(JobSchedule.id, JobSchedule.task, JobSchedule.args, JobSchedule.interval_seconds,
+               JobSchedule.next_run_at)
+        .where(JobSchedule.enabled.is_(True), JobSchedule.next_run_at <= now)
+        .with_for_update(skip_locked=True)
+    ).all()
+    enqueued = 0
+    for schedule in due:
+        next_run_at = schedule.next_run_at + timedelta(seconds=schedule.interval_seconds)
+        if next_run_at <= now:
+            next_run_at = now + timedelta(seconds=schedule.interval_seconds)  # Fell behind: don't replay missed runs
+        # Advancing next_run_at is the claim on this tick, so only one worker enqueues it
+        advanced = db.session.execute(
+            update(JobSchedule)
+            .where(JobSchedule.id == schedule.id, JobSchedule.next_run_at == schedule.next_run_at)
+            .values(next_run_at=next_run_at)
+        ).rowcount
+        if not advanced:
+            continue
+        busy = db.session.execute(
+            select(func.count()).select_from(Job)
+            .where(Job.schedule_id == schedule.id, Job.status.in_(("queued", "running")))
+        ).scalar()
+        if busy:
+            continue  # Previous run still going; skip this tick rather than pile up
+        db.session.add(Job(task=schedule.task, args=schedule.args or {}, status="queued", run_at=now,
+                           max_attempts=Config.JOB_MAX_ATTEMPTS, schedule_id=schedule.id, enqueued_at=now))
+        db.session.execute(update(JobSchedule).where(JobSchedule.id == schedule.id).values(last_enqueued_at=now))
+        enqueued += 1
+    db.session.commit()
+    return enqueued
+
+
+def requeue_stale_jobs() -> int:
+    """Jobs stuck in "running" past the lock timeout: retry them, or fail them if out of attempts."""
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=Config.JOB_LOCK_TIMEOUT_SECONDS)
+    stale = (Job.status == "running", Job.locked_at < cutoff)
+    error = "Worker stopped responding (lock timeout)"
+    failed = db.session.execute(
+        update(Job).where(*stale, Job.attempts >= Job.max_attempts)
+        .values(status="failed", finished_at=now, locked_by=None, last_error=error)
+    ).rowcount
+    retried = db.session.execute(
+        update(Job).where(*stale)
+        .values(status="queued", run_at=now, locked_by=None, locked_at=None, last_error=error)
+    ).rowcount
+    db.session.commit()
+    return failed + retried
+
+
+def claim_job(worker_id: str):
+    """Take the oldest due job for this worker. Returns its id, or None when there is nothing to do."""
+    now = datetime.utcnow()
+    job_id = db.session.execute(
+        select(Job.id)
+        .where(Job.status == "queued", Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).scalar()
+    if job_id is None:
+        db.session.rollback()
+        return None
+    claimed = db.session.execute(
+        update(Job).where(Job.id == job_id, Job.status == "queued")
+        .values(status="running", locked_by=worker_id, locked_at=now, started_at=now,
+                attempts=Job.attempts + 1, finished_at=None)
+    ).rowcount
+    db.session.commit()
+    return job_id if claimed else None
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with +/-20% jitter, so retries of a burst of failures spread out."""
+    delay = min(Config.JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), Config.JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _json_safe(result):
+    return json.loads(json.dumps(result, default=str)) if result is not None else None
+
+
+def _heartbeat(engine, job_id: int, worker_id: str, done) -> None:
+    """Refresh the job's lock until `done` is set, so a long job isn't taken for a dead one."""
+    while not done.wait(Config.JOB_HEARTBEAT_SECONDS):
+        try:
+            with engine.begin() as connection:
+                held = connection.execute(
+                    update(Job).where(Job.id == job_id, Job.locked_by == worker_id, Job.status == "running")
+                    .values(locked_at=datetime.utcnow())
+                ).rowcount
+        except Exception as e:
+            print(f"[ERR] Job {job_id} heartbeat failed: {e}")
+            continue
+        if not held:
+            print(f"[ERR] Job {job_id} lock was taken over; its outcome will be discarded")
+            return
+
+
+def execute_job(job_id: int, worker_id: str):
+    """
+    Run a job claimed by `worker_id` and record the outcome (success, retry with
+    backoff, or failure). The outcome is only written while the job is still this
+    worker's; returns the new status, or None when the lock was lost.
+    """
+    job = db.session.get(Job, job_id)
+    task_name, args = job.task, dict(job.args or {})
+    fn = TASKS.get(task_name)
+    db.session.rollback()  # Don't hold a transaction open for the whole run
+
+    done = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(db.engine, job_id, worker_id, done),
+                                 name=f"job-{job_id}-heartbeat", daemon=True)
+    heartbeat.start()
+    started = time.perf_counter()
+    result, error = None, None
+    try:
+        if fn is None:
+            raise LookupError(f"Unknown task '{task_name}'")
+        result = _json_safe(fn(**args))
+    except Exception as e:
+        db.session.rollback()
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        done.set()
+        heartbeat.join()
+    duration = time.perf_counter() - started
+
+    job = db.session.get(Job, job_id)  # The task may have committed or rolled back
+    now = datetime.utcnow()
+    # locked_by stays as the worker that ran the latest attempt
+    values = {"duration_seconds": duration, "locked_at": None}
+    if error is None:
+        values.update(status="succeeded", result=result, finished_at=now)
+    elif fn is not None and job.attempts < job.max_attempts:
+        values.update(status="queued", last_error=error,
+                      run_at=now + timedelta(seconds=retry_delay(job.attempts)))
+    else:
+        values.update(status="failed", last_error=error, finished_at=now)
+    owned = db.session.execute(
+        update(Job).where(Job.id == job_id, Job.locked_by == worker_id, Job.status == "running").values(**values)
+    ).rowcount
+    db.session.commit()
+    if not owned:
+        print(f"[ERR] Job {job_id} ({task_name}) finished after its lock was taken over; outcome discarded")
+        return None
+
+    status = values["status"]
+    metrics.observe("job_duration_seconds", duration, task=task_name, status=status)
+    metrics.inc("jobs_total", task=task_name, status=status)
+    if error is None:
+        print(f"[LOG] Job {job_id} ({task_name}) succeeded in {duration:.2f}s")
+    else:
+        print(f"[ERR] Job {job_id} ({task_name}) attempt {job.attempts} failed: {error}"
+              + (f"; retrying at {values['run_at']:%H:%M:%S}" if status == "queued" else ""))
+    return status
+
+
+# --- Workers ------------------------------------------------------------------------
+
+def work(worker_id: str, stop, poll_seconds: float = None, max_jobs: int = None) -> int:
+    """
+    Worker loop: enqueue due schedules, recover stale jobs, then claim and run jobs
+    until `stop` (a threading/multiprocessing Event) is set. Needs an app context.
+    Returns the number of jobs run.
+    """
+    poll_seconds = Config.JOB_POLL_SECONDS if poll_seconds is None else poll_seconds
+    ran, last_maintenance = 0, 0.0
+    while not stop.is_set() and (max_jobs is None or ran < max_jobs):
+        try:
+            if time.monotonic() - last_maintenance >= poll_seconds:
+                enqueue_due_schedules()
+                requeue_stale_jobs()
+                last_maintenance = time.monotonic()
+            job_id = claim_job(worker_id)
+            if job_id is None:
+                stop.wait(poll_seconds)
+                continue
+            execute_job(job_id, worker_id)
+            ran += 1
+        except Exception as e:
+            # Database hiccup between jobs: back off and keep the worker alive
+            print(f"[ERR] Job worker {worker_id}: {e}")
+            db.session.rollback()
+            stop.wait(poll_seconds)
+        finally:
+            db.session.remove()
+    return ran
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _worker_process(stop, poll_seconds):
+    # Ctrl-C reaches the whole process group; let the parent decide when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from create_app import create_app
+    app = create_app()
+    with app.app_context():
+        work(_worker_id(), stop, poll_seconds)
+
+
+def run_workers(app, processes: int = None, poll_seconds: float = None):
+    """
+    Run `processes` worker processes until SIGINT/SIGTERM; each finishes its
+    current job before exiting. With one process the loop runs in this process.
+    """
+    processes = processes or Config.JOB_WORKER_PROCESSES
+    with app.app_context():
+        install_default_schedules()
+
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event() if processes > 1 else threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    print(f"[LOG] Starting {processes} job worker(s)")
+    if processes == 1:
+        with app.app_context():
+            work(_worker_id(), stop, poll_seconds)
+        return
+
+    workers = [context.Process(target=_worker_process, args=(stop, poll_seconds), name=f"job-worker-{i}")
+               for i in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+# --- CLI ----------------------------------------------------------------------------
+
+@click.group("jobs")
+def jobs_cli():
+    """Background job queue."""
+
+
+@jobs_cli.command("worker")
+@click.option("--processes", type=int, default=None, help="Worker processes (default JOB_WORKER_PROCESSES).")
+@click.option("--poll", "poll_seconds", type=float, default=None, help="Idle poll interval in seconds.")
+@with_appcontext
+def worker_command(processes, poll_seconds):
+    """Run job workers until interrupted."""
+    from flask import current_app
+    run_workers(current_app._get_current_object(), processes, poll_seconds)
+
+
+@jobs_cli.command("enqueue")
+@click.argument("task_name")
+@click.option("--args", "args_json", default="{}", help="Task arguments as a JSON object.")
+@click.option("--delay", type=float, default=0, help="Seconds before the job may run.")
+@with_appcontext
+def enqueue_command(task_name, args_json, delay):
+    """Queue a one-off job."""
+    job = enqueue(task_name, json.loads(args_json), datetime.utcnow() + timedelta(seconds=delay))
+    print(f"[LOG] Queued job {job.id} ({job.task}) to run at {job.run_at:%Y-%m-%d %H:%M:%S}")
@@ -0,0 +1,100 @@
+# helpers/json_provider.py
+#
+# Fast JSON for Flask responses (jsonify, request.get_json) and the ASGI chat handlers.
+# Encodes with orjson when it is installed, else with the stdlib encoder; either way
+# Decimal, datetime/date/time, UUID, sets and NumPy values serialize without the
+# caller converting them first. Datetimes come out as ISO 8601 (not Flask's default
+# HTTP-date format), the same string .isoformat() gives.
+#
+# The encoder is picked by Config.JSON_ENCODER: "auto" (orjson if available), "orjson"
+# or "stdlib". Output is the same either way.
+
+import json
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+import numpy as np
+from flask.json.provider import JSONProvider
+from config import Config
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib encoder handles everything, just slower
+    orjson = None
+
+
+def _default(value):
+    """Types neither encoder handles on its own."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def use_orjson() -> bool:
+    if Config.JSON_ENCODER == "orjson" and orjson is None:
+        raise RuntimeError("JSON_ENCODER=orjson but orjson is not installed")
+    return orjson is not None and Config.JSON_ENCODER in ("auto", "orjson")
+
+
+if orjson is not None:
+    # Non-string dict keys (e.g. int IDs) become strings, like the stdlib encoder does
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def dumps_bytes(obj) -> bytes:
+    """Compact UTF-8 JSON."""
+    if use_orjson():
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj) -> str:
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def loads(data):
+    """Parse JSON from str or bytes; raises ValueError on bad input, like json.loads."""
+    if use_orjson():
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Flask JSON provider on top of dumps_bytes/loads. Responses are written as bytes
+    straight from the encoder (no intermediate str), compact, with keys in insertion
+    order rather than sorted.
+    """
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            # Formatting options (indent, sort_keys, ...) only the stdlib encoder understands
+            kwargs.setdefault("default", _default)
+            return json.dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+
+def install_json_provider(app):
+    use_orjson()  # Fail at startup, not on the first response, if orjson was required but is missing
+    app.json = FastJSONProvider(app)
@@ -0,0 +1,369 @@
+# helpers/lead_matching.py
+#
+# Batch client -> property matching for leads.
+#
+# Client requirements and property attributes are loaded once into NumPy arrays,
+# and every (client, property) pair is scored in blocks of LEAD_MATCH_CLIENT_BLOCK
+# clients: a block is a (clients x properties) matrix, so scoring costs a few
+# vectorized passes instead of one query per client. The top-k properties per
+# client are written to client_properties in bulk.
+#
+# Rows the matcher owns have match_score set. Links added by hand (match_score
+# NULL) and matches an agent has acted on (is_active, or a comment) are never
+# removed; they keep their place and only get their score refreshed.
+#
+#   flask --app main match-leads              (incremental)
+#   flask --app main match-leads --full
+#   POST /leads/match                       (queues a match_leads job)
+
+from datetime import datetime
+import click
+import numpy as np
+from flask.cli import with_appcontext
+from sqlalchemy import select, delete, func
+from config import Config
+from database import db
+from models.sql_models import Building, Client, ClientProperty, LeadMatchRun, Property
+
+# Client statuses that are no longer looking; they are skipped (their rows are left as they are)
+INACTIVE_CLIENT_STATUSES = ("closed",)
+# Property statuses that can be offered; NULL counts as available
+AVAILABLE_PROPERTY_STATUSES = ("available",)
+
+# Weights of the soft scores (sum to 1)
+WEIGHTS = {"price": 0.35, "bedrooms": 0.2, "size": 0.2, "area": 0.25}
+
+
+def _floats(values) -> np.ndarray:
+    return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+
+
+class PropertyArrays:
+    """Offerable properties as column arrays, plus a lowercased location string for area matching."""
+
+    def __init__(self, property_ids=None):
+        query = (
+            select(Property.id, Property.price, Property.bedrooms, Property.bathrooms, Property.size,
+                   Building.name, Building.nearest_bts, Building.nearest_mrt)
+            .join(Building, Property.building_id == Building.id)
+            .where(db.or_(Property.status.is_(None),
+                          func.lower(Property.status).in_(AVAILABLE_PROPERTY_STATUSES)))
+            .order_by(Property.id)
+        )
+        if property_ids is not None:
+            query = query.where(Property.id.in_(list(property_ids)))
+        rows = db.session.execute(query).all()
+
+        self.ids = np.array([r.id for r in rows], dtype=np.int64)
+        self.price = _floats(r.price for r in rows)
+        self.bedrooms = _floats(r.bedrooms for r in rows)
+        self.bathrooms = _floats(r.bathrooms for r in rows)
+        self.size = _floats(r.size for r in rows)
+        self.location = np.array(
+            [" | ".join(filter(None, (r.name, r.nearest_bts, r.nearest_mrt))).lower() for r in rows], dtype=str
+        )
+        self._area_masks = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def area_mask(self, area: str) -> np.ndarray:
+        """Properties whose building name or nearest station contains `area` (cached per area)."""
+        if area not in self._area_masks:
+            self._area_masks[area] = np.char.find(self.location, area) >= 0
+        return self._area_masks[area]
+
+
+class ClientArrays:
+    """Requirements of the clients still looking, as column arrays (NaN = no requirement)."""
+
+    def __init__(self, client_ids=None):
+        query = (
+            select(Client.id, Client.budget, Client.bedrooms, Client.bath, Client.size, Client.area)
+            .where(db.or_(Client.status.is_(None), func.lower(Client.status).notin_(INACTIVE_CLIENT_STATUSES)))
+            .order_by(Client.id)
+        )
+        if client_ids is not None:
+            query = query.where(Client.id.in_(list(client_ids)))
+        rows = db.session.execute(query).all()
+
+        self.ids = np.array([r.id for r in rows], dtype=np.int64)
+        self.budget = _floats(r.budget for r in rows)
+        self.bedrooms = _floats(r.bedrooms for r in rows)
+        self.bath = _floats(r.bath for r in rows)
+        self.size = _floats(r.size for r in rows)
+        self.area = [(r.area or "").strip().lower() for r in rows]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def score_block(clients: ClientArrays, start: int, stop: int, properties: PropertyArrays,
+                budget_slack: float, size_slack: float) -> np.ndarray:
+    """
+    Scores in [0, 1] for clients[start:stop] x all properties; -inf where a hard
+    requirement fails. A NaN requirement (client didn't say) always passes.
+
+    Hard requirements:
+      price     <= budget * (1 + budget_slack)
+      bedrooms  between the wanted count and one more
+      bathrooms >= wanted
+      size      >= wanted size * (1 - size_slack)
+    Soft scores: price (within budget best, fading to 0 at the slack limit),
+    exact bedroom count, size (fading below the wanted size), area match.
+    """
+    budget = clients.budget[start:stop, None]
+    want_bed = clients.bedrooms[start:stop, None]
+    want_bath = clients.bath[start:stop, None]
+    want_size = clients.size[start:stop, None]
+    price, bedrooms, bathrooms, size = (properties.price[None, :], properties.bedrooms[None, :],
+                                        properties.bathrooms[None, :], properties.size[None, :])
+
+    no_budget, no_bed, no_size = np.isnan(budget), np.isnan(want_bed), np.isnan(want_size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ok = no_budget | (price <= budget * (1 + budget_slack))
+        ok &= no_bed | ((bedrooms >= want_bed) & (bedrooms <= want_bed + 1))
+        ok &= np.isnan(want_bath) | ~(bathrooms < want_bath)  # unknown bathrooms pass
+        ok &= no_size | ~(size < want_size * (1 - size_slack))  # unknown size passes
+
+        # Within budget scores 0.75-1 (closer to the budget = better use of it);
+        # over budget fades linearly to 0 at the slack limit
+        over = np.maximum(price - budget, 0) / (budget * budget_slack)
+        price_score = np.where(price <= budget, 0.75 + 0.25 * price / budget, 1 - over)
+        price_score = np.where(no_budget, 0.5, np.nan_to_num(price_score, nan=0.0))
+
+        bed_score = np.where(no_bed, 0.5, np.where(bedrooms == want_bed, 1.0, 0.6))
+
+        short = np.maximum(want_size - size, 0) / (want_size * size_slack)
+        size_score = np.where(no_size | np.isnan(size), 0.5, np.clip(1 - short, 0, 1))
+
+    area_score = np.empty((stop - start, len(properties)), dtype=np.float64)
+    for row, area in enumerate(clients.area[start:stop]):
+        area_score[row] = properties.area_mask(area) if area else 0.5
+
+    score = (WEIGHTS["price"] * price_score + WEIGHTS["bedrooms"] * bed_score
+             + WEIGHTS["size"] * size_score + WEIGHTS["area"] * area_score)
+    return np.where(ok, score, -np.inf)
+
+
+def top_k(scores: np.ndarray, k: int) -> tuple:
+    """
+    (column indexes, scores) of the k best per row, best first; -inf entries are
+    dropped by the caller. Equal scores go to the lower column (= lower property
+    id, since PropertyArrays is ordered by id), so reruns pick the same pairs.
+    """
+    rows, columns = scores.shape
+    k = min(k, columns)
+    if k == 0:
+        empty = np.empty((rows, 0))
+        return empty.astype(np.int64), empty
+    # argpartition alone cuts ties at the k-th score at random: keep everything
+    # above the k-th score, then fill up with the lowest columns equal to it
+    kth = -np.partition(-scores, k - 1, axis=1)[:, k - 1:k]
+    above = scores > kth
+    tied = scores == kth
+    keep = above | (tied & (np.cumsum(tied, axis=1) <= k - above.sum(axis=1, keepdims=True)))
+    idx = np.nonzero(keep)[1].reshape(rows, k)  # ascending columns, exactly k per row
+    picked = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-picked, axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(picked, order, axis=1)
+
+
+def iter_matches(clients: ClientArrays, properties: PropertyArrays, k: int, block: int = None,
+                 budget_slack: float = None, size_slack: float = None):
+    """Yield {client_id: [(property_id, score), ...] best first} per block of clients."""
+    block = block or Config.LEAD_MATCH_CLIENT_BLOCK
+    budget_slack = Config.LEAD_MATCH_BUDGET_SLACK if budget_slack is None else budget_slack
+    size_slack = Config.LEAD_MATCH_SIZE_SLACK if size_slack is None else size_slack
+
+    for start in range(0, len(clients), block):
+        stop = min(start + block, len(clients))
+        scores = score_block(clients, start, stop, properties, budget_slack, size_slack)
+        idx, best = top_k(scores, k)
+        matches = {}
+        for row in range(stop - start):
+            keep = np.isfinite(best[row])
+            matches[int(clients.ids[start + row])] = [
+                (int(pid), round(float(s), 4)) for pid, s in zip(properties.ids[idx[row][keep]], best[row][keep])
+            ]
+        yield matches
+
+
+def compute_matches(clients: ClientArrays, properties: PropertyArrays, k: int, **kwargs) -> dict:
+    """client_id -> [(property_id, score), ...] best first, for every client in `clients`."""
+    matches = {}
+    for block_matches in iter_matches(clients, properties, k, **kwargs):
+        matches.update(block_matches)
+    return matches
+
+
+def _insert(table):
+    """INSERT with .on_conflict_do_update() for the running dialect (Postgres or SQLite)."""
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(table)
+
+
+def write_matches(matches: dict) -> int:
+    """
+    Replace the matcher's rows for these clients with `matches`, in bulk:
+    one SELECT of the current rows, one DELETE of the matcher rows that dropped
+    out (unless an agent touched them) and one executemany upsert of the wanted
+    pairs. The upsert goes through the (client_id, property_id) unique constraint,
+    so two runs matching the same client at once can't write a pair twice; an
+    existing pair only gets its score replaced. Returns the number of matches written.
+    """
+    if not matches:
+        return 0
+    client_ids = list(matches)
+    existing = {}
+    for row in db.session.execute(
+        select(ClientProperty.id, ClientProperty.client_id, ClientProperty.property_id,
+               ClientProperty.match_score, ClientProperty.is_active, ClientProperty.comment)
+        .where(ClientProperty.client_id.in_(client_ids))
+    ):
+        existing[(row.client_id, row.property_id)] = row
+
+    wanted = {(client_id, pid): score for client_id, pairs in matches.items() for pid, score in pairs}
+    stale = [row.id for key, row in existing.items()
+             if key not in wanted and row.match_score is not None and not row.is_active and not row.comment]
+    now = datetime.utcnow()
+    rows = [{"client_id": c, "property_id": p, "match_score": score, "is_active": False, "created_at": now}
+            for (c, p), score in wanted.items()]
+
+    if stale:
+        db.session.execute(delete(ClientProperty).where(ClientProperty.id.in_(stale)))
+    if rows:
+        stmt = _insert(ClientProperty.__table__)
+        db.session.execute(
+            stmt.on_conflict_do_update(index_elements=["client_id", "property_id"],
+                                       set_={"match_score": stmt.excluded.match_score}),
+            rows,
+        )
+    return len(wanted)
+
+
+def _last_watermark():
+    """started_at of the last run that finished; changes after it haven't been matched yet."""
+    return db.session.execute(
+        select(LeadMatchRun.started_at).where(LeadMatchRun.finished_at.isnot(None))
+        .order_by(LeadMatchRun.started_at.desc()).limit(1)
+    ).scalar()
+
+
+def _changed_since(model, watermark) -> list:
+    return db.session.execute(
+        select(model.id).where(func.coalesce(model.updated_at, model.created_at) > watermark)
+    ).scalars().all()
+
+
+def _affected_clients(changed_property_ids: list, k: int) -> set:
+    """
+    Clients whose top-k a batch of changed properties could alter: those already
+    matched to one of them, plus those for whom one now beats their current k-th
+    best score (or who have fewer than k matches and now qualify for one).
+    """
+    affected = set(db.session.execute(
+        select(ClientProperty.client_id).where(
+            ClientProperty.property_id.in_(changed_property_ids), ClientProperty.match_score.isnot(None)
+        )
+    ).scalars())
+
+    changed = PropertyArrays(changed_property_ids)
+    if not len(changed):
+        return affected  # changed properties that are no longer offerable are covered above
+    clients = ClientArrays()
+    if not len(clients):
+        return affected
+
+    current = {row.client_id: (row.n, row.worst) for row in db.session.execute(
+        select(ClientProperty.client_id, func.count().label("n"), func.min(ClientProperty.match_score).label("worst"))
+        .where(ClientProperty.match_score.isnot(None)).group_by(ClientProperty.client_id)
+    )}
+    # Score threshold a changed property must beat, per client
+    threshold = np.array([
+        current[cid][1] if cid in current and current[cid][0] >= k else -np.inf for cid in clients.ids.tolist()
+    ])
+
+    block = Config.LEAD_MATCH_CLIENT_BLOCK
+    for start in range(0, len(clients), block):
+        stop = min(start + block, len(clients))
+        scores = score_block(clients, start, stop, changed,
+                             Config.LEAD_MATCH_BUDGET_SLACK, Config.LEAD_MATCH_SIZE_SLACK)
+        best = scores.max(axis=1)
+        hit = np.isfinite(best) & (best > threshold[start:stop])
+        affected.update(clients.ids[start:stop][hit].tolist())
+    return affected
+
+
+def run_matching(full: bool = False, client_ids: list = None, k: int = None) -> dict:
+    """
+    Match clients to properties and store the top-k per client. Needs an app context.
+
+    :param full: re-match every client still looking.
+    :param client_ids: re-match exactly these clients.
+    Otherwise incremental: only clients changed since the last finished run and
+    clients whose matches the properties changed since then could alter. The first
+    run is always full. Properties deleted since the last run disappear from the
+    matches via the foreign-key cascade; the next full run refills those slots.
+    :return: run stats.
+    """
+    k = k or Config.LEAD_MATCH_TOP_K
+    started = datetime.utcnow()
+    watermark = None if (full or client_ids) else _last_watermark()
+    mode = "clients" if client_ids else ("incremental" if watermark is not None else "full")
+
+    run = LeadMatchRun(mode=mode, started_at=started)
+    db.session.add(run)
+    db.session.commit()
+
+    if mode == "full":
+        targets = None
+    elif mode == "clients":
+        targets = set(client_ids)
+    else:
+        targets = set(_changed_since(Client, watermark))
+        changed_properties = _changed_since(Property, watermark)
+        if changed_properties:
+            targets |= _affected_clients(changed_properties, k)
+
+    written = pairs = 0
+    clients = ClientArrays(targets) if targets is None or targets else None
+    try:
+        if clients is not None and len(clients):
+            properties = PropertyArrays()
+            pairs = len(clients) * len(properties)
+            # Written block by block, so memory stays at one block of scores and matches
+            for block_matches in iter_matches(clients, properties, k):
+                written += write_matches(block_matches)
+    except Exception:
+        db.session.rollback()
+        raise
+
+    run.clients_matched = len(clients) if clients is not None else 0
+    run.pairs_scored = pairs
+    run.matches_written = written
+    run.finished_at = datetime.utcnow()
+    db.session.commit()
+    return {
+        "run_id": run.id,
+        "mode": mode,
+        "clients_matched": run.clients_matched,
+        "pairs_scored": pairs,
+        "matches_written": written,
+        "seconds": round((run.finished_at - started).total_seconds(), 3),
+    }
+
+
+@click.command("match-leads")
+@click.option("--full", is_flag=True, help="Re-match every client instead of only what changed.")
+@click.option("--top-k", type=int, default=None, help="Matches kept per client (default LEAD_MATCH_TOP_K).")
+@with_appcontext
+def match_leads_command(full, top_k):
+    """Score clients against available properties and store the top matches."""
+    stats = run_matching(full=full, k=top_k)
+    print(f"[LOG] Lead matching ({stats['mode']}) finished in {stats['seconds']}s: "
+          f"{stats['clients_matched']} clients, {stats['pairs_scored']} pairs scored, "
+          f"{stats['matches_written']} matches written")
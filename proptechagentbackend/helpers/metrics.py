@@ -0,0 +1,221 @@
+# helpers/metrics.py
+
+import contextvars
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from config import Config
+
+# Upper bounds (seconds) shared by every latency histogram
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Per-request trace state, set by begin_request(). Threads that don't inherit it
+# (e.g. the tool pool) fall back to sampling each span on its own.
+_sampled = contextvars.ContextVar("metrics_sampled", default=None)
+_endpoint = contextvars.ContextVar("metrics_endpoint", default="none")
+
+
+class Histogram:
+    """
+    A fixed-bucket histogram. Cheap enough to update on every request: one bisect
+    and a few integer increments under a lock.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.total += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "buckets": list(self.buckets),
+                "counts": list(self.counts),
+                "count": self.count,
+                "sum": self.total,
+            }
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+_registry = {}
+_counters = {}
+_collectors = []
+_buckets = {}  # histogram name -> bucket bounds, for histograms not measured in seconds
+_registry_lock = threading.Lock()
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted(labels.items())))
+
+
+def set_buckets(name: str, buckets):
+    """Use `buckets` instead of DEFAULT_BUCKETS for histograms named `name` (call before observing)."""
+    _buckets[name] = tuple(buckets)
+
+
+def get_histogram(name: str, **labels) -> Histogram:
+    """Return the histogram for (name, labels), creating it on first use."""
+    key = _key(name, labels)
+    hist = _registry.get(key)
+    if hist is None:
+        with _registry_lock:
+            hist = _registry.setdefault(key, Histogram(_buckets.get(name, DEFAULT_BUCKETS)))
+    return hist
+
+
+def observe(name: str, value: float, **labels):
+    """Record one observation, e.g. observe("chat_ttfb_seconds", 0.42, mode="stream")."""
+    get_histogram(name, **labels).observe(value)
+
+
+def inc(name: str, amount: float = 1.0, **labels):
+    """Increment a counter, e.g. inc("chat_tool_calls_total", tool="fetch_properties")."""
+    key = _key(name, labels)
+    counter = _counters.get(key)
+    if counter is None:
+        with _registry_lock:
+            counter = _counters.setdefault(key, Counter())
+    counter.inc(amount)
+
+
+def counter_value(name: str, **labels) -> float:
+    """Sum of every `name` counter whose labels include `labels` (all of them if none given)."""
+    wanted = set(labels.items())
+    with _registry_lock:
+        items = list(_counters.items())
+    return sum(
+        counter.value for (counter_name, counter_labels), counter in items
+        if counter_name == name and wanted <= set(counter_labels)
+    )
+
+
+def register_collector(fn):
+    """
+    Register a callable read at export time, for state that already lives elsewhere
+    (cache sizes, hit counts). It returns [(name, labels, value)] gauges, or
+    (name, labels, value, "counter") for values that only ever grow; counter names
+    end in _total.
+    """
+    _collectors.append(fn)
+
+
+def snapshot() -> list:
+    """Return every histogram as a list of plain dicts (name, labels and data)."""
+    with _registry_lock:
+        items = list(_registry.items())
+    return [
+        {"name": name, "labels": dict(labels), **hist.snapshot()}
+        for (name, labels), hist in items
+    ]
+
+
+# -------------------------------
+# Tracing
+# -------------------------------
+def begin_request(endpoint: str):
+    """Decide once per request whether its spans are recorded."""
+    _endpoint.set(endpoint or "none")
+    _sampled.set(random.random() < Config.METRICS_SAMPLE_RATE)
+
+
+def current_endpoint() -> str:
+    return _endpoint.get()
+
+
+def is_sampled() -> bool:
+    sampled = _sampled.get()
+    if sampled is None:
+        return random.random() < Config.METRICS_SAMPLE_RATE
+    return sampled
+
+
+@contextmanager
+def span(name: str, **labels):
+    """
+    Time a block into the `<name>_seconds` histogram, labelled with the current
+    endpoint. Unsampled requests skip the clock reads entirely.
+    """
+    if not is_sampled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(f"{name}_seconds", time.perf_counter() - start, endpoint=_endpoint.get(), **labels)
+
+
+# -------------------------------
+# Prometheus text export
+# -------------------------------
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in sorted(labels.items()):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render_prometheus() -> str:
+    """Render every metric in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    typed = set()
+
+    def type_line(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    with _registry_lock:
+        histograms = sorted(_registry.items())
+        counters = sorted(_counters.items())
+
+    for (name, label_items), hist in histograms:
+        labels = dict(label_items)
+        data = hist.snapshot()
+        type_line(name, "histogram")
+        cumulative = 0
+        for bound, count in zip(data["buckets"], data["counts"]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': repr(float(bound))})} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {data['count']}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {data['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {data['count']}")
+
+    for (name, label_items), counter in counters:
+        type_line(name, "counter")
+        lines.append(f"{name}{_format_labels(dict(label_items))} {counter.value}")
+
+    for collector in _collectors:
+        try:
+            gauges = collector()
+        except Exception as e:
+            print(f"[ERR] Metrics collector failed: {e}")
+            continue
+        for name, labels, value, *kind in gauges:
+            type_line(name, kind[0] if kind else "gauge")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,322 @@
+# helpers/prompt_compactor.py
+#
+# Keeps the prompt sent to the model bounded as a conversation grows. The history
+# the client (or the conversation store) holds is never changed; only the copy
+# that goes into each completion request is compacted:
+#
+#   1. The system message and the last CONVERSATION_KEEP_TURNS turns (a turn starts
+#      at a user message) are kept verbatim.
+#   2. Tool outputs older than that are replaced by a one-line reference; the model
+#      can call the tool again if it needs the rows back.
+#   3. If the prompt is still over CONVERSATION_TOKEN_BUDGET, the older turns are
+#      folded into a rolling summary (one system message). Summaries are cached by
+#      the exact messages they cover, and a new summary extends the longest cached
+#      one instead of re-reading the whole conversation.
+#
+# Tokens are counted locally with tiktoken when it is installed, else estimated
+# from the character count.
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from openai import OpenAI, AsyncOpenAI
+from config import Config
+from helpers import metrics
+from helpers.chat_tools import CHAT_MODEL
+from helpers.completion_cache import normalize_messages
+from helpers.tool_result_compactor import CHARS_PER_TOKEN
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to the chars-per-token estimate
+    tiktoken = None
+
+# Per-message framing tokens the API adds (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+SUMMARY_INSTRUCTIONS = (
+    "Summarize this conversation between a rental property assistant and a client for the "
+    "assistant's own reference. Keep the client's requirements (budget, bedrooms, areas, dates, "
+    "pets, other preferences), properties discussed with their codes, and any decisions or open "
+    "questions. Be terse; use bullet points."
+)
+
+# Prompt sizes are recorded in tokens, not seconds
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+metrics.set_buckets("prompt_tokens", TOKEN_BUCKETS)
+metrics.set_buckets("prompt_tokens_saved", TOKEN_BUCKETS)
+
+summary_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+async_summary_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.encoding_for_model(CHAT_MODEL)
+        except KeyError:
+            _encoding = tiktoken.get_encoding("o200k_base")
+    return _encoding
+
+
+def count_text_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def count_message_tokens(message: dict) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_text_tokens(message.get("content") or "")
+    for tc in message.get("tool_calls") or []:
+        tokens += count_text_tokens(tc["function"]["name"]) + count_text_tokens(tc["function"]["arguments"])
+    return tokens
+
+
+def count_tokens(messages: list) -> int:
+    return sum(count_message_tokens(message) for message in messages)
+
+
+class SummaryCache:
+    """LRU of rolling summaries keyed by a hash of the messages they cover."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+            return summary
+
+    def put(self, key: str, summary: str):
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+summary_cache = SummaryCache(Config.CONVERSATION_SUMMARY_CACHE_ENTRIES)
+
+
+def _turn_starts(messages: list) -> list:
+    return [i for i, message in enumerate(messages) if message.get("role") == "user"]
+
+
+def _tool_reference(message: dict, name: str) -> str:
+    """One-line stand-in for an old tool output."""
+    content = message.get("content") or ""
+    detail = f"{len(content)} chars"
+    try:
+        parsed = json.loads(content)
+        if isinstance(parsed, dict) and "total" in parsed:
+            detail = f"{parsed['total']} results"
+        elif isinstance(parsed, dict) and "error" in parsed:
+            detail = f"error: {str(parsed['error'])[:80]}"
+    except (TypeError, ValueError):
+        pass
+    return f"[Earlier {name} output omitted ({detail}). Call {name} again if the details are needed.]"
+
+
+def _tool_names(messages: list) -> dict:
+    """tool_call_id -> function name, from the assistant messages that made the calls."""
+    return {tc["id"]: tc["function"]["name"] for m in messages for tc in (m.get("tool_calls") or [])}
+
+
+def _reference_old_tool_outputs(messages: list) -> list:
+    names = _tool_names(messages)
+    compacted = []
+    for message in messages:
+        if message.get("role") in ("tool", "function") and not str(message.get("content", "")).startswith("[Earlier "):
+            name = message.get("name") or names.get(message.get("tool_call_id"), "tool")
+            message = dict(message, content=_tool_reference(message, name))
+        compacted.append(message)
+    return compacted
+
+
+def _prefix_keys(messages: list) -> list:
+    """
+    (end index, hash of messages[:end]) at every turn boundary and at the end,
+    computed in one pass; a summary covering messages[:end] is cached under that hash.
+    """
+    digest = hashlib.sha256(CHAT_MODEL.encode())
+    boundaries = set(_turn_starts(messages)) | {len(messages)}
+    keys = []
+    for i, message in enumerate(normalize_messages(messages) + [None]):
+        if i in boundaries and i > 0:
+            keys.append((i, digest.copy().hexdigest()))
+        if message is not None:
+            digest.update(json.dumps(message, sort_keys=True, default=str).encode())
+    return keys
+
+
+def _transcript(messages: list) -> str:
+    names = _tool_names(messages)
+    lines = []
+    for message in messages:
+        role, content = message.get("role"), message.get("content") or ""
+        if role == "system" and content.startswith(SUMMARY_PREFIX):
+            lines.append(content)
+        elif role in ("tool", "function"):
+            name = message.get("name") or names.get(message.get("tool_call_id"), "tool")
+            lines.append(f"[{name} result] {content}")
+        elif message.get("tool_calls"):
+            calls = ", ".join(f"{tc['function']['name']}({tc['function']['arguments']})" for tc in message["tool_calls"])
+            lines.append(f"assistant called: {calls}" + (f"\nassistant: {content}" if content else ""))
+        else:
+            lines.append(f"{role}: {content}")
+    return "\n".join(lines)
+
+
+def _summary_request(previous: str, messages: list) -> list:
+    text = _transcript(messages)
+    if previous:
+        text = f"Summary so far:\n{previous}\n\nConversation since then:\n{text}"
+    return [{"role": "system", "content": SUMMARY_INSTRUCTIONS}, {"role": "user", "content": text}]
+
+
+def extractive_summary(previous: str, messages: list) -> str:
+    """Model-free fallback: the user's messages, clipped, newest last, within the summary budget."""
+    budget_chars = Config.CONVERSATION_SUMMARY_MAX_TOKENS * CHARS_PER_TOKEN
+    lines = [f"- user said: {' '.join((m.get('content') or '').split())[:200]}"
+             for m in messages if m.get("role") == "user"]
+    text = "\n".join(([previous] if previous else []) + lines)
+    return text[-budget_chars:]
+
+
+def _plan(messages: list):
+    """
+    Work out the compacted prompt. Returns (prompt, job): job is None when the
+    prompt is final, else (previous_summary, messages_to_fold, cache_key, system, recent)
+    describing the summary still to be written.
+    """
+    system = [messages[0]] if messages and messages[0].get("role") == "system" else []
+    body = messages[len(system):]
+    turn_starts = _turn_starts(body)
+    if len(turn_starts) <= Config.CONVERSATION_KEEP_TURNS:
+        return messages, None
+
+    cut = turn_starts[-Config.CONVERSATION_KEEP_TURNS] if Config.CONVERSATION_KEEP_TURNS else len(body)
+    older, recent = _reference_old_tool_outputs(body[:cut]), body[cut:]
+    prompt = system + older + recent
+    if count_tokens(prompt) <= Config.CONVERSATION_TOKEN_BUDGET:
+        return prompt, None
+
+    # Over budget: fold the older turns into a summary, extending the longest cached one
+    keys = _prefix_keys(older)
+    full_key = keys[-1][1]
+    summary = summary_cache.get(full_key)
+    if summary is not None:
+        return _with_summary(system, summary, recent), None
+    previous, start = None, 0
+    for end, key in reversed(keys[:-1]):
+        previous = summary_cache.get(key)
+        if previous is not None:
+            start = end
+            break
+    return None, (previous, older[start:], full_key, system, recent)
+
+
+def _with_summary(system: list, summary: str, recent: list) -> list:
+    return system + [{"role": "system", "content": SUMMARY_PREFIX + summary}] + recent
+
+
+def _record(messages: list, prompt: list, started: float, summary_seconds: float = 0.0) -> list:
+    before, after = count_tokens(messages), count_tokens(prompt)
+    overhead = time.perf_counter() - started
+    metrics.observe("prompt_tokens", after, stage="compacted")
+    metrics.observe("prompt_tokens", before, stage="full")
+    if before > after:
+        saved = before - after
+        metrics.observe("prompt_tokens_saved", saved)
+        metrics.inc("prompt_tokens_saved_total", saved)
+        # Estimated prefill time not spent, net of the compaction itself
+        estimated = saved / 1000 * Config.PROMPT_PREFILL_SECONDS_PER_1K_TOKENS
+        metrics.observe("prompt_latency_saved_seconds", max(estimated - overhead, 0.0))
+    metrics.observe("prompt_compaction_seconds", overhead - summary_seconds)
+    if summary_seconds:
+        metrics.observe("prompt_summary_seconds", summary_seconds)
+    return prompt
+
+
+def compact_prompt(messages: list) -> list:
+    """The message list to send for `messages`, compacted as described above."""
+    if not Config.CONVERSATION_COMPACTION_ENABLED:
+        return messages
+    started = time.perf_counter()
+    prompt, job = _plan(messages)
+    summary_seconds = 0.0
+    if job is not None:
+        previous, to_fold, key, system, recent = job
+        summary_started = time.perf_counter()
+        summary = _summarize(previous, to_fold)
+        summary_seconds = time.perf_counter() - summary_started
+        summary_cache.put(key, summary)
+        prompt = _with_summary(system, summary, recent)
+    return _record(messages, prompt, started, summary_seconds)
+
+
+async def compact_prompt_async(messages: list) -> list:
+    """compact_prompt for the asyncio handlers; the summary call doesn't block the loop."""
+    if not Config.CONVERSATION_COMPACTION_ENABLED:
+        return messages
+    started = time.perf_counter()
+    prompt, job = _plan(messages)
+    summary_seconds = 0.0
+    if job is not None:
+        previous, to_fold, key, system, recent = job
+        summary_started = time.perf_counter()
+        summary = await _summarize_async(previous, to_fold)
+        summary_seconds = time.perf_counter() - summary_started
+        summary_cache.put(key, summary)
+        prompt = _with_summary(system, summary, recent)
+    return _record(messages, prompt, started, summary_seconds)
+
+
+def _summarize(previous: str, messages: list) -> str:
+    if not Config.CONVERSATION_SUMMARY_MODEL:
+        return extractive_summary(previous, messages)
+    try:
+        with metrics.span("llm_call", mode="summary"):
+            completion = summary_client.chat.completions.create(
+                model=Config.CONVERSATION_SUMMARY_MODEL,
+                messages=_summary_request(previous, messages),
+                max_tokens=Config.CONVERSATION_SUMMARY_MAX_TOKENS,
+            )
+        return (completion.choices[0].message.content or "").strip() or extractive_summary(previous, messages)
+    except Exception as e:
+        print(f"[ERR] Conversation summary failed, using extractive summary: {e}")
+        return extractive_summary(previous, messages)
+
+
+async def _summarize_async(previous: str, messages: list) -> str:
+    if not Config.CONVERSATION_SUMMARY_MODEL:
+        return extractive_summary(previous, messages)
+    try:
+        with metrics.span("llm_call", mode="summary"):
+            completion = await async_summary_client.chat.completions.create(
+                model=Config.CONVERSATION_SUMMARY_MODEL,
+                messages=_summary_request(previous, messages),
+                max_tokens=Config.CONVERSATION_SUMMARY_MAX_TOKENS,
+            )
+        return (completion.choices[0].message.content or "").strip() or extractive_summary(previous, messages)
+    except Exception as e:
+        print(f"[ERR] Conversation summary failed, using extractive summary: {e}")
+        return extractive_summary(previous, messages)
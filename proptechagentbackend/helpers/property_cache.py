@@ -0,0 +1,143 @@
+# helpers/property_cache.py
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from config import Config
+from helpers import metrics, inventory_sync
+
+# Text filters matched case-insensitively by fetch_properties, so case can be folded
+CASE_INSENSITIVE_KEYS = {"property_name", "building_name"}
+# Amenity lists: order, case and the list-vs-comma-string form don't change the result
+SET_KEYS = {"amenities", "any_amenities"}
+
+
+def _normalize_value(key, value):
+    if key in SET_KEYS and isinstance(value, (list, str)):
+        names = value.split(",") if isinstance(value, str) else value
+        return sorted({name.strip().lower() for name in names if isinstance(name, str) and name.strip()})
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float, Decimal)):
+        number = float(value)
+        # 2, 2.0 and Decimal("2.00") should all share one cache entry
+        return int(number) if number.is_integer() else number
+    if isinstance(value, str):
+        value = value.strip()
+        return value.lower() if key in CASE_INSENSITIVE_KEYS else value
+    return value
+
+
+def canonicalize_filters(filter_params: dict) -> str:
+    """
+    Build the cache key for a filter dict: nulls dropped, numbers normalized,
+    keys sorted, compact JSON.
+    """
+    normalized = {
+        key: _normalize_value(key, value)
+        for key, value in filter_params.items()
+        if value is not None
+    }
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class PropertyResultCache:
+    """
+    LRU of serialized fetch_properties results, bounded by total bytes and expired
+    by TTL. It is cleared once a write to properties, buildings or stations commits:
+    straight away for this process's writes, and within INVENTORY_SYNC_CHECK_SECONDS
+    for other processes' (see helpers/inventory_sync.py). The TTL is the backstop.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, serialized)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Bumped on every invalidation. A query started before a write must not
+        # repopulate the cache with what it read.
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str):
+        """Return the serialized result for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, serialized: str, generation: int):
+        """Store a result computed while the cache was at `generation`."""
+        size = len(serialized)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, serialized)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, key: str):
+        _, serialized = self._entries.pop(key)
+        self._bytes -= len(serialized)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+property_cache = PropertyResultCache(Config.PROPERTY_CACHE_MAX_BYTES, Config.PROPERTY_CACHE_TTL_SECONDS)
+
+
+# Monotonic since process start, so exported as counters
+_CACHE_COUNTERS = ("hits", "misses", "evictions", "invalidations")
+
+
+def _cache_metrics():
+    return [
+        (f"property_cache_{name}_total", {}, value, "counter") if name in _CACHE_COUNTERS
+        else (f"property_cache_{name}", {}, value)
+        for name, value in property_cache.stats().items()
+    ]
+
+
+metrics.register_collector(_cache_metrics)
+
+
+@inventory_sync.on_change
+def _invalidate_property_cache(changes):
+    # After commit, not at flush: a search running between the two would otherwise
+    # cache pre-commit rows under the new generation
+    property_cache.clear()
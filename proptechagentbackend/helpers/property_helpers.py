@@ -1,5 +1,43 @@
+import json
+import base64
+import zlib
+from datetime import datetime
+from config import Config
 from database import db
-from models.sql_models import Property, Building
+from models.sql_models import Property, Building, PropertySearchRow
+from helpers.property_index import property_index
+from helpers.building_name_index import building_name_index
+from helpers.geo_index import geo_building_ids
+from helpers.facility_index import facility_building_ids
+from helpers.property_cache import property_cache, canonicalize_filters
+from helpers import inventory_sync
+
+NO_IMAGE_URL = "https://pub-5639854ae5864779be6f398a0fa1c555.r2.dev/noimageyet.jpg"
+
+# Columns the filters apply to, for the base-table join and for the read model
+JOIN_COLUMNS = {
+    "id": Property.id,
+    "bedrooms": Property.bedrooms,
+    "bathrooms": Property.bathrooms,
+    "price": Property.price,
+    "size": Property.size,
+    "distance_to_bts": Building.distance_to_bts,
+    "building_id": Property.building_id,
+    "building_name": Building.name,
+    "property_code": Property.property_code,
+}
+READ_MODEL_COLUMNS = {
+    "id": PropertySearchRow.property_id,
+    "bedrooms": PropertySearchRow.bedrooms,
+    "bathrooms": PropertySearchRow.bathrooms,
+    "price": PropertySearchRow.price,
+    "size": PropertySearchRow.size,
+    "distance_to_bts": PropertySearchRow.distance_to_bts,
+    "building_id": PropertySearchRow.building_id,
+    "building_name": PropertySearchRow.building_name,
+    "property_code": PropertySearchRow.property_code,
+}
+
 
 def fetch_properties(filter_params: dict) -> list:
     """
@@ -18,73 +56,368 @@ def fetch_properties(filter_params: dict) -> list:
           "distance_from_bts": <float>,# Maximum distance from the nearest BTS station in kilometers
           "property_name": <str>,      # Property name search (matches building name)
           "building_name": <str>,      # Building name search,
-          "property_code": <str>       # Unique property code for narrowing the results
+          "property_code": <str>,      # Unique property code for narrowing the results
+          "latitude": <float>,         # Map point (with longitude) for radius / nearest searches
+          "longitude": <float>,
+          "radius_km": <float>,        # Radius around the point or stations (default GEO_DEFAULT_RADIUS_KM)
+          "nearest": <int>,            # Only the N buildings closest to the point
+          "near_station": <str>,       # Station name or code, e.g. "Asok" or "E4"
+          "station_line": <str>,       # Any station on a line or system, e.g. "Sukhumvit" or "BTS"
+          "amenities": [<str>],        # Building has all of these, e.g. ["pool", "gym"]
+          "any_amenities": [<str>]     # Building has at least one of these
         }
     :return: A list of dictionaries, each representing a property.
+    :raises ValueError: if the geo filters are incomplete or out of range, or an amenity
+        filter is not a list of names.
+    """
+    if not Config.PROPERTY_CACHE_ENABLED:
+        return _query_properties(filter_params)
+    return json.loads(fetch_properties_json(filter_params))
+
+
+def fetch_properties_json(filter_params: dict) -> str:
+    """
+    Same as fetch_properties but returns the JSON-encoded list. Callers that only
+    forward the result (e.g. the chat tool) use this so a cache hit costs no
+    decode/encode at all.
+    """
+    if not Config.PROPERTY_CACHE_ENABLED:
+        return _query_properties_json(filter_params)
+
+    inventory_sync.check()
+    key = canonicalize_filters(filter_params)
+    cached = property_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Read the generation before querying so a write that lands mid-query
+    # prevents this (possibly stale) result from being cached
+    generation = property_cache.generation
+    serialized = _query_properties_json(filter_params)
+    property_cache.put(key, serialized, generation)
+    return serialized
+
+
+def _projection_query():
+    """
+    Select only the columns the result dicts need, with the building name resolved
+    in SQL. Rows come back as tuples: no ORM identity map, no lazy loads.
+    """
+    return db.session.query(
+        Property.property_code,
+        db.func.coalesce(db.func.nullif(Property.building_name, ""), Building.name).label("building_name"),
+        Property.bedrooms,
+        Property.bathrooms,
+        Property.price,
+        Property.size,
+        Property.created_at,
+        Property.photo_urls,
+    ).join(Building, Property.building_id == Building.id)
+
+
+def _search_source():
+    """(base query, filter columns) for searches: the read model when enabled, else the join."""
+    if Config.PROPERTY_READ_MODEL_ENABLED:
+        return db.session.query(PropertySearchRow.payload), READ_MODEL_COLUMNS
+    return _projection_query(), JOIN_COLUMNS
+
+
+def _result_dict(row) -> dict:
+    # Read-model rows carry the finished dict; join rows are converted here
+    return json.loads(row.payload) if "payload" in row._fields else row_to_dict(row)
+
+
+def _apply_filters(query, columns: dict, filter_params: dict):
     """
-    query = db.session.query(Property).join(Building, Property.building_id == Building.id)
+    Add the WHERE clauses for one filter set to a projection query.
+    Returns None when the set can't match anything (e.g. an unknown building name),
+    so callers can skip the database entirely.
 
+    :param columns: JOIN_COLUMNS or READ_MODEL_COLUMNS, matching the query.
+    """
+    c = columns
     # Bedrooms range filter
     if "bedrooms" in filter_params:
-        query = query.filter(Property.bedrooms >= filter_params["bedrooms"])
+        query = query.filter(c["bedrooms"] >= filter_params["bedrooms"])
     if "max_bedrooms" in filter_params:
-        query = query.filter(Property.bedrooms <= filter_params["max_bedrooms"])
+        query = query.filter(c["bedrooms"] <= filter_params["max_bedrooms"])
 
     # Bathrooms range filter
     if "bathrooms" in filter_params:
-        query = query.filter(Property.bathrooms >= filter_params["bathrooms"])
+        query = query.filter(c["bathrooms"] >= filter_params["bathrooms"])
     if "max_bathrooms" in filter_params:
-        query = query.filter(Property.bathrooms <= filter_params["max_bathrooms"])
+        query = query.filter(c["bathrooms"] <= filter_params["max_bathrooms"])
 
     # Price range filter
     if "price" in filter_params:
-        query = query.filter(Property.price >= filter_params["price"])
+        query = query.filter(c["price"] >= filter_params["price"])
     if "max_price" in filter_params:
-        query = query.filter(Property.price <= filter_params["max_price"])
+        query = query.filter(c["price"] <= filter_params["max_price"])
 
     # Size (sq_meters) range filter
     if "sq_meters" in filter_params:
-        query = query.filter(Property.size >= filter_params["sq_meters"])
+        query = query.filter(c["size"] >= filter_params["sq_meters"])
     if "max_sq_meters" in filter_params:
-        query = query.filter(Property.size <= filter_params["max_sq_meters"])
+        query = query.filter(c["size"] <= filter_params["max_sq_meters"])
 
     # Distance from BTS filter (assumes a maximum acceptable distance)
     if "distance_from_bts" in filter_params:
-        query = query.filter(Building.distance_to_bts <= filter_params["distance_from_bts"])
-
-    # Filter by property_name (using building name as a proxy)
-    if "property_name" in filter_params:
-        query = query.filter(Building.name.ilike(f"%{filter_params['property_name']}%"))
+        query = query.filter(c["distance_to_bts"] <= filter_params["distance_from_bts"])
 
-    # Filter by building_name directly
-    if "building_name" in filter_params:
-        query = query.filter(Building.name.ilike(f"%{filter_params['building_name']}%"))
+    # Filter by property_name (using building name as a proxy) and by building_name directly
+    for name_key in ("property_name", "building_name"):
+        if name_key not in filter_params:
+            continue
+        if Config.BUILDING_NAME_INDEX_ENABLED:
+            # Resolve the name to building IDs in memory so the query uses building_id
+            # instead of a leading-wildcard ILIKE that scans buildings
+            building_name_index.ensure_loaded()
+            building_ids = building_name_index.match_ids(filter_params[name_key])
+            if not building_ids:
+                return None
+            query = query.filter(c["building_id"].in_(building_ids))
+        else:
+            query = query.filter(c["building_name"].ilike(f"%{filter_params[name_key]}%"))
 
     # Filter by property_code if provided
     if "property_code" in filter_params:
-        query = query.filter(Property.property_code == filter_params["property_code"])
-
-    results = query.all()
-
-    def to_dict(prop: Property) -> dict:
-        no_image_url = "https://pub-5639854ae5864779be6f398a0fa1c555.r2.dev/noimageyet.jpg"
-        images = []
-        if prop.photo_urls:
-            # Ensure photo_urls is a dict (jsonb column should already be a dict)
-            photo_dict = prop.photo_urls if isinstance(prop.photo_urls, dict) else {}
-            # Loop through every key in the photo_urls dict
-            for key, url_list in photo_dict.items():
-                if isinstance(url_list, list):
-                    images.extend([url for url in url_list if url != no_image_url])
-        return {
-            "property_code": prop.property_code,
-            "building_name": prop.building_name or (prop.building.name if prop.building else None),
-            "bedrooms": prop.bedrooms,
-            "bathrooms": prop.bathrooms,
-            "price": float(prop.price) if prop.price is not None else None,
-            "size_sqm": float(prop.size) if prop.size is not None else None,
-            "created_at": prop.created_at.isoformat() if prop.created_at else None,
-            "images": images
-        }
+        query = query.filter(c["property_code"] == filter_params["property_code"])
+
+    # Radius / nearest / near-station filters and amenity filters are resolved to
+    # building IDs in memory by the geo and facility indexes
+    for resolve in (geo_building_ids, facility_building_ids):
+        building_ids = resolve(filter_params)
+        if building_ids is None:
+            continue
+        if not building_ids:
+            return None
+        query = query.filter(c["building_id"].in_(building_ids))
+
+    return query
+
+
+def _query_properties(filter_params: dict) -> list:
+    """Run the filters against the index or the database, bypassing the cache."""
+    if Config.PROPERTY_INDEX_ENABLED:
+        return _fetch_properties_indexed(filter_params)
+
+    query = _apply_filters(*_search_source(), filter_params)
+    if query is None:
+        return []
+    return [_result_dict(row) for row in query]
+
+
+def _query_properties_json(filter_params: dict) -> str:
+    """JSON-encoded _query_properties; read-model payloads are joined as-is, never decoded."""
+    if Config.PROPERTY_READ_MODEL_ENABLED and not Config.PROPERTY_INDEX_ENABLED:
+        query = _apply_filters(*_search_source(), filter_params)
+        if query is None:
+            return "[]"
+        return "[" + ", ".join(row.payload for row in query.order_by(PropertySearchRow.property_id)) + "]"
+    return json.dumps(_query_properties(filter_params))
+
+
+def fetch_properties_batch(filter_sets: list) -> list:
+    """
+    Run several filter sets at once. Returns one result list per filter set, in the
+    same order, each exactly what fetch_properties would return for that set.
+
+    Sets found in the result cache are answered from it; the rest (deduplicated)
+    go to the database together in a single statement.
+
+    :param filter_sets: list of filter dicts (see fetch_properties for the keys).
+    """
+    results = [None] * len(filter_sets)
+
+    # canonical key -> indexes of the sets sharing it, so repeated sets run once
+    pending = {}
+    for i, filter_params in enumerate(filter_sets):
+        pending.setdefault(canonicalize_filters(filter_params), []).append(i)
+
+    if Config.PROPERTY_CACHE_ENABLED:
+        inventory_sync.check()
+    generation = property_cache.generation
+    if Config.PROPERTY_CACHE_ENABLED:
+        for key in list(pending):
+            cached = property_cache.get(key)
+            if cached is not None:
+                for i in pending.pop(key):
+                    results[i] = json.loads(cached)
+
+    keys = list(pending)
+    fetched = _query_properties_batch([filter_sets[pending[key][0]] for key in keys])
+    for key, rows in zip(keys, fetched):
+        if Config.PROPERTY_CACHE_ENABLED:
+            property_cache.put(key, json.dumps(rows), generation)
+        for n, i in enumerate(pending[key]):
+            # Sets sharing a key get their own copies, like separate calls would
+            results[i] = rows if n == 0 else json.loads(json.dumps(rows))
+    return results
+
+
+def _query_properties_batch(filter_sets: list) -> list:
+    """
+    One SELECT per filter set, tagged with a literal set index and combined with
+    UNION ALL, so the whole batch is a single round-trip. Rows are split back per
+    set by that index.
+    """
+    results = [[] for _ in filter_sets]
+    if not filter_sets:
+        return results
+    if Config.PROPERTY_INDEX_ENABLED:
+        return _fetch_properties_indexed_batch(filter_sets)
+
+    queries = []
+    for set_index, filter_params in enumerate(filter_sets):
+        query = _apply_filters(*_search_source(), filter_params)
+        if query is not None:
+            queries.append(query.add_columns(db.literal(set_index).label("set_index")))
+    if not queries:
+        return results
+
+    combined = queries[0].union_all(*queries[1:]) if len(queries) > 1 else queries[0]
+    for row in combined:
+        results[row.set_index].append(_result_dict(row))
+    return results
+
+
+def _fetch_properties_indexed(filter_params: dict) -> list:
+    """
+    Same result as the SQL path, but the filters are evaluated against the in-memory
+    PropertyIndex and only the matching rows are loaded from the database.
+    """
+    property_index.ensure_fresh()
+    ids = property_index.search(filter_params)
+    if len(ids) == 0:
+        return []
+
+    query, columns = _search_source()
+    query = query.filter(columns["id"].in_(ids.tolist())).order_by(columns["id"])
+    return [_result_dict(row) for row in query]
+
+
+def _fetch_properties_indexed_batch(filter_sets: list) -> list:
+    """Index-backed batch: every set is matched in memory, then all rows load in one query."""
+    property_index.ensure_fresh()
+    id_sets = [property_index.search(filter_params) for filter_params in filter_sets]
+    all_ids = sorted({int(i) for ids in id_sets for i in ids})
+    if not all_ids:
+        return [[] for _ in filter_sets]
+
+    query, columns = _search_source()
+    query = query.add_columns(columns["id"].label("id")).filter(columns["id"].in_(all_ids))
+    rows_by_id = {row.id: _result_dict(row) for row in query}
+    return [
+        [dict(rows_by_id[i]) for i in sorted(ids.tolist()) if i in rows_by_id]
+        for ids in id_sets
+    ]
+
+
+# -------------------------------
+# Keyset-paginated listing
+# -------------------------------
+def _filters_fingerprint(filter_params: dict) -> int:
+    return zlib.crc32(canonicalize_filters(filter_params).encode())
+
+
+def encode_filter_cursor(position: dict, filter_params: dict) -> str:
+    """Opaque cursor holding `position`, tied to the filters it was issued for."""
+    payload = dict(position, f=_filters_fingerprint(filter_params))
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+
+def decode_filter_cursor(cursor: str, filter_params: dict):
+    """
+    Return the position stored by encode_filter_cursor, or None if `cursor` can't be read.
+
+    :raises ValueError: if the cursor was issued for different filters.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        fingerprint = payload.pop("f")
+    except Exception:
+        return None
+    if fingerprint != _filters_fingerprint(filter_params):
+        raise ValueError("Cursor was issued for different filters; repeat the request without it")
+    return payload
+
+
+def encode_listing_cursor(created_at, property_id: int, filter_params: dict) -> str:
+    """Opaque cursor for the row after which the next page starts."""
+    return encode_filter_cursor({"t": created_at.isoformat() if created_at else None, "i": property_id},
+                                filter_params)
+
+
+def decode_listing_cursor(cursor: str, filter_params: dict) -> tuple:
+    """
+    Return the (created_at, id) position stored in `cursor`.
+
+    :raises ValueError: if the cursor is malformed or was issued for other filters.
+    """
+    payload = decode_filter_cursor(cursor, filter_params)
+    try:
+        return datetime.fromisoformat(payload["t"]) if payload["t"] else None, int(payload["i"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def iter_property_listing(filter_params: dict, after: tuple = None, limit: int = None, batch_size: int = 500):
+    """
+    Yield (property_dict, (created_at, id)) for every matching property in
+    (created_at, id) order, starting after the `after` position.
+
+    Keyset pagination: each page is an index range scan on (created_at, id) rather
+    than an OFFSET, and rows are pulled from a server-side cursor `batch_size` at a
+    time, so memory stays flat however many rows match. Rows without created_at
+    come first, ordered by id (the NULLS FIRST order), then the dated rows.
+    """
+    remaining = limit
+
+    def run(query):
+        nonlocal remaining
+        if remaining is not None:
+            query = query.limit(remaining)
+        for row in query.yield_per(batch_size):
+            if remaining is not None:
+                remaining -= 1
+            yield row_to_dict(row), (row.created_at, row.id)
+
+    base = _apply_filters(_projection_query().add_columns(Property.id), JOIN_COLUMNS, filter_params)
+    if base is None:
+        return
+
+    # Phase 1: undated rows, only while the cursor hasn't moved past them
+    if after is None or after[0] is None:
+        undated = base.filter(Property.created_at.is_(None))
+        if after is not None:
+            undated = undated.filter(Property.id > after[1])
+        yield from run(undated.order_by(Property.id))
+        if remaining == 0:
+            return
+        after = None
+
+    # Phase 2: dated rows past the cursor
+    dated = base.filter(Property.created_at.isnot(None))
+    if after is not None:
+        dated = dated.filter(db.tuple_(Property.created_at, Property.id) > db.tuple_(after[0], after[1]))
+    yield from run(dated.order_by(Property.created_at, Property.id))
+
 
-    return [to_dict(p) for p in results]
+def row_to_dict(row) -> dict:
+    images = []
+    # Ensure photo_urls is a dict (jsonb column should already be a dict)
+    photo_dict = row.photo_urls if isinstance(row.photo_urls, dict) else {}
+    # Loop through every key in the photo_urls dict
+    for url_list in photo_dict.values():
+        if isinstance(url_list, list):
+            images.extend([url for url in url_list if url != NO_IMAGE_URL])
+    return {
+        "property_code": row.property_code,
+        "building_name": row.building_name,
+        "bedrooms": row.bedrooms,
+        "bathrooms": row.bathrooms,
+        "price": float(row.price) if row.price is not None else None,
+        "size_sqm": float(row.size) if row.size is not None else None,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "images": images
+    }
@@ -0,0 +1,254 @@
+# helpers/property_index.py
+
+import threading
+import time
+import numpy as np
+from config import Config
+from database import db
+from models.sql_models import Property, Building
+from helpers.building_name_index import building_name_index
+from helpers.geo_index import geo_building_ids
+from helpers.facility_index import facility_building_ids
+
+# Range filters answered by the index: filter key -> (column, comparison)
+RANGE_FILTERS = {
+    "bedrooms": ("bedrooms", "min"),
+    "max_bedrooms": ("bedrooms", "max"),
+    "bathrooms": ("bathrooms", "min"),
+    "max_bathrooms": ("bathrooms", "max"),
+    "price": ("price", "min"),
+    "max_price": ("price", "max"),
+    "sq_meters": ("size", "min"),
+    "max_sq_meters": ("size", "max"),
+    "distance_from_bts": ("distance_to_bts", "max"),
+}
+
+NUMERIC_COLUMNS = ("bedrooms", "bathrooms", "price", "size", "distance_to_bts")
+
+
+class _Snapshot:
+    """
+    Immutable set of column arrays. Searches grab a reference to the current
+    snapshot, so a refresh can swap in a new one without locking readers out.
+    NULLs are stored as NaN, which makes every comparison False, matching SQL.
+    """
+
+    def __init__(self, ids, building_ids, columns, codes, building_names, watermark):
+        self.ids = ids
+        self.building_ids = building_ids
+        self.columns = columns              # name -> float64 array
+        self.codes = codes                  # property_code -> row position
+        self.building_names = building_names  # building_id -> lower-cased name
+        self.watermark = watermark          # (updated_at, id) of the most recently changed row loaded
+        self.positions = {int(pid): pos for pos, pid in enumerate(ids)}
+
+
+def _to_float(value):
+    return float(value) if value is not None else np.nan
+
+
+class PropertyIndex:
+    """
+    Holds the filterable property columns as NumPy arrays and answers the
+    fetch_properties filter dict with vectorized boolean masks.
+
+    Refresh strategy:
+      - load() does a full reload (at startup and every PROPERTY_INDEX_FULL_RELOAD_SECONDS)
+      - refresh() pulls only rows past the (updated_at, id) watermark, so new rows and
+        edits to existing ones both show up within PROPERTY_INDEX_REFRESH_SECONDS
+    Rows with no updated_at, deleted rows and edits to building distances are picked up
+    by the next full reload. Only one load/refresh runs at a time.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.RLock()
+        self._last_refresh = 0.0
+        self._last_full_reload = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def _query_rows(self, watermark=None):
+        query = db.session.query(
+            Property.id,
+            Property.building_id,
+            Property.property_code,
+            Property.updated_at,
+            Property.bedrooms,
+            Property.bathrooms,
+            Property.price,
+            Property.size,
+            Building.distance_to_bts,
+        ).join(Building, Property.building_id == Building.id)
+        if watermark is not None:
+            # NULL updated_at never compares true, so those rows are left to the full reload
+            updated_at, last_id = watermark
+            query = query.filter(db.or_(
+                Property.updated_at > updated_at,
+                db.and_(Property.updated_at == updated_at, Property.id > last_id),
+            ))
+        return query.order_by(Property.id).all()
+
+    @staticmethod
+    def _load_building_names() -> dict:
+        return {row.id: row.name.lower() for row in db.session.query(Building.id, Building.name)}
+
+    @staticmethod
+    def _watermark(rows, previous=None):
+        # Rows without updated_at must not pull the watermark back to the start of time
+        # (every refresh would then re-read the whole table)
+        stamped = [(r.updated_at, r.id) for r in rows if r.updated_at is not None]
+        if previous is not None:
+            stamped.append(previous)
+        return max(stamped) if stamped else None
+
+    def load(self):
+        """Full reload from the database. Needs an app context."""
+        with self._load_lock:
+            self._load()
+
+    def _load(self):
+        rows = self._query_rows()
+        snapshot = _Snapshot(
+            ids=np.fromiter((r.id for r in rows), dtype=np.int64, count=len(rows)),
+            building_ids=np.fromiter((r.building_id for r in rows), dtype=np.int64, count=len(rows)),
+            columns={
+                col: np.fromiter((_to_float(getattr(r, col)) for r in rows), dtype=np.float64, count=len(rows))
+                for col in NUMERIC_COLUMNS
+            },
+            codes={r.property_code: pos for pos, r in enumerate(rows)},
+            building_names=self._load_building_names(),
+            watermark=self._watermark(rows),
+        )
+        with self._lock:
+            self._snapshot = snapshot
+            self._last_refresh = self._last_full_reload = time.monotonic()
+        print(f"[LOG] Property index loaded: {len(rows)} rows")
+
+    def refresh(self):
+        """Apply rows created or updated since the last load/refresh. Needs an app context."""
+        with self._load_lock:
+            self._refresh()
+
+    def _refresh(self):
+        current = self._snapshot
+        if current is None:
+            return self._load()
+        if current.watermark is None:
+            # Nothing with an updated_at was loaded; only a full reload can tell what changed
+            return self._load()
+
+        rows = self._query_rows(current.watermark)
+        if not rows:
+            self._last_refresh = time.monotonic()
+            return
+
+        ids = current.ids.copy()
+        building_ids = current.building_ids.copy()
+        columns = {col: arr.copy() for col, arr in current.columns.items()}
+        codes = dict(current.codes)
+
+        # Rows already in the index (edited since they were loaded) are overwritten in place
+        new_rows = []
+        for r in rows:
+            pos = current.positions.get(r.id)
+            if pos is None:
+                new_rows.append(r)
+                continue
+            building_ids[pos] = r.building_id
+            for col in NUMERIC_COLUMNS:
+                columns[col][pos] = _to_float(getattr(r, col))
+            codes[r.property_code] = pos
+
+        start = len(ids)
+        if new_rows:
+            ids = np.concatenate([ids, np.fromiter((r.id for r in new_rows), dtype=np.int64)])
+            building_ids = np.concatenate([building_ids, np.fromiter((r.building_id for r in new_rows), dtype=np.int64)])
+            for col in NUMERIC_COLUMNS:
+                columns[col] = np.concatenate([
+                    columns[col], np.fromiter((_to_float(getattr(r, col)) for r in new_rows), dtype=np.float64)
+                ])
+            for offset, r in enumerate(new_rows):
+                codes[r.property_code] = start + offset
+
+        building_names = current.building_names
+        if any(r.building_id not in building_names for r in new_rows):
+            building_names = self._load_building_names()
+
+        snapshot = _Snapshot(ids, building_ids, columns, codes, building_names,
+                             self._watermark(rows, current.watermark))
+        with self._lock:
+            self._snapshot = snapshot
+            self._last_refresh = time.monotonic()
+
+    def _due(self):
+        now = time.monotonic()
+        if self._snapshot is None or now - self._last_full_reload >= Config.PROPERTY_INDEX_FULL_RELOAD_SECONDS:
+            return self._load
+        if now - self._last_refresh >= Config.PROPERTY_INDEX_REFRESH_SECONDS:
+            return self._refresh
+        return None
+
+    def ensure_fresh(self):
+        """Run whichever refresh is due. Cheap to call on every search."""
+        if self._due() is None:
+            return
+        with self._load_lock:
+            # Re-check: another thread may have done it while this one waited for the lock
+            due = self._due()
+            if due is not None:
+                due()
+
+    def _match_building_ids(self, snapshot, name: str) -> np.ndarray:
+        if Config.BUILDING_NAME_INDEX_ENABLED:
+            building_name_index.ensure_loaded()
+            return np.array(building_name_index.match_ids(name), dtype=np.int64)
+        needle = name.lower()
+        return np.fromiter(
+            (bid for bid, bname in snapshot.building_names.items() if needle in bname),
+            dtype=np.int64,
+        )
+
+    def search(self, filter_params: dict) -> np.ndarray:
+        """
+        Return the property IDs matching `filter_params` (same keys as fetch_properties).
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise RuntimeError("Property index is not loaded")
+
+        mask = np.ones(len(snapshot.ids), dtype=bool)
+
+        for key, (col, op) in RANGE_FILTERS.items():
+            if key not in filter_params:
+                continue
+            values = snapshot.columns[col]
+            if op == "min":
+                mask &= values >= filter_params[key]
+            else:
+                mask &= values <= filter_params[key]
+
+        for key in ("property_name", "building_name"):
+            if key in filter_params:
+                mask &= np.isin(snapshot.building_ids, self._match_building_ids(snapshot, filter_params[key]))
+
+        if "property_code" in filter_params:
+            pos = snapshot.codes.get(filter_params["property_code"])
+            code_mask = np.zeros(len(snapshot.ids), dtype=bool)
+            if pos is not None:
+                code_mask[pos] = True
+            mask &= code_mask
+
+        for resolve in (geo_building_ids, facility_building_ids):
+            building_ids = resolve(filter_params)
+            if building_ids is not None:
+                mask &= np.isin(snapshot.building_ids, np.array(building_ids, dtype=np.int64))
+
+        return snapshot.ids[mask]
+
+
+# Process-wide index used by fetch_properties when Config.PROPERTY_INDEX_ENABLED is set
+property_index = PropertyIndex()
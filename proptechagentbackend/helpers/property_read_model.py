@@ -0,0 +1,292 @@
+# helpers/property_read_model.py
+#
+# Maintains the property_search read model (models.sql_models.PropertySearchRow):
+# one flattened row per property with the building fields copied in and the
+# fetch_properties result dict stored ready-made, so searches read one table and
+# return the stored JSON without a join or per-row Python work.
+#
+# Kept in sync two ways:
+#   - ORM writes: mapper events collect the touched property/building ids per
+#     session, and after each flush those rows are rebuilt in the same transaction
+#   - Everything else (bulk statements, raw SQL, a fresh deploy):
+#       flask --app main read-model rebuild
+#       flask --app main read-model check [--repair]
+#
+# Both are no-ops unless PROPERTY_READ_MODEL_ENABLED is set.
+
+import json
+from datetime import datetime
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, select, delete
+from sqlalchemy.orm import Session, object_session
+from config import Config
+from database import db
+from models.sql_models import Building, Property, PropertySearchRow
+from helpers.property_helpers import row_to_dict
+
+# Columns compared by the consistency check (everything but refreshed_at)
+RECORD_COLUMNS = (
+    "property_id", "property_code", "building_id", "building_name", "bedrooms", "bathrooms",
+    "price", "size", "distance_to_bts", "distance_to_mrt", "facilities", "images", "image_count",
+    "created_at", "payload",
+)
+
+REFRESH_CHUNK_SIZE = 500
+
+_table = PropertySearchRow.__table__
+
+
+def _source_select():
+    """The join the read model flattens: property columns plus its building's."""
+    return select(
+        Property.id,
+        Property.building_id,
+        Property.property_code,
+        db.func.coalesce(db.func.nullif(Property.building_name, ""), Building.name).label("building_name"),
+        Building.name.label("building_real_name"),
+        Property.bedrooms,
+        Property.bathrooms,
+        Property.price,
+        Property.size,
+        Property.created_at,
+        Property.photo_urls,
+        Building.distance_to_bts,
+        Building.distance_to_mrt,
+        Building.facilities,
+    ).join(Building, Property.building_id == Building.id)
+
+
+def build_record(row) -> dict:
+    """property_search row for one _source_select() row."""
+    result = row_to_dict(row)
+    return {
+        "property_id": row.id,
+        "property_code": row.property_code,
+        "building_id": row.building_id,
+        "building_name": row.building_real_name,
+        "bedrooms": row.bedrooms,
+        "bathrooms": row.bathrooms,
+        "price": row.price,
+        "size": row.size,
+        "distance_to_bts": row.distance_to_bts,
+        "distance_to_mrt": row.distance_to_mrt,
+        "facilities": row.facilities,
+        "images": result["images"],
+        "image_count": len(result["images"]),
+        "created_at": row.created_at,
+        "payload": json.dumps(result),
+    }
+
+
+def _upsert(connection, records: list):
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(_table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["property_id"],
+        set_={key: stmt.excluded[key] for key in RECORD_COLUMNS + ("refreshed_at",) if key != "property_id"}
+    )
+    connection.execute(stmt, records)
+
+
+def _refresh_where(connection, condition) -> set:
+    """Rebuild the rows for every property matching `condition`; returns the ids written."""
+    now = datetime.utcnow()
+    records = [dict(build_record(row), refreshed_at=now)
+               for row in connection.execute(_source_select().where(condition))]
+    if records:
+        _upsert(connection, records)
+    return {record["property_id"] for record in records}
+
+
+def refresh_properties(connection, property_ids) -> int:
+    """Rebuild the rows of these properties; ids that no longer exist are removed."""
+    property_ids = sorted(set(property_ids))
+    written = 0
+    for start in range(0, len(property_ids), REFRESH_CHUNK_SIZE):
+        chunk = property_ids[start:start + REFRESH_CHUNK_SIZE]
+        found = _refresh_where(connection, Property.id.in_(chunk))
+        gone = [pid for pid in chunk if pid not in found]
+        if gone:
+            connection.execute(delete(_table).where(_table.c.property_id.in_(gone)))
+        written += len(found)
+    return written
+
+
+def refresh_by_codes(connection, property_codes) -> int:
+    """Rebuild the rows of the properties with these codes (the bulk importer's key)."""
+    property_codes = sorted(set(property_codes))
+    written = 0
+    for start in range(0, len(property_codes), REFRESH_CHUNK_SIZE):
+        chunk = property_codes[start:start + REFRESH_CHUNK_SIZE]
+        written += len(_refresh_where(connection, Property.property_code.in_(chunk)))
+    return written
+
+
+def refresh_buildings(connection, building_ids) -> int:
+    """Rebuild the rows of every property in these buildings (name, distances, facilities changed)."""
+    building_ids = sorted(set(building_ids))
+    written = 0
+    for start in range(0, len(building_ids), REFRESH_CHUNK_SIZE):
+        chunk = building_ids[start:start + REFRESH_CHUNK_SIZE]
+        written += len(_refresh_where(connection, Property.building_id.in_(chunk)))
+    return written
+
+
+def rebuild(batch_size: int = 2000, progress=None) -> dict:
+    """
+    Rebuild the whole read model from the base tables, `batch_size` properties per
+    transaction (keyset on id), then drop rows whose property is gone. Needs an app context.
+    """
+    written, last_id = 0, 0
+    while True:
+        ids = db.session.execute(
+            select(Property.id).where(Property.id > last_id).order_by(Property.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        written += refresh_properties(db.session.connection(), ids)
+        db.session.commit()
+        last_id = ids[-1]
+        if progress:
+            progress(written)
+
+    orphans = db.session.execute(
+        delete(_table).where(~_table.c.property_id.in_(select(Property.id)))
+    ).rowcount
+    db.session.commit()
+    return {"written": written, "orphans_removed": orphans}
+
+
+def check_consistency(repair: bool = False, batch_size: int = 2000, sample_size: int = 10) -> dict:
+    """
+    Compare the read model with what the base tables say it should hold.
+
+    :return: {"checked", "missing", "stale", "orphans", "samples": {...}, "repaired"};
+             missing/stale/orphans are counts, samples keeps the first few property ids of each.
+    """
+    report = {"checked": 0, "missing": 0, "stale": 0, "orphans": 0,
+              "samples": {"missing": [], "stale": [], "orphans": []}, "repaired": False}
+    to_refresh = []
+
+    def note(kind, property_id):
+        report[kind] += 1
+        if len(report["samples"][kind]) < sample_size:
+            report["samples"][kind].append(property_id)
+
+    columns = [_table.c[name] for name in RECORD_COLUMNS]
+    last_id = 0
+    while True:
+        expected = {
+            row.id: build_record(row)
+            for row in db.session.execute(
+                _source_select().where(Property.id > last_id).order_by(Property.id).limit(batch_size)
+            )
+        }
+        if not expected:
+            break
+        stored = {
+            row.property_id: row._asdict()
+            for row in db.session.execute(select(*columns).where(_table.c.property_id.in_(list(expected))))
+        }
+        for property_id, record in expected.items():
+            report["checked"] += 1
+            if property_id not in stored:
+                note("missing", property_id)
+                to_refresh.append(property_id)
+            elif stored[property_id] != record:
+                note("stale", property_id)
+                to_refresh.append(property_id)
+        last_id = max(expected)
+
+    # Rows whose property is gone (or whose building no longer exists)
+    orphan_ids = db.session.execute(
+        select(_table.c.property_id).where(~_table.c.property_id.in_(_source_select().with_only_columns(Property.id)))
+    ).scalars().all()
+    for property_id in orphan_ids:
+        note("orphans", property_id)
+
+    if repair and (to_refresh or orphan_ids):
+        refresh_properties(db.session.connection(), to_refresh + orphan_ids)
+        db.session.commit()
+        report["repaired"] = True
+    return report
+
+
+# --- Event-driven sync ---------------------------------------------------------
+
+def _record_property(mapper, connection, target):
+    session = object_session(target)
+    if Config.PROPERTY_READ_MODEL_ENABLED and session is not None:
+        session.info.setdefault("read_model_property_ids", set()).add(target.id)
+
+
+def _record_building(mapper, connection, target):
+    session = object_session(target)
+    if Config.PROPERTY_READ_MODEL_ENABLED and session is not None:
+        session.info.setdefault("read_model_building_ids", set()).add(target.id)
+
+
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Property, _event_name, _record_property)
+# A new building has no properties yet, and deleting one with properties fails on
+# the foreign key, so only updates matter
+event.listen(Building, "after_update", _record_building)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _sync_after_flush(session, flush_context):
+    # Same connection and transaction as the flush, so the read model commits
+    # (or rolls back) together with the change
+    property_ids = session.info.pop("read_model_property_ids", None)
+    building_ids = session.info.pop("read_model_building_ids", None)
+    if not (property_ids or building_ids):
+        return
+    connection = session.connection()
+    if building_ids:
+        refresh_buildings(connection, building_ids)
+    if property_ids:
+        refresh_properties(connection, property_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop("read_model_property_ids", None)
+    session.info.pop("read_model_building_ids", None)
+
+
+# --- CLI ------------------------------------------------------------------------
+
+@click.group("read-model")
+def read_model_cli():
+    """Maintain the property_search read model."""
+
+
+@read_model_cli.command("rebuild")
+@click.option("--batch-size", type=int, default=2000, show_default=True)
+@with_appcontext
+def rebuild_command(batch_size):
+    """Rebuild every property_search row from the base tables."""
+    PropertySearchRow.__table__.create(db.engine, checkfirst=True)
+    stats = rebuild(batch_size, progress=lambda written: print(f"[LOG] {written} rows written"))
+    print(f"[LOG] Read model rebuilt: {stats['written']} rows, {stats['orphans_removed']} orphans removed")
+
+
+@read_model_cli.command("check")
+@click.option("--repair", is_flag=True, help="Rebuild missing and stale rows and drop orphans.")
+@with_appcontext
+def check_command(repair):
+    """Report rows missing from, stale in, or orphaned in the read model."""
+    report = check_consistency(repair=repair)
+    print(f"[LOG] Checked {report['checked']} properties: {report['missing']} missing, "
+          f"{report['stale']} stale, {report['orphans']} orphans")
+    for kind, ids in report["samples"].items():
+        if ids:
+            print(f"[ERR] {kind}: {ids}")
+    if report["repaired"]:
+        print("[LOG] Repaired")
+    elif report["missing"] or report["stale"] or report["orphans"]:
+        raise SystemExit(1)
@@ -0,0 +1,139 @@
+# helpers/response_compression.py
+#
+# gzip / brotli response compression negotiated from Accept-Encoding. Brotli is used
+# when the brotli package is installed and the client accepts it, gzip otherwise.
+# Bodies under RESPONSE_COMPRESSION_MIN_BYTES go out as they are: below roughly a
+# packet the CPU costs more than the bytes saved. Streamed JSON (GET /properties)
+# is compressed chunk by chunk with a sync flush after each, so it still streams;
+# Server-Sent Events are never compressed, each event must reach the client at once.
+
+import gzip
+import zlib
+from flask import request
+from config import Config
+from helpers import metrics
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/html", "text/plain", "text/csv", "application/javascript")
+
+
+def supported_encodings() -> tuple:
+    """Encodings this process can produce, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str):
+    """
+    Pick "br" or "gzip" from an Accept-Encoding header, honouring q-values
+    ("gzip;q=0" refuses gzip, "*" stands for anything not listed). None = identity.
+    """
+    weights = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=Config.RESPONSE_COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=Config.RESPONSE_COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def compress_body(body: bytes, accept_encoding: str):
+    """
+    (body, encoding) for a complete response body: compressed when the client
+    accepts an encoding, the body is over the threshold and compression actually
+    shrinks it; otherwise the body unchanged and None.
+    """
+    if not Config.RESPONSE_COMPRESSION_ENABLED or len(body) < Config.RESPONSE_COMPRESSION_MIN_BYTES:
+        return body, None
+    encoding = negotiate(accept_encoding)
+    if encoding is None:
+        return body, None
+    compressed = compress(body, encoding)
+    if len(compressed) >= len(body):
+        return body, None
+    metrics.inc("http_response_bytes_total", len(body), stage="raw")
+    metrics.inc("http_response_bytes_total", len(compressed), stage="wire")
+    return compressed, encoding
+
+
+def _compressor(encoding: str):
+    """(feed, finish) pair for streaming: feed(bytes) -> bytes flushed so far, finish() -> trailer."""
+    if encoding == "br":
+        c = brotli.Compressor(quality=Config.RESPONSE_COMPRESSION_BROTLI_QUALITY)
+        return (lambda data: c.process(data) + c.flush()), c.finish
+    # wbits=31: zlib stream with a gzip header and trailer
+    c = zlib.compressobj(Config.RESPONSE_COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return (lambda data: c.compress(data) + c.flush(zlib.Z_SYNC_FLUSH)), c.flush
+
+
+def _iter_compressed(chunks, encoding: str, charset: str = "utf-8"):
+    feed, finish = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode(charset)
+            if chunk:
+                yield feed(chunk)
+        yield finish()
+    finally:
+        # Closing the original iterable runs its cleanup (e.g. the listing's server-side cursor)
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def _compressible(response) -> bool:
+    if response.status_code < 200 or response.status_code in (204, 206, 304) or request.method == "HEAD":
+        return False
+    if "Content-Encoding" in response.headers or "no-transform" in response.headers.get("Cache-Control", ""):
+        return False
+    return response.mimetype in COMPRESSIBLE_TYPES
+
+
+def compress_response(response):
+    """after_request hook: compress the response when the client and the payload allow it."""
+    if not Config.RESPONSE_COMPRESSION_ENABLED or not _compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    accept_encoding = request.headers.get("Accept-Encoding", "")
+
+    if response.is_streamed:
+        encoding = negotiate(accept_encoding)
+        if encoding is None:
+            return response
+        response.response = _iter_compressed(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    body, encoding = compress_body(response.get_data(), accept_encoding)
+    if encoding is not None:
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def install_compression(app):
+    app.after_request(compress_response)
@@ -0,0 +1,11 @@
+# helpers/sse_helpers.py
+
+import json
+
+
+def format_sse(event: str, data) -> str:
+    """
+    Format a single Server-Sent Event. `data` is JSON encoded so multi-line
+    content never breaks the event framing.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
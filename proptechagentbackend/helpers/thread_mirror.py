@@ -0,0 +1,130 @@
+# helpers/thread_mirror.py
+
+import threading
+from collections import OrderedDict
+
+
+def _message_text(message) -> str:
+    """First text block of an Assistants API message, or "" for non-text content."""
+    for block in getattr(message, "content", None) or []:
+        text = getattr(block, "text", None)
+        if text is not None:
+            return text.value
+    return ""
+
+
+class ThreadMirror:
+    """
+    Local copy of Assistants API thread messages, oldest first.
+
+    sync() lists only messages created after the last one seen (cursor-based
+    listing with order="asc"), so each turn fetches just that turn's messages
+    instead of the whole thread. The cursor stops before the first message that
+    was not yet finished when it was listed, so its final text is fetched again
+    on the next sync. Listed messages are merged by id under the lock, so
+    concurrent syncs of one thread can't duplicate them. Threads are kept in an
+    LRU; an evicted or unknown thread is rebuilt from the start on its next sync.
+    """
+
+    PAGE_SIZE = 100
+    # Message statuses whose content can still change
+    OPEN_STATUSES = ("in_progress",)
+
+    def __init__(self, client, max_threads: int):
+        self.client = client
+        self.max_threads = max_threads
+        self._threads = OrderedDict()  # thread_id -> list of {"id", "role", "text", "status"}
+        self._lock = threading.Lock()
+
+    def _messages(self, thread_id: str) -> list:
+        # Caller holds the lock
+        messages = self._threads.get(thread_id)
+        if messages is None:
+            messages = self._threads[thread_id] = []
+        self._threads.move_to_end(thread_id)
+        while len(self._threads) > self.max_threads:
+            self._threads.popitem(last=False)
+        return messages
+
+    def _cursor(self, thread_id: str):
+        """ID of the last message before the first one that may still change."""
+        with self._lock:
+            after = None
+            for message in self._messages(thread_id):
+                if message["status"] in self.OPEN_STATUSES:
+                    break
+                after = message["id"]
+            return after
+
+    def _merge(self, thread_id: str, listed: list):
+        with self._lock:
+            messages = self._messages(thread_id)
+            positions = {message["id"]: pos for pos, message in enumerate(messages)}
+            for message in listed:
+                entry = {
+                    "id": message.id,
+                    "role": message.role,
+                    "text": _message_text(message),
+                    "status": getattr(message, "status", None),
+                }
+                pos = positions.get(message.id)
+                if pos is None:
+                    positions[message.id] = len(messages)
+                    messages.append(entry)
+                else:
+                    messages[pos] = entry
+
+    def _snapshot(self, thread_id: str) -> list:
+        with self._lock:
+            return list(self._messages(thread_id))
+
+    def _list_kwargs(self, thread_id: str, after) -> dict:
+        kwargs = {"thread_id": thread_id, "order": "asc", "limit": self.PAGE_SIZE}
+        if after:
+            kwargs["after"] = after
+        return kwargs
+
+    @staticmethod
+    def _next_page(page):
+        """`after` for the next page, or None when this was the last one."""
+        if not page.data or not getattr(page, "has_more", False):
+            return None
+        return page.data[-1].id
+
+    def sync(self, thread_id: str) -> list:
+        """Fetch messages newer than the last mirrored one and return the full mirror."""
+        after = self._cursor(thread_id)
+        while True:
+            page = self.client.beta.threads.messages.list(**self._list_kwargs(thread_id, after))
+            self._merge(thread_id, page.data)
+            after = self._next_page(page)
+            if after is None:
+                return self._snapshot(thread_id)
+
+    async def sync_async(self, async_client, thread_id: str) -> list:
+        """sync() for an AsyncOpenAI client; shares the same mirror."""
+        after = self._cursor(thread_id)
+        while True:
+            page = await async_client.beta.threads.messages.list(**self._list_kwargs(thread_id, after))
+            self._merge(thread_id, page.data)
+            after = self._next_page(page)
+            if after is None:
+                return self._snapshot(thread_id)
+
+    @staticmethod
+    def _latest_assistant(messages: list):
+        for message in reversed(messages):
+            if message["role"] == "assistant":
+                return message["text"]
+        return None
+
+    def latest_assistant_text(self, thread_id: str):
+        """Sync, then return the newest assistant message's text (or None)."""
+        return self._latest_assistant(self.sync(thread_id))
+
+    async def latest_assistant_text_async(self, async_client, thread_id: str):
+        return self._latest_assistant(await self.sync_async(async_client, thread_id))
+
+    def forget(self, thread_id: str):
+        with self._lock:
+            self._threads.pop(thread_id, None)
@@ -0,0 +1,124 @@
+# helpers/tool_executor.py
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import current_app
+from config import Config
+from helpers.chat_tools import execute_tool_call, execute_fetch_properties_batch
+from helpers import metrics
+
+# Shared pool for tool calls. Each task runs inside its own app context, so
+# flask_sqlalchemy hands it a separate DB session that is removed when it finishes.
+_executor = ThreadPoolExecutor(max_workers=Config.TOOL_MAX_WORKERS, thread_name_prefix="tool")
+
+
+def _run_one(app, tool_call: dict) -> dict:
+    func_name = tool_call["function"]["name"]
+    with app.app_context(), metrics.span("tool_execution", tool=func_name):
+        try:
+            content = execute_tool_call(func_name, tool_call["function"]["arguments"])
+            return {"id": tool_call["id"], "name": func_name, "ok": True, "content": content}
+        except ValueError as tool_err:
+            return {"id": tool_call["id"], "name": func_name, "ok": False, "content": str(tool_err)}
+
+
+def _work_units(tool_calls: list) -> list:
+    """
+    Group the calls into units of work (lists of indexes). Several fetch_properties
+    calls in one turn become a single batched search (one SQL round-trip); every
+    other call is a unit of its own.
+    """
+    fetch_indexes = [i for i, tc in enumerate(tool_calls) if tc["function"]["name"] == "fetch_properties"]
+    if len(fetch_indexes) < 2:
+        return [[i] for i in range(len(tool_calls))]
+    return [fetch_indexes] + [[i] for i in range(len(tool_calls)) if i not in fetch_indexes]
+
+
+def _run_unit(app, tool_calls: list, indexes: list) -> list:
+    """Run one unit of work and return its [(index, result)] pairs."""
+    if len(indexes) == 1:
+        return [(indexes[0], _run_one(app, tool_calls[indexes[0]]))]
+
+    with app.app_context(), metrics.span("tool_execution", tool="fetch_properties_batch"):
+        outcomes = execute_fetch_properties_batch([tool_calls[i]["function"]["arguments"] for i in indexes])
+    return [
+        (i, {"id": tool_calls[i]["id"], "name": "fetch_properties", "ok": ok, "content": content})
+        for i, (ok, content) in zip(indexes, outcomes)
+    ]
+
+
+def iter_tool_results(tool_calls: list):
+    """
+    Dispatch every tool call of one assistant turn at once and yield
+    (index, result) pairs as they complete. Each result is a dict with
+    "id", "name", "ok" and "content".
+
+    :param tool_calls: assistant tool calls as dicts ({"id", "type", "function": {"name", "arguments"}}).
+    """
+    app = current_app._get_current_object()
+    units = _work_units(tool_calls)
+
+    # No point paying for a thread hop when there is nothing to overlap
+    if len(units) == 1:
+        yield from _run_unit(app, tool_calls, units[0])
+        return
+
+    # Each task runs in a copy of the caller's context so its spans keep the request's
+    # endpoint label and sampling decision
+    futures = [
+        _executor.submit(contextvars.copy_context().run, _run_unit, app, tool_calls, unit)
+        for unit in units
+    ]
+    for future in as_completed(futures):
+        yield from future.result()
+
+
+def tool_messages(tool_calls: list, results: dict) -> list:
+    """Build the `tool` role messages, in the same order as the tool calls."""
+    return [
+        {"role": "tool", "tool_call_id": tc["id"], "content": results[i]["content"]}
+        for i, tc in enumerate(tool_calls)
+    ]
+
+
+def execute_tool_calls(tool_calls: list) -> list:
+    """Run all tool calls in parallel and return their `tool` messages in call order."""
+    results = dict(iter_tool_results(tool_calls))
+    return tool_messages(tool_calls, results)
+
+
+# --- asyncio entry points (ASGI mode) ---
+
+def _in_app_context(app, fn, args):
+    with app.app_context():
+        return fn(*args)
+
+
+async def offload(app, fn, *args):
+    """
+    Run a blocking call (DB access, SQL conversation store) on the shared pool inside
+    an app context, so the event loop never blocks on it.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, contextvars.copy_context().run, _in_app_context, app, fn, args
+    )
+
+
+async def iter_tool_results_async(app, tool_calls: list):
+    """Async counterpart of iter_tool_results: yields (index, result) as each call completes."""
+    loop = asyncio.get_running_loop()
+    pending = [
+        loop.run_in_executor(_executor, contextvars.copy_context().run, _run_unit, app, tool_calls, unit)
+        for unit in _work_units(tool_calls)
+    ]
+    for next_done in asyncio.as_completed(pending):
+        for pair in await next_done:
+            yield pair
+
+
+async def execute_tool_calls_async(app, tool_calls: list) -> list:
+    """Async counterpart of execute_tool_calls."""
+    results = {index: result async for index, result in iter_tool_results_async(app, tool_calls)}
+    return tool_messages(tool_calls, results)
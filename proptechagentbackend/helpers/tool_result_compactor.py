@@ -0,0 +1,116 @@
+# helpers/tool_result_compactor.py
+
+import json
+from config import Config
+from helpers.property_helpers import encode_filter_cursor, decode_filter_cursor
+
+# Result field -> (min filter key, max filter key) used for ranking
+RANK_DIMENSIONS = {
+    "bedrooms": ("bedrooms", "max_bedrooms"),
+    "bathrooms": ("bathrooms", "max_bathrooms"),
+    "price": ("price", "max_price"),
+    "size_sqm": ("sq_meters", "max_sq_meters"),
+}
+
+COLUMNS = ["property_code", "building_name", "bedrooms", "bathrooms", "price", "size_sqm", "image_count", "thumbnail"]
+
+# Rough chars-per-token ratio for JSON; good enough to keep the prompt bounded
+CHARS_PER_TOKEN = 4
+
+
+def encode_cursor(offset: int, filter_params: dict) -> str:
+    return encode_filter_cursor({"o": offset}, filter_params)
+
+
+def decode_cursor(cursor, filter_params: dict) -> int:
+    """
+    Return the offset stored in `cursor`; anything unreadable starts from the top.
+
+    :raises ValueError: if the cursor was issued for different filters, whose
+        ranking the offset does not apply to.
+    """
+    if not cursor:
+        return 0
+    payload = decode_filter_cursor(cursor, filter_params)
+    try:
+        return max(int(payload["o"]), 0)
+    except Exception:
+        return 0
+
+
+def _targets(filter_params: dict) -> dict:
+    """
+    The value each ranked field should ideally have: the midpoint when both bounds
+    are given, otherwise the single bound.
+    """
+    targets = {}
+    for field, (min_key, max_key) in RANK_DIMENSIONS.items():
+        low, high = filter_params.get(min_key), filter_params.get(max_key)
+        if low is not None and high is not None:
+            targets[field] = (low + high) / 2
+        elif low is not None or high is not None:
+            targets[field] = low if low is not None else high
+    return targets
+
+
+def _distance(row: dict, targets: dict) -> float:
+    total = 0.0
+    for field, target in targets.items():
+        value = row.get(field)
+        if value is None:
+            total += 1.0
+            continue
+        # Relative distance so price (tens of thousands) doesn't drown out bedrooms
+        total += abs(value - target) / max(abs(target), 1.0)
+    return total
+
+
+def _compact_row(row: dict) -> list:
+    images = row.get("images") or []
+    return [
+        row.get("property_code"),
+        row.get("building_name"),
+        row.get("bedrooms"),
+        row.get("bathrooms"),
+        row.get("price"),
+        row.get("size_sqm"),
+        len(images),
+        images[0] if images else None,
+    ]
+
+
+def compact_property_results(results: list, filter_params: dict, cursor=None) -> dict:
+    """
+    Turn a full fetch_properties result into what the model actually needs:
+    rows ranked by closeness to the requested filters, one page capped by
+    TOOL_RESULT_TOP_K and TOOL_RESULT_TOKEN_BUDGET, images reduced to a count and
+    a thumbnail, encoded as columns + rows. `next_cursor` fetches the next page.
+
+    :raises ValueError: if `cursor` was issued for different filters.
+    """
+    targets = _targets(filter_params)
+    # The query has no ORDER BY, so ties (and the unranked case) are broken on
+    # property_code: the same filters must give the same order on every page
+    ranked = sorted(results, key=lambda row: (_distance(row, targets), row.get("property_code") or ""))
+
+    offset = decode_cursor(cursor, filter_params)
+    budget_chars = Config.TOOL_RESULT_TOKEN_BUDGET * CHARS_PER_TOKEN
+    rows = []
+    used_chars = 0
+    for row in ranked[offset:offset + Config.TOOL_RESULT_TOP_K]:
+        compact = _compact_row(row)
+        size = len(json.dumps(compact, separators=(",", ":")))
+        # Always return at least one row so paging makes progress
+        if rows and used_chars + size > budget_chars:
+            break
+        rows.append(compact)
+        used_chars += size
+
+    next_offset = offset + len(rows)
+    return {
+        "total": len(results),
+        "offset": offset,
+        "columns": COLUMNS,
+        "rows": rows,
+        "next_cursor": encode_cursor(next_offset, filter_params) if next_offset < len(results) else None,
+    }
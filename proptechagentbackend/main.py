@@ -1,9 +1,11 @@
 # main.py (or wherever you have your Flask entry point)
 
-from flask import g
+from flask import g, request
 from create_app import create_app
-from database.session import ScopedSession
-from datetime import datetime
+from config import Config
+from helpers.property_index import property_index
+from helpers import metrics
+import time
 import os
 
 # --- Import all your Blueprints ---
@@ -11,47 +13,31 @@ from routes.chat_routes import chatbot_bp
 from routes.leads_routes import leads_bp
 from routes.property_routes import property_bp
 from routes.scheduler_routes import scheduler_bp
+from routes.metrics_routes import metrics_bp
 
 # Create the app instance
 app = create_app()
 
 # -------------------------------
-# Global session handling
+# Request timing
 # -------------------------------
-def log_with_timing(prev_time, message):
-    current_time = datetime.utcnow()
-    elapsed = (current_time - prev_time).total_seconds() if prev_time else 0
-    print(f"[{current_time.isoformat()}] {message} (Elapsed: {elapsed:.4f}s)")
-    return current_time
-
 @app.before_request
-def create_session():
-    """ Runs before every request to create a new session. """
-    t = log_with_timing(None, "[GLOBAL BEFORE_REQUEST] Creating session...")
-    g.session = ScopedSession()
-    t = log_with_timing(t, "[GLOBAL BEFORE_REQUEST] Session created and attached to g.")
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    metrics.begin_request(request.endpoint)
 
-@app.teardown_request
-def remove_session(exception=None):
-    """
-    Runs after every request.
-    - Rolls back if there's an exception,
-    - Otherwise commits,
-    - Then removes the session from the registry.
-    """
-    t = log_with_timing(None, "[GLOBAL TEARDOWN_REQUEST] Starting teardown...")
-    session = getattr(g, 'session', None)
-    if session:
-        if exception:
-            t = log_with_timing(t, "[GLOBAL TEARDOWN_REQUEST] Exception detected. Rolling back session.")
-            session.rollback()
-        else:
-            t = log_with_timing(t, "[GLOBAL TEARDOWN_REQUEST] No exception. Committing session.")
-            session.commit()
-        ScopedSession.remove()
-        t = log_with_timing(t, "[GLOBAL TEARDOWN_REQUEST] Session removed.")
-    else:
-        t = log_with_timing(t, "[GLOBAL TEARDOWN_REQUEST] No session found.")
+@app.after_request
+def record_request_timing(response):
+    started = g.get("request_started")
+    if started is not None:
+        metrics.observe(
+            "http_request_seconds",
+            time.perf_counter() - started,
+            endpoint=request.endpoint or "none",
+            method=request.method,
+            status=str(response.status_code),
+        )
+    return response
 
 # -------------------------------
 # Register the Blueprints
@@ -60,6 +46,18 @@ app.register_blueprint(chatbot_bp)
 app.register_blueprint(leads_bp)
 app.register_blueprint(property_bp)
 app.register_blueprint(scheduler_bp)
+app.register_blueprint(metrics_bp)
+
+# -------------------------------
+# Warm in-memory indexes
+# -------------------------------
+if Config.PROPERTY_INDEX_ENABLED:
+    try:
+        with app.app_context():
+            property_index.load()
+    except Exception as e:
+        # Not fatal: fetch_properties loads the index lazily on first use
+        print(f"[ERR] Property index warm-up failed: {e}")
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
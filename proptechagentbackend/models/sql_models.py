@@ -46,6 +46,7 @@ class Client(db.Model):
     status = db.Column(db.String(100))
     work_sheet = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Drives incremental lead matching
     login_link = db.Column(db.String(255))
     access_key = db.Column(db.String(50))
 
@@ -66,6 +67,8 @@ class Building(db.Model):
     nearest_mrt = db.Column(db.String(100), nullable=True)
     distance_to_bts = db.Column(db.Numeric(10,2), nullable=True)
     distance_to_mrt = db.Column(db.Numeric(10,2), nullable=True)
+    latitude = db.Column(db.Float, nullable=True)   # WGS84, used by the geospatial index
+    longitude = db.Column(db.Float, nullable=True)
     facilities = db.Column(db.JSON, nullable=True)
     photo_urls = db.Column(db.JSON, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -73,12 +76,49 @@ class Building(db.Model):
     def __repr__(self):
         return f"<Building {self.name}>"
 
+class Station(db.Model):
+    """Rail station reference data (BTS, MRT, ...) for proximity searches."""
+    __tablename__ = "stations"
+
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(20), unique=True, nullable=False)  # Operator code, e.g. "E4"
+    name = db.Column(db.String(100), nullable=False)
+    line = db.Column(db.String(100), nullable=False)              # e.g. "Sukhumvit", "Silom", "Blue"
+    system = db.Column(db.String(20), nullable=False)             # e.g. "BTS", "MRT"
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Station {self.code} {self.name}>"
+
+class InventoryGeneration(db.Model):
+    """
+    Single-row counter bumped on every commit that writes buildings, properties or
+    stations, so each process can tell when its in-memory caches and indexes are stale.
+    Maintained by helpers/inventory_sync.py.
+    """
+    __tablename__ = "inventory_generation"
+
+    id = db.Column(db.Integer, primary_key=True)  # Always 1
+    generation = db.Column(db.BigInteger, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<InventoryGeneration {self.generation}>"
+
 class Property(db.Model):
     __tablename__ = "properties"
+    __table_args__ = (
+        # Keyset pagination order for the property listing
+        db.Index("ix_properties_created_at_id", "created_at", "id"),
+        # Incremental refresh of the in-memory property index
+        db.Index("ix_properties_updated_at_id", "updated_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     property_code = db.Column(db.String(50), unique=True, nullable=False)  # Alphanumeric
-    building_id = db.Column(db.Integer, db.ForeignKey("buildings.id"), nullable=False)
+    building_id = db.Column(db.Integer, db.ForeignKey("buildings.id"), nullable=False, index=True)
     building_name = db.Column(db.String(255))  # New column for storing the building's name
     unit = db.Column(db.String(50), nullable=False)
     owner = db.Column(db.String(255))
@@ -96,6 +136,7 @@ class Property(db.Model):
     sent = db.Column(db.String(3), nullable=True)  # Yes or No
     photo_urls = db.Column(db.JSON, nullable=True)  # Store photo URLs as JSON object
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Drives incremental lead matching
 
     # Relationships
     building = db.relationship("Building", backref=db.backref("properties", lazy=True))
@@ -136,18 +177,145 @@ class Property(db.Model):
         building_name = self.building.name if self.building else "Unknown"
         return f"<Property {self.property_code} - {building_name} - {self.unit}>"
     
+class PropertySearchRow(db.Model):
+    """
+    Flattened search row per property: building fields copied in and the result
+    dict precomputed, so searches need no join and no per-row post-processing.
+    Maintained by helpers/property_read_model.py.
+    """
+    __tablename__ = "property_search"
+    __table_args__ = (
+        db.Index("ix_property_search_bedrooms_price", "bedrooms", "price"),
+    )
+
+    property_id = db.Column(db.Integer, db.ForeignKey("properties.id", ondelete="CASCADE"), primary_key=True)
+    property_code = db.Column(db.String(50), unique=True, nullable=False)
+    building_id = db.Column(db.Integer, nullable=False, index=True)
+    building_name = db.Column(db.String(255))  # Building.name (for name filters)
+    bedrooms = db.Column(db.Integer)
+    bathrooms = db.Column(db.Integer)
+    price = db.Column(db.Numeric(10, 2))
+    size = db.Column(db.Numeric(10, 2))
+    distance_to_bts = db.Column(db.Numeric(10, 2))
+    distance_to_mrt = db.Column(db.Numeric(10, 2))
+    facilities = db.Column(db.JSON, nullable=True)
+    images = db.Column(db.JSON, nullable=True)  # photo URLs without the placeholder
+    image_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime)
+    payload = db.Column(db.Text, nullable=False)  # fetch_properties result dict, JSON-encoded
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 class ClientProperty(db.Model):
     __tablename__ = "client_properties"
+    __table_args__ = (
+        db.UniqueConstraint("client_id", "property_id", name="uq_client_properties_pair"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    client_id = db.Column(db.Integer, db.ForeignKey("clients.id", ondelete="CASCADE"), nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey("clients.id", ondelete="CASCADE"), nullable=False, index=True)
     property_id = db.Column(db.Integer, db.ForeignKey("properties.id", ondelete="CASCADE"), nullable=False)
     comment = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=False, nullable=False)  # New column
+    match_score = db.Column(db.Float, nullable=True)  # Set by the lead matcher; NULL for links added by hand
 
     client = db.relationship("Client", back_populates="client_properties")
     property = db.relationship("Property", back_populates="client_properties")
 
     def __repr__(self):
         return f"<ClientProperty client_id={self.client_id} property_id={self.property_id} is_active={self.is_active}>"
+
+class LeadMatchRun(db.Model):
+    __tablename__ = "lead_match_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    mode = db.Column(db.String(20), nullable=False)  # "full" or "incremental"
+    started_at = db.Column(db.DateTime, nullable=False)  # Watermark for the next incremental run
+    finished_at = db.Column(db.DateTime, nullable=True)  # NULL while running or if the run failed
+    clients_matched = db.Column(db.Integer, default=0, nullable=False)
+    pairs_scored = db.Column(db.BigInteger, default=0, nullable=False)
+    matches_written = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<LeadMatchRun {self.id} {self.mode} clients={self.clients_matched}>"
+
+class JobSchedule(db.Model):
+    __tablename__ = "job_schedules"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    task = db.Column(db.String(100), nullable=False)  # Name registered in helpers/job_scheduler.py
+    args = db.Column(db.JSON, nullable=True)
+    interval_seconds = db.Column(db.Integer, nullable=False)
+    next_run_at = db.Column(db.DateTime, nullable=False)
+    enabled = db.Column(db.Boolean, default=True, nullable=False)
+    last_enqueued_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<JobSchedule {self.name} every {self.interval_seconds}s>"
+
+class Job(db.Model):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claim order for workers: the queued jobs that are due, oldest first
+        db.Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    task = db.Column(db.String(100), nullable=False)
+    args = db.Column(db.JSON, nullable=True)
+    status = db.Column(db.String(20), default="queued", nullable=False)  # queued, running, succeeded, failed
+    run_at = db.Column(db.DateTime, nullable=False)  # Not claimed before this (delays and retry backoff)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=3, nullable=False)
+    schedule_id = db.Column(db.Integer, db.ForeignKey("job_schedules.id", ondelete="SET NULL"), nullable=True)
+    locked_by = db.Column(db.String(100), nullable=True)  # Worker that claimed the latest attempt
+    locked_at = db.Column(db.DateTime, nullable=True)
+    enqueued_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)  # Start of the latest attempt
+    finished_at = db.Column(db.DateTime, nullable=True)
+    duration_seconds = db.Column(db.Float, nullable=True)  # Run time of the latest attempt
+    result = db.Column(db.JSON, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.task} {self.status}>"
+
+class Conversation(db.Model):
+    __tablename__ = "conversations"
+
+    id = db.Column(db.String(36), primary_key=True)  # UUID handed to the client
+    message_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    messages = db.relationship(
+        "ConversationMessage",
+        back_populates="conversation",
+        cascade="all, delete-orphan",
+        order_by="ConversationMessage.seq",
+    )
+
+    def __repr__(self):
+        return f"<Conversation {self.id} messages={self.message_count}>"
+
+class ConversationMessage(db.Model):
+    __tablename__ = "conversation_messages"
+    __table_args__ = (
+        db.UniqueConstraint("conversation_id", "seq", name="uq_conversation_messages_seq"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(
+        db.String(36), db.ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    seq = db.Column(db.Integer, nullable=False)  # Position in the conversation, append-only
+    message = db.Column(db.JSON, nullable=False)  # The chat message dict as sent to the model
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    conversation = db.relationship("Conversation", back_populates="messages")
+
+    def __repr__(self):
+        return f"<ConversationMessage {self.conversation_id}#{self.seq}>"
@@ -1,94 +1,38 @@
 import os
-import json
+import copy
+import time
 import traceback
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from openai import OpenAI  # New import style
 from helpers.cors_helpers import pre_authorized_cors_preflight
-from helpers.property_helpers import fetch_properties  
+from config import Config
+from helpers.chat_turns import (
+    ChatRequestError, build_turn, finish_turn, assistant_message_dict,
+    merge_tool_call_deltas, completion_request, completion_cache_key
+)
+from helpers.tool_executor import execute_tool_calls, iter_tool_results, tool_messages
+from helpers.sse_helpers import format_sse
+from helpers.completion_cache import completion_cache
+from helpers.property_cache import property_cache
+from helpers.prompt_compactor import compact_prompt
+from helpers import metrics
 
 # Initialize the OpenAI client using the new syntax
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 chatbot_bp = Blueprint("chatbot_bp", __name__)
 
-tools = [{
-    "type": "function",
-    "function": {
-        "name": "fetch_properties",
-        "description": "Get property details based on filter criteria. Users can provide minimal or partial filters such as just the building name, or a range for bedrooms, price, etc.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "bedrooms": {
-                    "type": "integer",
-                    "description": "Minimum number of bedrooms"
-                },
-                "max_bedrooms": {
-                    "type": "integer",
-                    "description": "Maximum number of bedrooms"
-                },
-                "price": {
-                    "type": "number",
-                    "description": "Minimum rental price"
-                },
-                "max_price": {
-                    "type": "number",
-                    "description": "Maximum rental price"
-                },
-                "bathrooms": {
-                    "type": "integer",
-                    "description": "Minimum number of bathrooms"
-                },
-                "max_bathrooms": {
-                    "type": "integer",
-                    "description": "Maximum number of bathrooms"
-                },
-                "sq_meters": {
-                    "type": "number",
-                    "description": "Minimum size of the property in square meters"
-                },
-                "max_sq_meters": {
-                    "type": "number",
-                    "description": "Maximum size of the property in square meters"
-                },
-                "distance_from_bts": {
-                    "type": "number",
-                    "description": "Maximum distance from the nearest BTS station in kilometers"
-                },
-                "property_name": {
-                    "type": "string",
-                    "description": "Name of the property (if applicable)"
-                },
-                "building_name": {
-                    "type": "string",
-                    "description": "Name of the building"
-                },
-                "property_code": {
-                    "type": "string",
-                    "description": "Unique code for the property"
-                }, 
-            },
-            "required": [
-            "bedrooms",
-            "max_bedrooms",
-            "price",
-            "max_price",
-            "bathrooms",
-            "max_bathrooms",
-            "sq_meters",
-            "max_sq_meters",
-            "distance_from_bts",
-            "property_name",
-            "building_name",
-            "property_code"
-            ],
-            "additionalProperties": False
-        },
-        "strict": True
-    }
-}]
-
 
+def _parse_chat_request():
+    """
+    Shared request parsing for /chat and /chat/stream.
+    Returns (turn, None) on success or (None, error_response) on failure.
+    See helpers.chat_turns.build_turn for the shape of `turn`.
+    """
+    try:
+        return build_turn(request.get_json(force=True)), None
+    except ChatRequestError as e:
+        return None, (jsonify({"error": e.message}), e.status)
 
 
 @pre_authorized_cors_preflight
@@ -108,97 +52,178 @@ def chat():
       "assistant_message": "Assistant's reply",
       "conversation_history": [ ... ] // Updated conversation history
     }
+
+    Conversation-ID mode: send "conversation_id" (null to start a new conversation)
+    instead of "conversation_history". The response then carries "conversation_id"
+    and "messages" (only the messages added this turn) instead of the full history.
     """
     try:
-        data = request.get_json(force=True)
-        if not data:
-            return jsonify({"error": "Missing JSON body"}), 400
-
-        user_message = data.get("message", "").strip()
-        conversation_history = data.get("conversation_history", [])
-        if not isinstance(conversation_history, list):
-            conversation_history = []
-
-        if not user_message:
-            return jsonify({"error": "No 'message' provided"}), 400
-
-        # If no conversation history, add a system message to define the assistant's identity
-        if not conversation_history:
-            system_message = (
-                "You are a property agent named Patrica. "
-                "Help users with property-related queries and use function calling if you need to fetch property details."
-            )
-            conversation_history.append({"role": "system", "content": system_message})
-
-        # Append the new user message to the conversation history
-        conversation_history.append({"role": "user", "content": user_message})
-
-        # Call the ChatCompletion API using the new tools syntax
-        completion = client.chat.completions.create(
-            model="gpt-4o",  
-            messages=conversation_history,
-            tools=tools
-        )
-
-        # Retrieve the full assistant message object
-        message = completion.choices[0].message
-        print(message)  # Debug print
-
-        # Check if the assistant triggered a tool call
-        if message.tool_calls and len(message.tool_calls) > 0:
-            tool_call = message.tool_calls[0]
-            func_name = tool_call.function.name
-            args_str = tool_call.function.arguments  # Access the function's arguments
-
-            try:
-                func_args = json.loads(args_str)
-            except Exception:
-                assistant_response = "Error parsing tool arguments."
-            else:
-                if func_name == "fetch_properties":
-                    filter_params = func_args.get("filter_params", {})
-                    result = fetch_properties(filter_params)
-                    # Append the tool's output to the conversation history with role "function"
-                    conversation_history.append({
-                        "role": "function",
-                        "name": "fetch_properties",
-                        "content": json.dumps(result)
-                    })
-                    # Re-run ChatCompletion with updated history to integrate the tool output
-                    completion = client.chat.completions.create(
-                        model="gpt-4o",
-                        messages=conversation_history
-                    )
-                    message = completion.choices[0].message
-                    assistant_response = message.content or ""
-                else:
-                    assistant_response = f"Unknown tool '{func_name}' called."
-        else:
-            # If no tool call was made, get the assistant's content normally
-            assistant_response = message.content or ""
-
-        # Convert the assistant message to a dictionary before appending to conversation history
-        conversation_history.append({
-            "role": message.role,
-            "content": message.content,
-            "tool_calls": [  # Optionally include tool call info if needed
-                {
-                    "function": {
-                        "name": tc.function.name,
-                        "arguments": tc.function.arguments
-                    },
-                    "type": tc.type
-                }
-                for tc in message.tool_calls
-            ] if message.tool_calls else None
-        })
-
-        return jsonify({
-            "assistant_message": assistant_response,
-            "conversation_history": conversation_history
-        }), 200
+        started = time.perf_counter()
+        with metrics.span("chat_parse"):
+            turn, error_response = _parse_chat_request()
+        if error_response:
+            return error_response
+        conversation_history = turn["history"]
+
+        # Tool loop: keep answering tool calls until the model replies with text
+        # or we hit the round limit, at which point tools are switched off.
+        data_generation = property_cache.generation
+        for round_number in range(Config.TOOL_MAX_ROUNDS + 1):
+            tools_allowed = round_number < Config.TOOL_MAX_ROUNDS
+            message = _complete(conversation_history, tools_allowed, data_generation)
+            conversation_history.append(message)
+
+            if not message["tool_calls"]:
+                break
+            # Every tool call of this round runs in parallel
+            conversation_history.extend(execute_tool_calls(message["tool_calls"]))
+
+        assistant_response = message["content"] or ""
+
+        payload = finish_turn(turn, assistant_response)
+        with metrics.span("chat_serialize"):
+            response = jsonify(payload)
+        # For the blocking endpoint the first byte goes out with the whole body
+        metrics.observe("chat_ttfb_seconds", time.perf_counter() - started, mode="json")
+        return response, 200
 
     except Exception as e:
         print(e)
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
+
+
+def _complete(messages: list, tools_allowed: bool, data_generation: int) -> dict:
+    """
+    Run one (non-streamed) completion and return the assistant message dict,
+    answering from the completion cache when the exact same request was seen before.
+
+    :param data_generation: property_cache.generation read before this turn's tools ran.
+    """
+    # The model sees the compacted prompt; the history kept for the client is untouched
+    messages = compact_prompt(messages)
+    key = completion_cache_key(messages, tools_allowed)
+    if key:
+        cached = completion_cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+    with metrics.span("llm_call", mode="json"):
+        completion = client.chat.completions.create(**completion_request(messages, tools_allowed))
+    message = assistant_message_dict(completion.choices[0].message)
+    if key:
+        completion_cache.put(key, copy.deepcopy(message), messages, data_generation)
+    return message
+
+
+def _stream_completion(messages: list, tools_allowed: bool, data_generation: int):
+    """
+    Generator that runs one streamed completion, yielding SSE `token` events as
+    content arrives. Its return value (via `yield from`) is the assembled assistant
+    message as a dict, with any tool calls merged from their deltas. A completion
+    cache hit is replayed as a single `token` event.
+    """
+    messages = compact_prompt(messages)
+    key = completion_cache_key(messages, tools_allowed)
+    if key:
+        cached = completion_cache.get(key)
+        if cached is not None:
+            if cached["content"]:
+                yield format_sse("token", {"content": cached["content"]})
+            return copy.deepcopy(cached)
+
+    kwargs = completion_request(messages, tools_allowed)
+
+    content_parts = []
+    tool_calls = {}  # index -> {"id", "type", "function": {"name", "arguments"}}
+    with metrics.span("llm_call", mode="stream"):
+        for chunk in client.chat.completions.create(stream=True, **kwargs):
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+
+            if delta.content:
+                content_parts.append(delta.content)
+                yield format_sse("token", {"content": delta.content})
+
+            merge_tool_call_deltas(tool_calls, delta.tool_calls)
+
+    message = {
+        "role": "assistant",
+        "content": "".join(content_parts) or None,
+        "tool_calls": [tool_calls[i] for i in sorted(tool_calls)] or None
+    }
+    if key:
+        completion_cache.put(key, copy.deepcopy(message), messages, data_generation)
+    return message
+
+
+@pre_authorized_cors_preflight
+@chatbot_bp.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    Streaming variant of /chat using Server-Sent Events. Accepts the same JSON body,
+    including conversation-ID mode.
+
+    Emits, in order:
+      event: token        {"content": "..."}                    (repeated)
+      event: tool_call    {"id", "name", "arguments"}            (per tool call)
+      event: tool_result  {"id", "name", "ok", "error"?}         (per tool call)
+      event: done         same payload as the JSON /chat response
+      event: error        {"error": "..."}                       (on failure)
+    """
+    started = time.perf_counter()
+    with metrics.span("chat_parse"):
+        turn, error_response = _parse_chat_request()
+    if error_response:
+        return error_response
+    conversation_history = turn["history"]
+
+    def generate():
+        try:
+            data_generation = property_cache.generation
+            for round_number in range(Config.TOOL_MAX_ROUNDS + 1):
+                tools_allowed = round_number < Config.TOOL_MAX_ROUNDS
+                message = yield from _stream_completion(conversation_history, tools_allowed, data_generation)
+                conversation_history.append(message)
+                if not message["tool_calls"]:
+                    break
+
+                tool_calls = message["tool_calls"]
+                for tc in tool_calls:
+                    yield format_sse("tool_call", {
+                        "id": tc["id"],
+                        "name": tc["function"]["name"],
+                        "arguments": tc["function"]["arguments"]
+                    })
+
+                # Tool calls run in parallel; report each one as soon as it finishes
+                results = {}
+                for index, result in iter_tool_results(tool_calls):
+                    results[index] = result
+                    result_event = {"id": result["id"], "name": result["name"], "ok": result["ok"]}
+                    if not result["ok"]:
+                        result_event["error"] = result["content"]
+                    yield format_sse("tool_result", result_event)
+                conversation_history.extend(tool_messages(tool_calls, results))
+
+            yield format_sse("done", finish_turn(turn, message["content"] or ""))
+            metrics.observe("chat_stream_total_seconds", time.perf_counter() - started)
+        except Exception as e:
+            traceback.print_exc()
+            yield format_sse("error", {"error": str(e)})
+
+    def timed(events):
+        # Time-to-first-byte is measured to the first real event, not to the headers
+        first_event = True
+        for event in events:
+            if first_event:
+                first_event = False
+                metrics.observe("chat_ttfb_seconds", time.perf_counter() - started, mode="stream")
+            yield event
+
+    return Response(
+        stream_with_context(timed(generate())),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
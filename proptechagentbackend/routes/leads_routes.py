@@ -5,8 +5,89 @@ from flask import Blueprint, request, jsonify, g
 from config import Config
 from datetime import datetime
 import os
+from database import db
 from helpers.cors_helpers import cors_preflight
+from helpers.job_scheduler import enqueue
+from helpers.property_helpers import row_to_dict
+from models.sql_models import Building, Client, ClientProperty, Property
 
 # Initialize the Blueprint for the leads routes
 leads_bp = Blueprint("leads_bp", __name__)
 
+
+@cors_preflight
+@leads_bp.route("/leads/match", methods=["POST"])
+def match_leads():
+    """
+    Queue a match_leads job that matches clients to available properties and stores
+    the top matches in client_properties. A jobs worker runs it; poll
+    GET /scheduler/jobs/<job_id> for its status and run stats.
+
+    Expects JSON (all optional):
+    {
+      "full": false,           # re-match every client instead of only what changed
+      "client_ids": [1, 2],    # re-match exactly these clients
+      "top_k": 10              # matches kept per client (default LEAD_MATCH_TOP_K)
+    }
+
+    Returns (202):
+    { "job_id": 12, "status": "queued" }
+    """
+    data = request.get_json(silent=True) or {}
+    client_ids = data.get("client_ids")
+    top_k = data.get("top_k")
+    if client_ids is not None and (
+        not isinstance(client_ids, list) or not all(isinstance(cid, int) for cid in client_ids)
+    ):
+        return jsonify({"error": "'client_ids' must be a list of integers"}), 400
+    if top_k is not None and (not isinstance(top_k, int) or not 1 <= top_k <= 100):
+        return jsonify({"error": "'top_k' must be an integer between 1 and 100"}), 400
+
+    job = enqueue("match_leads", {"full": bool(data.get("full")), "client_ids": client_ids or None, "top_k": top_k})
+    print(f"[LOG] Queued lead matching job {job.id}")
+    return jsonify({"job_id": job.id, "status": job.status}), 202
+
+
+@cors_preflight
+@leads_bp.route("/leads/<int:client_id>/matches", methods=["GET"])
+def client_matches(client_id):
+    """
+    A client's stored matches, best first. Links added by hand (no score) come last.
+
+    Returns JSON:
+    { "client_id": 1, "matches": [ {"match_score": 0.93, "is_active": false, "comment": null, "property": {...}}, ... ] }
+    """
+    if db.session.get(Client, client_id) is None:
+        return jsonify({"error": "Client not found"}), 404
+
+    rows = (
+        db.session.query(
+            ClientProperty.match_score,
+            ClientProperty.is_active,
+            ClientProperty.comment,
+            Property.property_code,
+            db.func.coalesce(db.func.nullif(Property.building_name, ""), Building.name).label("building_name"),
+            Property.bedrooms,
+            Property.bathrooms,
+            Property.price,
+            Property.size,
+            Property.created_at,
+            Property.photo_urls,
+        )
+        .join(Property, ClientProperty.property_id == Property.id)
+        .join(Building, Property.building_id == Building.id)
+        .filter(ClientProperty.client_id == client_id)
+        .order_by(ClientProperty.match_score.is_(None), ClientProperty.match_score.desc(), Property.id)
+    )
+    return jsonify({
+        "client_id": client_id,
+        "matches": [
+            {
+                "match_score": row.match_score,
+                "is_active": row.is_active,
+                "comment": row.comment,
+                "property": row_to_dict(row),
+            }
+            for row in rows
+        ],
+    }), 200
@@ -0,0 +1,13 @@
+# metrics_routes.py
+
+from flask import Blueprint, Response
+from helpers import metrics
+
+# Initialize the Blueprint for the metrics routes
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus scrape endpoint for the in-process histograms and counters."""
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
@@ -1,11 +1,285 @@
 
 
 # Import necessary modules
-from flask import Blueprint, request, jsonify, g
+import json
+from flask import Blueprint, request, jsonify, g, Response, stream_with_context
 from config import Config
 from datetime import datetime
 import os
 from helpers.cors_helpers import cors_preflight
+from helpers.property_helpers import (
+    fetch_properties, fetch_properties_batch, iter_property_listing, encode_listing_cursor, decode_listing_cursor
+)
+from helpers.geo_index import geo_index, validate_geo_filters
+from helpers.facility_index import facility_index, parse_amenities, validate_facility_filters
+from helpers.json_provider import dumps
 
 # Initialize the Blueprint for the leads routes
-property_bp = Blueprint("property_bp", __name__)
\ No newline at end of file
+property_bp = Blueprint("property_bp", __name__)
+
+# Filter keys accepted by fetch_properties (anything else in a filter set is ignored)
+SEARCH_FILTER_KEYS = {
+    "bedrooms", "max_bedrooms", "bathrooms", "max_bathrooms", "price", "max_price",
+    "sq_meters", "max_sq_meters", "distance_from_bts", "property_name", "building_name",
+    "property_code", "latitude", "longitude", "radius_km", "nearest", "near_station", "station_line",
+    "amenities", "any_amenities",
+}
+
+# Query-string filters for GET /properties and how to parse them
+LISTING_FILTER_TYPES = {
+    "bedrooms": int, "max_bedrooms": int, "bathrooms": int, "max_bathrooms": int,
+    "price": float, "max_price": float, "sq_meters": float, "max_sq_meters": float,
+    "distance_from_bts": float, "property_name": str, "building_name": str, "property_code": str,
+    "latitude": float, "longitude": float, "radius_km": float, "nearest": int,
+    "near_station": str, "station_line": str,
+    "amenities": parse_amenities, "any_amenities": parse_amenities,  # comma-separated: amenities=pool,gym
+}
+
+
+def _validate_filters(filter_params: dict):
+    """:raises ValueError: for bad geo or amenity filters (see the index modules)."""
+    validate_geo_filters(filter_params)
+    validate_facility_filters(filter_params)
+
+
+def _check_json_filter_types(filter_params: dict):
+    """
+    Type-check a JSON filter set against LISTING_FILTER_TYPES. Numbers must be JSON
+    numbers (not strings or booleans; whole numbers for the int filters), text
+    filters strings, amenities a list of names.
+
+    :raises ValueError: naming the first bad key.
+    """
+    for key, value in filter_params.items():
+        cast = LISTING_FILTER_TYPES[key]
+        if cast in (int, float):
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+            if valid and cast is int:
+                valid = float(value).is_integer()
+        elif cast is str:
+            valid = isinstance(value, str)
+        else:
+            try:
+                cast(value)
+                valid = True
+            except ValueError:
+                valid = False
+        if not valid:
+            raise ValueError(f"Invalid value for '{key}'")
+
+
+def _parse_listing_filters(args) -> dict:
+    """Query-string filters as a fetch_properties filter dict; raises ValueError naming the bad key."""
+    filter_params = {}
+    for key, cast in LISTING_FILTER_TYPES.items():
+        value = args.get(key)
+        if value in (None, ""):
+            continue
+        try:
+            filter_params[key] = cast(value)
+        except ValueError:
+            raise ValueError(f"Invalid value for '{key}'")
+    _validate_filters(filter_params)
+    return filter_params
+
+
+@cors_preflight
+@property_bp.route("/properties/search", methods=["POST"])
+def search_properties():
+    """
+    Run several property searches in one request (and one SQL round-trip).
+
+    Expects JSON:
+    {
+      "filters": [ {"bedrooms": 2, "max_price": 30000}, {"building_name": "Ideo"}, ... ]
+    }
+    Each filter set takes the same keys as the chat tool's fetch_properties.
+
+    Returns JSON, one entry per filter set in request order:
+    {
+      "results": [ {"index": 0, "count": 12, "properties": [ ... ]}, ... ]
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    filter_sets = data.get("filters")
+    if not isinstance(filter_sets, list) or not filter_sets:
+        return jsonify({"error": "'filters' must be a non-empty list of filter objects"}), 400
+    if len(filter_sets) > Config.PROPERTY_SEARCH_MAX_SETS:
+        return jsonify({"error": f"At most {Config.PROPERTY_SEARCH_MAX_SETS} filter sets per request"}), 400
+    if not all(isinstance(f, dict) for f in filter_sets):
+        return jsonify({"error": "Each filter set must be a JSON object"}), 400
+
+    cleaned = [
+        {key: value for key, value in f.items() if key in SEARCH_FILTER_KEYS and value not in (None, "")}
+        for f in filter_sets
+    ]
+    for i, filter_params in enumerate(cleaned):
+        try:
+            _check_json_filter_types(filter_params)
+            _validate_filters(filter_params)
+        except ValueError as e:
+            return jsonify({"error": f"Filter set {i}: {e}"}), 400
+    try:
+        batch = fetch_properties_batch(cleaned)
+    except Exception as e:
+        print(f"[ERR] Property search failed: {e}")
+        return jsonify({"error": "Property search failed"}), 500
+
+    return jsonify({
+        "results": [
+            {"index": i, "count": len(properties), "properties": properties}
+            for i, properties in enumerate(batch)
+        ]
+    }), 200
+
+
+@cors_preflight
+@property_bp.route("/properties", methods=["GET"])
+def list_properties():
+    """
+    Keyset-paginated property listing, streamed as it is read from the database.
+
+    Query string:
+      - any fetch_properties filter (bedrooms=2&max_price=30000&building_name=Ideo ...)
+      - limit:  page size (default PROPERTY_LISTING_PAGE_SIZE, max PROPERTY_LISTING_MAX_PAGE_SIZE)
+      - cursor: the next_cursor of the previous page
+      - all=true: stream every matching row in one response (no page limit)
+
+    Returns JSON, ordered by (created_at, id):
+    {
+      "properties": [ ... ],
+      "count": 100,
+      "next_cursor": "..." | null   // null on the last page
+    }
+    """
+    try:
+        filter_params = _parse_listing_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    stream_all = request.args.get("all", "").lower() == "true"
+    try:
+        limit = None if stream_all else int(request.args.get("limit", Config.PROPERTY_LISTING_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "Invalid value for 'limit'"}), 400
+    if limit is not None and not 1 <= limit <= Config.PROPERTY_LISTING_MAX_PAGE_SIZE:
+        return jsonify({"error": f"'limit' must be between 1 and {Config.PROPERTY_LISTING_MAX_PAGE_SIZE}"}), 400
+
+    after = None
+    if request.args.get("cursor"):
+        try:
+            after = decode_listing_cursor(request.args["cursor"], filter_params)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    def generate():
+        yield '{"properties":['
+        count = 0
+        last_position = None
+        has_more = False
+        chunk = []
+        # Read one row past the page to know whether there is a next page
+        rows = iter_property_listing(
+            filter_params, after,
+            limit + 1 if limit is not None else None,
+            Config.PROPERTY_LISTING_BATCH_SIZE
+        )
+        try:
+            for row, position in rows:
+                if limit is not None and count == limit:
+                    has_more = True
+                    break
+                chunk.append(dumps(row))
+                count += 1
+                last_position = position
+                if len(chunk) >= Config.PROPERTY_LISTING_BATCH_SIZE:
+                    yield ("," if count > len(chunk) else "") + ",".join(chunk)
+                    chunk = []
+            if chunk:
+                yield ("," if count > len(chunk) else "") + ",".join(chunk)
+        except Exception as e:
+            # Headers are long gone; close the document and report the error in it
+            print(f"[ERR] Property listing failed: {e}")
+            yield f'],"count":{count},"next_cursor":null,"error":"Listing failed"}}'
+            return
+        finally:
+            rows.close()
+
+        next_cursor = encode_listing_cursor(last_position[0], last_position[1], filter_params) if has_more else None
+        yield f'],"count":{count},"next_cursor":{json.dumps(next_cursor)}}}'
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+@cors_preflight
+@property_bp.route("/properties/nearby", methods=["GET"])
+def nearby_properties():
+    """
+    Buildings near a map point or station, closest first, plus the matching properties.
+
+    Query string (at least one location):
+      - lat & lng (or latitude & longitude): map point, with radius_km and/or nearest
+      - near_station: station name or code (e.g. Asok, E4)
+      - station_line: every station of a line or system (e.g. Sukhumvit, BTS)
+      - radius_km: defaults to GEO_DEFAULT_RADIUS_KM
+      - any other fetch_properties filter (bedrooms=2&max_price=30000 ...)
+
+    Returns JSON:
+    {
+      "buildings": [ {"building_id": 12, "name": "...", "distance_km": 0.18}, ... ],  // in range
+      "stations": [ {"code": "E4", "name": "Asok", "line": "Sukhumvit", ...} ],      // searched around
+      "properties": [ ... ],    // fetch_properties result for all the filters
+      "count": 25
+    }
+    """
+    args = request.args.to_dict()
+    # Short aliases for map clients
+    for alias, key in (("lat", "latitude"), ("lng", "longitude")):
+        if alias in args:
+            args.setdefault(key, args.pop(alias))
+    try:
+        filter_params = _parse_listing_filters(args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not any(key in filter_params for key in ("latitude", "near_station", "station_line")):
+        return jsonify({"error": "Give 'lat'/'lng', 'near_station' or 'station_line'"}), 400
+
+    try:
+        buildings = geo_index.matches(filter_params)
+        stations = []
+        if "near_station" in filter_params or "station_line" in filter_params:
+            stations = geo_index.find_stations(filter_params.get("near_station"), filter_params.get("station_line"))
+        properties = fetch_properties(filter_params)
+    except Exception as e:
+        print(f"[ERR] Nearby search failed: {e}")
+        return jsonify({"error": "Nearby search failed"}), 500
+
+    return jsonify({
+        "buildings": [
+            {"building_id": building_id, "name": geo_index.building_name(building_id), "distance_km": round(distance, 3)}
+            for building_id, distance in buildings
+        ],
+        "stations": stations,
+        "properties": properties,
+        "count": len(properties),
+    }), 200
+
+
+@cors_preflight
+@property_bp.route("/properties/amenities", methods=["GET"])
+def list_amenities():
+    """
+    The amenity vocabulary the amenities / any_amenities filters match against.
+
+    Returns JSON, most common first:
+    {
+      "amenities": [ {"amenity": "pool", "buildings": 412}, ... ]
+    }
+    """
+    try:
+        facility_index.ensure_loaded()
+        vocabulary = facility_index.vocabulary()
+    except Exception as e:
+        print(f"[ERR] Amenity listing failed: {e}")
+        return jsonify({"error": "Amenity listing failed"}), 500
+    return jsonify({"amenities": [{"amenity": token, "buildings": count} for token, count in vocabulary]}), 200
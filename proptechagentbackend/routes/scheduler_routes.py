@@ -1,11 +1,206 @@
-
+# scheduler_routes.py
 
 # Import necessary modules
 from flask import Blueprint, request, jsonify, g
 from config import Config
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
+from database import db
 from helpers.cors_helpers import cors_preflight
+from helpers.job_scheduler import TASKS, enqueue, ensure_schedule
+from models.sql_models import Job, JobSchedule
 
 # Initialize the Blueprint for the leads routes
-scheduler_bp = Blueprint("scheduler_bp", __name__)
\ No newline at end of file
+scheduler_bp = Blueprint("scheduler_bp", __name__)
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+
+def _job_dict(job: Job) -> dict:
+    queue_wait = (job.started_at - job.run_at).total_seconds() if job.started_at and job.started_at >= job.run_at else None
+    return {
+        "id": job.id,
+        "task": job.task,
+        "args": job.args,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "schedule_id": job.schedule_id,
+        "locked_by": job.locked_by,
+        "enqueued_at": job.enqueued_at,
+        "run_at": job.run_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "queue_wait_seconds": queue_wait,
+        "duration_seconds": job.duration_seconds,
+        "result": job.result,
+        "last_error": job.last_error,
+    }
+
+
+def _schedule_dict(schedule: JobSchedule) -> dict:
+    return {
+        "id": schedule.id,
+        "name": schedule.name,
+        "task": schedule.task,
+        "args": schedule.args,
+        "interval_seconds": schedule.interval_seconds,
+        "enabled": schedule.enabled,
+        "next_run_at": schedule.next_run_at,
+        "last_enqueued_at": schedule.last_enqueued_at,
+    }
+
+
+@cors_preflight
+@scheduler_bp.route("/scheduler/jobs", methods=["POST"])
+def create_job():
+    """
+    Queue a one-off background job.
+
+    Expects JSON:
+    {
+      "task": "match_leads",        # see GET /scheduler/tasks
+      "args": {"full": true},       # optional keyword arguments for the task
+      "delay_seconds": 60,          # optional; or "run_at": ISO datetime (UTC)
+      "max_attempts": 3             # optional (default JOB_MAX_ATTEMPTS)
+    }
+    Returns the job (201).
+    """
+    data = request.get_json(silent=True) or {}
+    task_name = data.get("task")
+    args = data.get("args") or {}
+    if task_name not in TASKS:
+        return jsonify({"error": f"Unknown task; expected one of {sorted(TASKS)}"}), 400
+    if not isinstance(args, dict):
+        return jsonify({"error": "'args' must be a JSON object"}), 400
+
+    run_at = None
+    try:
+        if data.get("run_at"):
+            run_at = datetime.fromisoformat(str(data["run_at"]).replace("Z", "")).replace(tzinfo=None)
+        elif data.get("delay_seconds"):
+            run_at = datetime.utcnow() + timedelta(seconds=float(data["delay_seconds"]))
+        max_attempts = int(data["max_attempts"]) if data.get("max_attempts") is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid 'run_at', 'delay_seconds' or 'max_attempts'"}), 400
+    if max_attempts is not None and max_attempts < 1:
+        return jsonify({"error": "'max_attempts' must be at least 1"}), 400
+
+    try:
+        job = enqueue(task_name, args, run_at, max_attempts)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(_job_dict(job)), 201
+
+
+@cors_preflight
+@scheduler_bp.route("/scheduler/jobs", methods=["GET"])
+def list_jobs():
+    """
+    Recent jobs, newest first. Query params: status, task, limit (default 50, max 500).
+    """
+    status = request.args.get("status")
+    if status and status not in JOB_STATUSES:
+        return jsonify({"error": f"'status' must be one of {list(JOB_STATUSES)}"}), 400
+    limit = min(request.args.get("limit", 50, type=int) or 50, 500)
+
+    query = db.session.query(Job)
+    if status:
+        query = query.filter(Job.status == status)
+    if request.args.get("task"):
+        query = query.filter(Job.task == request.args["task"])
+    jobs = query.order_by(Job.id.desc()).limit(limit).all()
+    return jsonify({"jobs": [_job_dict(job) for job in jobs]}), 200
+
+
+@cors_preflight
+@scheduler_bp.route("/scheduler/jobs/<int:job_id>", methods=["GET"])
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(_job_dict(job)), 200
+
+
+@cors_preflight
+@scheduler_bp.route("/scheduler/schedules", methods=["GET"])
+def list_schedules():
+    schedules = db.session.query(JobSchedule).order_by(JobSchedule.name).all()
+    return jsonify({"schedules": [_schedule_dict(schedule) for schedule in schedules]}), 200
+
+
+@cors_preflight
+@scheduler_bp.route("/scheduler/schedules", methods=["POST"])
+def save_schedule():
+    """
+    Create or update a recurring job.
+
+    Expects JSON:
+    { "name": "nightly-rematch", "task": "match_leads", "args": {"full": true},
+      "interval_seconds": 86400, "enabled": true }
+    """
+    data = request.get_json(silent=True) or {}
+    name = (data.get("name") or "").strip()
+    args = data.get("args") or {}
+    if not name:
+        return jsonify({"error": "'name' is required"}), 400
+    if not isinstance(args, dict):
+        return jsonify({"error": "'args' must be a JSON object"}), 400
+    try:
+        schedule = ensure_schedule(name, data.get("task"), int(data.get("interval_seconds") or 0), args,
+                                   bool(data.get("enabled", True)))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(_schedule_dict(schedule)), 200
+
+
+@cors_preflight
+@scheduler_bp.route("/scheduler/tasks", methods=["GET"])
+def list_tasks():
+    return jsonify({"tasks": sorted(TASKS)}), 200
+
+
+@cors_preflight
+@scheduler_bp.route("/scheduler/stats", methods=["GET"])
+def job_stats():
+    """
+    Job counts by status, and per-task timings over the jobs finished in the
+    last `hours` (default 24): count, failures, mean/p50/p95/max run time and
+    mean queue wait, all in seconds.
+    """
+    counts = dict(db.session.query(Job.status, db.func.count()).group_by(Job.status).all())
+    since = datetime.utcnow() - timedelta(hours=request.args.get("hours", 24, type=float))
+    finished = (
+        db.session.query(Job.task, Job.status, Job.duration_seconds, Job.run_at, Job.started_at)
+        .filter(Job.finished_at >= since)
+        .order_by(Job.id.desc())
+        .limit(10000)
+        .all()
+    )
+
+    per_task = {}
+    for row in finished:
+        entry = per_task.setdefault(row.task, {"durations": [], "waits": [], "failed": 0})
+        if row.duration_seconds is not None:
+            entry["durations"].append(row.duration_seconds)
+        if row.started_at and row.run_at and row.started_at >= row.run_at:
+            entry["waits"].append((row.started_at - row.run_at).total_seconds())
+        if row.status == "failed":
+            entry["failed"] += 1
+
+    def rank(samples, q):
+        return samples[min(len(samples) - 1, int(len(samples) * q))] if samples else None
+
+    tasks = {}
+    for task_name, entry in per_task.items():
+        durations = sorted(entry["durations"])
+        tasks[task_name] = {
+            "count": len(durations),
+            "failed": entry["failed"],
+            "mean_seconds": sum(durations) / len(durations) if durations else None,
+            "p50_seconds": rank(durations, 0.5),
+            "p95_seconds": rank(durations, 0.95),
+            "max_seconds": durations[-1] if durations else None,
+            "mean_queue_wait_seconds": sum(entry["waits"]) / len(entry["waits"]) if entry["waits"] else None,
+        }
+    return jsonify({"counts": {status: counts.get(status, 0) for status in JOB_STATUSES}, "tasks": tasks}), 200
@@ -0,0 +1,43 @@
+# tests/conftest.py
+#
+# Shared fixtures. Tests always run against a throwaway SQLite file (or
+# TEST_DATABASE_URL), never the DATABASE_URL of the environment, since the schema
+# is dropped and recreated for each session.
+#   cd proptechagentbackend && python -m pytest -q
+
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'proptech_tests.db')}"
+)
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import pytest  # noqa: E402
+from benchmarks.common import make_app  # noqa: E402
+from database import db  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    """The app with main.py's blueprints, without its index warm-up."""
+    from routes.chat_routes import chatbot_bp
+    from routes.leads_routes import leads_bp
+    from routes.property_routes import property_bp
+    from routes.scheduler_routes import scheduler_bp
+    from routes.metrics_routes import metrics_bp
+
+    app = make_app()
+    for blueprint in (chatbot_bp, leads_bp, property_bp, scheduler_bp, metrics_bp):
+        app.register_blueprint(blueprint)
+    return app
+
+
+@pytest.fixture
+def app_context(app):
+    """An app context over an empty schema."""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield
+        db.session.remove()
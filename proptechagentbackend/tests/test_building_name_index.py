@@ -0,0 +1,38 @@
+# tests/test_building_name_index.py
+
+import pytest
+from database import db
+from helpers.building_name_index import building_name_index
+from models.sql_models import Building
+
+ASOKE_NAMES = [
+    "Ashton Asoke", "Ashton Asoke - Rama 9", "Celes Asoke", "Edge Sukhumvit 23", "Grand Asoke Residence",
+    "Noble Refine", "Park Origin Thonglor", "Quattro by Sansiri", "Rhythm Asoke", "Rhythm Asoke 2",
+    "The Esse Asoke", "The Lofts Asoke", "Vtara Sukhumvit 36",
+]
+
+
+@pytest.fixture
+def names(app_context):
+    db.session.add_all(Building(name=name) for name in ASOKE_NAMES)
+    db.session.commit()
+    building_name_index.load()
+    return {building.id: building.name for building in db.session.query(Building)}
+
+
+@pytest.mark.parametrize("query", ["hton", "shto", "sok", "Asoke", "esse", "Sukhumvit 2"])
+def test_substring_queries_match_ilike(names, query):
+    ilike = db.session.query(Building.id).filter(Building.name.ilike(f"%{query}%")).order_by(Building.id)
+    expected = [row.id for row in ilike]
+
+    assert expected
+    assert building_name_index.match_ids(query) == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("ashtn asok", {"Ashton Asoke", "Ashton Asoke - Rama 9"}),
+    ("rythm asoke", {"Rhythm Asoke", "Rhythm Asoke 2"}),
+    ("qattro", {"Quattro by Sansiri"}),
+])
+def test_typo_queries_find_the_intended_building(names, query, expected):
+    assert {names[building_id] for building_id in building_name_index.match_ids(query)} == expected
@@ -0,0 +1,153 @@
+# tests/test_chatbot_runs.py
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from config import Config
+from helpers import chatbot_helper
+
+
+def _event(name, **data):
+    return SimpleNamespace(event=name, data=SimpleNamespace(**data))
+
+
+class StalledStream:
+    """Sends run.created, then goes quiet until closed or released."""
+
+    def __init__(self, run_id="run_1"):
+        self.run_id = run_id
+        self.release = threading.Event()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release.set()
+
+    def __iter__(self):
+        yield _event("thread.run.created", id=self.run_id, status="queued")
+        self.release.wait(5)
+
+
+class BrokenStream(StalledStream):
+    def __iter__(self):
+        raise ConnectionError("stream reset")
+
+
+class FakeRuns:
+    def __init__(self, stream, listed=()):
+        self.stream = stream
+        self.listed = list(listed)
+        self.created = []
+        self.cancelled = []
+
+    def create(self, **kwargs):
+        self.created.append(kwargs)
+        return self.stream if kwargs.get("stream") else SimpleNamespace(id="run_new", status="queued")
+
+    def cancel(self, thread_id, run_id):
+        self.cancelled.append(run_id)
+        self.stream.release.set()
+
+    def retrieve(self, thread_id, run_id):
+        return SimpleNamespace(id=run_id, status="completed")
+
+    def list(self, **kwargs):
+        return SimpleNamespace(data=self.listed)
+
+
+class FakeClient:
+    def __init__(self, runs):
+        self.beta = SimpleNamespace(threads=SimpleNamespace(runs=runs))
+
+    def with_options(self, **kwargs):
+        return self
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    monkeypatch.setattr(Config, "ASSISTANT_RUN_STREAMING", True)
+
+    def install(stream, listed=()):
+        fake = FakeRuns(stream, listed)
+        monkeypatch.setattr(chatbot_helper, "client", FakeClient(fake))
+        return fake
+    return install
+
+
+def test_stalled_stream_gives_way_to_the_deadline(runs):
+    fake = runs(StalledStream())
+    started = time.monotonic()
+
+    assert chatbot_helper._run_and_wait("thread_1", time.monotonic() + 0.3) == ("run_1", "timed_out")
+    assert time.monotonic() - started < 1.5
+    assert fake.cancelled == ["run_1"]
+
+
+def test_stalled_stream_gives_way_to_cancel(runs):
+    fake = runs(StalledStream())
+    cancel_event = threading.Event()
+    threading.Timer(0.2, cancel_event.set).start()
+
+    assert chatbot_helper._run_and_wait("thread_1", time.monotonic() + 30, cancel_event) == ("run_1", "cancelled")
+    assert fake.cancelled == ["run_1"]
+
+
+def test_failed_stream_polls_the_run_it_started(runs):
+    started = SimpleNamespace(id="run_1", created_at=int(time.time()))
+    fake = runs(BrokenStream(), listed=[started])
+
+    assert chatbot_helper._run_and_wait("thread_1", time.monotonic() + 5) == ("run_1", "completed")
+    assert len(fake.created) == 1
+
+
+def test_failed_stream_without_a_run_creates_one(runs):
+    earlier = SimpleNamespace(id="run_0", created_at=int(time.time()) - 60)  # The previous turn's run
+    fake = runs(BrokenStream(), listed=[earlier])
+
+    assert chatbot_helper._run_and_wait("thread_1", time.monotonic() + 5) == ("run_new", "completed")
+    assert [call.get("stream") for call in fake.created] == [True, None]
+
+
+class AsyncStalledStream:
+    def __init__(self):
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+
+    async def __aiter__(self):
+        yield _event("thread.run.created", id="run_1", status="queued")
+        await asyncio.sleep(5)
+
+
+class AsyncFakeRuns:
+    def __init__(self, stream):
+        self.stream = stream
+        self.cancelled = []
+
+    async def create(self, **kwargs):
+        return self.stream
+
+    async def cancel(self, thread_id, run_id):
+        self.cancelled.append(run_id)
+
+
+def test_async_stalled_stream_gives_way_to_the_deadline(monkeypatch):
+    monkeypatch.setattr(Config, "ASSISTANT_RUN_STREAMING", True)
+    stream = AsyncStalledStream()
+    fake = AsyncFakeRuns(stream)
+    monkeypatch.setattr(chatbot_helper, "async_client", FakeClient(fake))
+
+    async def wait():
+        outcome = await chatbot_helper._run_and_wait_async("thread_1", time.monotonic() + 0.3)
+        await asyncio.sleep(0)  # Lets the cancelled reader close the stream
+        return outcome
+
+    assert asyncio.run(wait()) == ("run_1", "timed_out")
+    assert fake.cancelled == ["run_1"] and stream.closed
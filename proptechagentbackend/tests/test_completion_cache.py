@@ -0,0 +1,62 @@
+# tests/test_completion_cache.py
+
+from types import SimpleNamespace
+from config import Config
+from helpers.completion_cache import CompletionCache, completion_cache, completion_key
+from helpers.property_cache import property_cache
+from routes import chat_routes
+
+
+def _exchange(call_id, question):
+    return [
+        {"role": "user", "content": question},
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": "fetch_properties", "arguments": "{}"}},
+        ]},
+        {"role": "tool", "tool_call_id": call_id, "content": '{"total": 3}'},
+    ]
+
+
+def test_key_ignores_tool_call_ids_and_whitespace():
+    first = completion_key("m", [], "auto", _exchange("call_abc", "2 bed  near Asok"))
+    second = completion_key("m", [], "auto", _exchange("call_xyz", " 2 bed near\nAsok "))
+
+    assert first == second
+    assert first != completion_key("m", [], "none", _exchange("call_abc", "2 bed near Asok"))
+    assert first != completion_key("m", [], "auto", _exchange("call_abc", "3 bed near Asok"))
+
+
+def test_answers_built_on_tool_output_expire_with_the_property_data():
+    cache = CompletionCache(max_entries=10, ttl_seconds=0)
+    with_tools = _exchange("call_1", "2 bed near Asok")
+    generation = property_cache.generation
+    cache.put("tools", {"content": "3 units"}, with_tools, generation)
+    cache.put("plain", {"content": "Hello"}, [{"role": "user", "content": "hi"}], generation)
+
+    property_cache.clear()  # What an inventory write does
+
+    assert cache.get("tools") is None
+    assert cache.get("plain") == {"content": "Hello"}
+    cache.put("late", {"content": "old rows"}, with_tools, generation)  # Read before the write
+    assert cache.get("late") is None
+
+
+def test_repeated_chat_request_is_answered_from_the_cache(app, app_context, monkeypatch):
+    monkeypatch.setattr(Config, "COMPLETION_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "CONVERSATION_COMPACTION_ENABLED", False)
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content="Which area do you prefer?", tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(chat_routes, "client", fake)
+    client = app.test_client()
+    hits = completion_cache.hits
+
+    replies = [client.post("/chat", json={"message": "Looking for a condo"}).get_json() for _ in range(2)]
+
+    assert len(calls) == 1 and completion_cache.hits == hits + 1
+    assert replies[0]["assistant_message"] == replies[1]["assistant_message"] == "Which area do you prefer?"
@@ -0,0 +1,88 @@
+# tests/test_conversation_flow.py
+
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+from helpers.chatbot_helper import _conversation_flow, _drive, _drive_async
+
+FUNCTION_CALL = json.dumps({"name": "fetch_properties", "arguments": {"filter_params": {"bedrooms": 2}}})
+
+
+class Script:
+    """Answers each flow operation from canned results and records what was asked."""
+
+    def __init__(self, runs, texts, fail_on=None):
+        self.runs = list(runs)
+        self.texts = list(texts)
+        self.fail_on = fail_on
+        self.trace = []
+
+    def execute(self, operation, kwargs):
+        self.trace.append((operation, kwargs))
+        if operation == self.fail_on:
+            raise RuntimeError(f"{operation} failed")
+        if operation == "create_thread":
+            return SimpleNamespace(id="thread_new")
+        if operation == "create_message":
+            return SimpleNamespace(id=f"msg_{len(self.trace)}")
+        if operation == "run_and_wait":
+            return self.runs.pop(0)
+        if operation == "latest_assistant_text":
+            return self.texts.pop(0)
+        if operation == "fetch_properties":
+            return [{"property_code": "PC1", "bedrooms": 2}]
+        raise ValueError(operation)
+
+    async def execute_async(self, operation, kwargs):
+        await asyncio.sleep(0)
+        return self.execute(operation, kwargs)
+
+
+SCENARIOS = {
+    "new thread, tool call, second run": dict(
+        args=("2 bed near Asok", None, "Be brief"),
+        runs=[("run_1", "requires_action"), ("run_2", "completed")],
+        texts=[FUNCTION_CALL, "Found PC1"],
+    ),
+    "existing thread, cancelled": dict(
+        args=("hi", "thread_1", None), runs=[("run_1", "cancelled")], texts=[],
+    ),
+    "step error": dict(
+        args=("hi", "thread_1", None), runs=[], texts=[], fail_on="run_and_wait",
+    ),
+}
+
+
+@pytest.mark.parametrize("name", SCENARIOS)
+def test_sync_and_async_drivers_run_the_same_flow(name):
+    scenario = SCENARIOS[name]
+    sync_script = Script(scenario["runs"], scenario["texts"], scenario.get("fail_on"))
+    async_script = Script(scenario["runs"], scenario["texts"], scenario.get("fail_on"))
+
+    sync_result = _drive(_conversation_flow(*scenario["args"]), sync_script.execute)
+    async_result = asyncio.run(_drive_async(_conversation_flow(*scenario["args"]), async_script.execute_async))
+
+    assert sync_result == async_result
+    assert sync_script.trace == async_script.trace
+
+
+def test_tool_call_result_is_posted_before_the_second_run():
+    script = Script([("run_1", "requires_action"), ("run_2", "completed")], [FUNCTION_CALL, "Found PC1"])
+
+    result = _drive(_conversation_flow("2 bed near Asok", None, "Be brief"), script.execute)
+
+    assert result == {"assistant_message": "Found PC1", "thread_id": "thread_new"}
+    operations = [operation for operation, _ in script.trace]
+    assert operations == ["create_thread", "create_message", "create_message", "run_and_wait",
+                          "latest_assistant_text", "fetch_properties", "create_message", "run_and_wait",
+                          "latest_assistant_text"]
+    assert script.trace[5][1] == {"filter_params": {"bedrooms": 2}}
+
+
+def test_failed_step_becomes_an_error_reply():
+    script = Script([], [], fail_on="run_and_wait")
+
+    result = _drive(_conversation_flow("hi", "thread_1", None), script.execute)
+
+    assert result == {"assistant_message": "An error occurred: run_and_wait failed", "thread_id": "thread_1"}
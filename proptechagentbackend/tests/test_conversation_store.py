@@ -0,0 +1,47 @@
+# tests/test_conversation_store.py
+
+import pytest
+from helpers.conversation_store import ConversationStore, InMemoryConversationStore, SqlConversationStore
+
+
+def test_incomplete_store_fails_when_created():
+    class LoadOnlyStore(ConversationStore):
+        def load(self, conversation_id):
+            return []
+
+    with pytest.raises(TypeError):
+        LoadOnlyStore()
+
+
+def test_in_memory_store_evicts_least_recently_used():
+    store = InMemoryConversationStore(max_entries=2, ttl_seconds=60)
+    first, second = store.create(), store.create()
+    store.load(first)  # Now the most recently used
+    third = store.create()
+
+    assert store.load(second) is None
+    assert store.load(first) == [] and store.load(third) == []
+
+
+def test_in_memory_append_recreates_an_evicted_conversation():
+    store = InMemoryConversationStore(max_entries=1, ttl_seconds=60)
+    conversation_id = store.create()
+    history = [{"role": "user", "content": "2 bed near Asok"}]
+    store.append(conversation_id, history)
+    store.create()  # Evicts it mid-turn
+
+    reply = [{"role": "assistant", "content": "Here are 3 units"}]
+    store.append(conversation_id, reply, previous=history)
+
+    assert store.load(conversation_id) == history + reply
+
+
+def test_sql_store_appends_in_order(app_context):
+    store = SqlConversationStore(ttl_seconds=60)
+    conversation_id = store.create()
+    store.append(conversation_id, [{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}])
+    store.append(conversation_id, [{"role": "user", "content": "c"}])
+
+    assert [m["content"] for m in store.load(conversation_id)] == ["a", "b", "c"]
+    with pytest.raises(KeyError):
+        store.append("missing", [{"role": "user", "content": "x"}])
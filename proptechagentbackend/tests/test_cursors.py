@@ -0,0 +1,79 @@
+# tests/test_cursors.py
+
+from datetime import datetime, timedelta
+import pytest
+from config import Config
+from database import db
+from helpers.property_helpers import decode_listing_cursor, encode_listing_cursor, iter_property_listing
+from helpers.tool_result_compactor import compact_property_results
+from models.sql_models import Building, Property
+
+
+def _page_through(filters, limit):
+    """Every property_code of the listing, one keyset page of `limit` at a time."""
+    codes, cursor = [], None
+    while True:
+        after = decode_listing_cursor(cursor, filters) if cursor else None
+        page = list(iter_property_listing(filters, after, limit + 1, batch_size=2))
+        codes += [row["property_code"] for row, _ in page[:limit]]
+        if len(page) <= limit:
+            return codes
+        created_at, property_id = page[limit - 1][1]
+        cursor = encode_listing_cursor(created_at, property_id, filters)
+
+
+def test_listing_pages_cover_every_row_once(app_context):
+    building = Building(name="Ideo Q")
+    db.session.add(building)
+    db.session.flush()
+    start = datetime(2024, 1, 1)
+    # Dated rows share timestamps so the id breaks ties
+    db.session.add_all(
+        Property(property_code=f"P{i}", building_id=building.id, unit=str(i), bedrooms=1 + i % 2,
+                 created_at=start + timedelta(days=i // 3))
+        for i in range(11)
+    )
+    db.session.flush()
+    # Two legacy rows without created_at, which list first
+    db.session.query(Property).filter(Property.property_code.in_(["P0", "P1"])).update({"created_at": None})
+    db.session.commit()
+    expected = [f"P{i}" for i in range(11)]
+
+    assert _page_through({}, 3) == expected
+    assert _page_through({"bedrooms": 2}, 2) == [code for i, code in enumerate(expected) if i % 2]
+
+
+def test_listing_cursor_is_tied_to_its_filters(app_context):
+    cursor = encode_listing_cursor(datetime(2024, 1, 1), 7, {"bedrooms": 2})
+
+    assert decode_listing_cursor(cursor, {"bedrooms": 2}) == (datetime(2024, 1, 1), 7)
+    with pytest.raises(ValueError):
+        decode_listing_cursor(cursor, {"bedrooms": 3})
+    with pytest.raises(ValueError):
+        decode_listing_cursor("not-a-cursor", {"bedrooms": 2})
+
+
+def test_compact_results_rank_and_page(monkeypatch):
+    monkeypatch.setattr(Config, "TOOL_RESULT_TOP_K", 2)
+    results = [
+        {"property_code": f"P{price}", "building_name": "Ideo Q", "bedrooms": 1, "price": price,
+         "images": [f"https://img/{price}/{n}.jpg" for n in range(3)]}
+        for price in (30000, 18000, 21000, 20000, 45000)
+    ]
+    filters = {"price": 20000}
+
+    first = compact_property_results(results, filters)
+    assert [row[0] for row in first["rows"]] == ["P20000", "P21000"]  # Closest to the requested price
+    assert first["rows"][0][-2:] == [3, "https://img/20000/0.jpg"]  # Image count and thumbnail only
+
+    codes, page = [], first
+    while True:
+        codes += [row[0] for row in page["rows"]]
+        if page["next_cursor"] is None:
+            break
+        page = compact_property_results(results, filters, page["next_cursor"])
+    assert codes == ["P20000", "P21000", "P18000", "P30000", "P45000"]
+
+    with pytest.raises(ValueError):
+        compact_property_results(results, {"price": 40000}, first["next_cursor"])
+    assert compact_property_results(results, filters, "garbage")["offset"] == 0
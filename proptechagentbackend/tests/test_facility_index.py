@@ -0,0 +1,47 @@
+# tests/test_facility_index.py
+
+from sqlalchemy import insert
+from config import Config
+from database import db
+from helpers import inventory_sync
+from helpers.facility_index import facility_building_ids, facility_index
+from models.sql_models import Building
+
+
+def _seed():
+    building = Building(name="Ideo Q", facilities=["Swimming Pool", "Gym"])
+    db.session.add(building)
+    db.session.commit()
+    inventory_sync.check(force=True)
+    facility_index.load()
+    return building.id
+
+
+def test_rolled_back_edit_stays_out_of_the_index(app_context):
+    building_id = _seed()
+
+    building = db.session.get(Building, building_id)
+    building.facilities = ["Sauna"]
+    db.session.flush()
+    db.session.rollback()
+    assert facility_building_ids({"amenities": ["pool"]}) == [building_id]
+    assert facility_building_ids({"amenities": ["sauna"]}) == []
+
+    building = db.session.get(Building, building_id)
+    building.facilities = ["Sauna"]
+    db.session.commit()
+    assert facility_building_ids({"amenities": ["sauna"]}) == [building_id]
+
+
+def test_buildings_imported_by_another_process_show_up(app_context, monkeypatch):
+    monkeypatch.setattr(Config, "INVENTORY_SYNC_CHECK_SECONDS", 0)
+    _seed()
+
+    # Another process (the importer CLI): a bulk INSERT, then its generation bump
+    with db.engine.begin() as connection:
+        helipad_id = connection.execute(
+            insert(Building.__table__).values(name="Sky Tower", facilities=["Helipad"])
+        ).inserted_primary_key[0]
+    inventory_sync._bump_generation(db.engine)
+
+    assert facility_building_ids({"amenities": ["helipad"]}) == [helipad_id]
@@ -0,0 +1,24 @@
+# tests/test_fetch_properties.py
+
+import pytest
+from benchmarks.bench_fetch_properties import FILTERS, count_statements
+from benchmarks.common import seed_inventory
+from config import Config
+from helpers.property_helpers import fetch_properties
+
+
+@pytest.fixture
+def uncached(monkeypatch, app_context):
+    monkeypatch.setattr(Config, "PROPERTY_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "PROPERTY_INDEX_ENABLED", False)
+    monkeypatch.setattr(Config, "PROPERTY_READ_MODEL_ENABLED", False)
+    seed_inventory(200, 1000)
+
+
+@pytest.mark.parametrize("filters", FILTERS, ids=str)
+def test_fetch_properties_is_one_statement(uncached, filters):
+    # Guards the column projection: a lazy load per row (N+1) shows up here
+    rows = fetch_properties(filters)
+    assert rows
+    assert count_statements(lambda: fetch_properties(filters)) == 1
+    assert all(row["building_name"] for row in rows)
@@ -0,0 +1,27 @@
+# tests/test_geo_index.py
+
+from sqlalchemy import insert
+from config import Config
+from database import db
+from helpers import inventory_sync
+from helpers.geo_index import geo_index
+from models.sql_models import Building
+
+ASOK = (13.7370, 100.5603)
+
+
+def test_buildings_written_by_another_process_show_up(app_context, monkeypatch):
+    monkeypatch.setattr(Config, "INVENTORY_SYNC_CHECK_SECONDS", 0)
+    db.session.add(Building(name="Ideo Q", latitude=ASOK[0], longitude=ASOK[1]))
+    db.session.commit()
+    inventory_sync.check(force=True)
+    assert len(geo_index.within(*ASOK, 1.0)) == 1
+
+    # Another process: a plain INSERT this process's ORM never sees, then its generation bump
+    with db.engine.begin() as connection:
+        connection.execute(insert(Building.__table__).values(name="Noble Ploenchit", latitude=13.7430,
+                                                              longitude=100.5480))
+    inventory_sync._bump_generation(db.engine)
+
+    found = geo_index.within(*ASOK, 2.0)
+    assert [geo_index.building_name(building_id) for building_id, _ in found] == ["Ideo Q", "Noble Ploenchit"]
@@ -0,0 +1,42 @@
+# tests/test_inventory_import.py
+
+import json
+from database import db
+from helpers.inventory_import import BuildingMap, import_inventory
+from models.sql_models import Building, Property
+
+
+def _write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    return str(path)
+
+
+def test_partial_column_jsonl_update_keeps_omitted_columns(app_context, tmp_path):
+    import_inventory(_write_jsonl(tmp_path / "initial.jsonl", [
+        {"property_code": "A1", "building_name": "Ideo Q", "unit": "101", "price": 25000, "owner": "Alice"},
+        {"property_code": "A2", "building_name": "Ideo Q", "unit": "102", "price": 30000, "owner": "Bob"},
+    ]))
+
+    # One batch, each row updating a different column
+    stats = import_inventory(_write_jsonl(tmp_path / "update.jsonl", [
+        {"property_code": "A1", "building_name": "Ideo Q", "unit": "101", "price": 26000},
+        {"property_code": "A2", "building_name": "Ideo Q", "unit": "102", "owner": "Bobby"},
+    ]))
+
+    assert stats["upserted"] == 2 and stats["rejected"] == 0
+    a1 = db.session.query(Property).filter_by(property_code="A1").one()
+    a2 = db.session.query(Property).filter_by(property_code="A2").one()
+    assert (float(a1.price), a1.owner) == (26000, "Alice")
+    assert (float(a2.price), a2.owner) == (30000, "Bobby")
+
+
+def test_buildings_created_counts_only_inserted_rows(app_context):
+    buildings = BuildingMap(create_missing=True)
+    # Created by another writer after the map was loaded: resolved, but not ours
+    db.session.add(Building(name="Ideo Q"))
+    db.session.commit()
+
+    resolved = buildings.resolve({"Ideo Q", "Noble Ploenchit"})
+
+    assert all(resolved.values())
+    assert buildings.created == 1
@@ -0,0 +1,63 @@
+# tests/test_job_scheduler.py
+
+import time
+import pytest
+from config import Config
+from database import db
+from helpers import job_scheduler
+from helpers.job_scheduler import claim_job, enqueue, execute_job
+from models.sql_models import Job
+
+
+def test_enqueue_rejects_args_the_task_cannot_take(app_context):
+    with pytest.raises(ValueError, match="Invalid args"):
+        enqueue("match_leads", {"fulll": True})
+    assert db.session.query(Job).count() == 0
+
+
+def test_import_jobs_are_confined_to_the_import_dir(app_context, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "JOB_IMPORT_DIR", None)
+    with pytest.raises(ValueError, match="JOB_IMPORT_DIR"):
+        enqueue("import_inventory", {"path": "units.csv"})
+
+    monkeypatch.setattr(Config, "JOB_IMPORT_DIR", str(tmp_path))
+    with pytest.raises(ValueError, match="inside JOB_IMPORT_DIR"):
+        enqueue("import_inventory", {"path": "../../etc/passwd"})
+    with pytest.raises(ValueError, match="inside JOB_IMPORT_DIR"):
+        enqueue("import_inventory", {"path": "/etc/passwd"})
+    assert enqueue("import_inventory", {"path": "units.csv"}).status == "queued"
+
+
+def test_outcome_is_dropped_once_another_worker_took_the_job(app_context, monkeypatch):
+    def _requeued_mid_run():
+        # Lock timed out while running: requeued and claimed by another worker
+        db.session.execute(db.update(Job).values(status="queued"))
+        db.session.commit()
+        assert claim_job("worker-b") is not None
+        return "late"
+
+    monkeypatch.setitem(job_scheduler.TASKS, "test_requeued_mid_run", _requeued_mid_run)
+    enqueue("test_requeued_mid_run")
+    job_id = claim_job("worker-a")
+
+    assert execute_job(job_id, "worker-a") is None
+    db.session.expire_all()
+    job = db.session.get(Job, job_id)
+    assert (job.status, job.locked_by, job.result) == ("running", "worker-b", None)
+
+
+def test_heartbeat_keeps_a_long_job_locked(app_context, monkeypatch):
+    locks = []
+
+    def _slow():
+        time.sleep(0.35)
+        locks.append(db.session.get(Job, job_id).locked_at)
+
+    monkeypatch.setitem(job_scheduler.TASKS, "test_slow", _slow)
+    monkeypatch.setattr(Config, "JOB_HEARTBEAT_SECONDS", 0.1)
+    enqueue("test_slow")
+    job_id = claim_job("worker-a")
+    started = db.session.get(Job, job_id).started_at
+
+    assert execute_job(job_id, "worker-a") == "succeeded"
+    assert locks[0] > started
@@ -0,0 +1,40 @@
+# tests/test_lead_matching.py
+
+import numpy as np
+from database import db
+from helpers.lead_matching import top_k, write_matches
+from models.sql_models import Building, Client, ClientProperty, Property
+
+
+def test_top_k_breaks_ties_on_lowest_column():
+    scores = np.array([
+        [0.5, 0.9, 0.5, 0.5, 0.5, 0.7],
+        [-np.inf, 0.2, 0.2, -np.inf, 0.2, 0.2],
+    ])
+
+    idx, best = top_k(scores, 3)
+
+    assert idx.tolist() == [[1, 5, 0], [1, 2, 4]]
+    assert best.tolist() == [[0.9, 0.7, 0.5], [0.2, 0.2, 0.2]]
+
+
+def test_write_matches_upserts_and_keeps_agent_rows(app_context):
+    building = Building(name="Ideo Q")
+    db.session.add(building)
+    db.session.flush()
+    properties = [Property(property_code=f"P{i}", building_id=building.id, unit=str(i)) for i in range(3)]
+    client = Client(code="C1", first_name="A", last_name="B", contact="x")
+    db.session.add_all(properties + [client])
+    db.session.flush()
+    p0, p1, p2 = (p.id for p in properties)
+    db.session.add(ClientProperty(client_id=client.id, property_id=p0, match_score=0.4, comment="Viewing Friday"))
+    db.session.commit()
+
+    write_matches({client.id: [(p0, 0.9), (p1, 0.8)]})
+    write_matches({client.id: [(p0, 0.95), (p2, 0.7)]})
+    db.session.commit()
+
+    rows = {row.property_id: row for row in db.session.query(ClientProperty).filter_by(client_id=client.id)}
+    assert set(rows) == {p0, p2}
+    assert (rows[p0].match_score, rows[p0].comment) == (0.95, "Viewing Friday")
+    assert rows[p2].match_score == 0.7
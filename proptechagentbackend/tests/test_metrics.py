@@ -0,0 +1,24 @@
+# tests/test_metrics.py
+
+from helpers import metrics
+from helpers.completion_cache import completion_cache
+from helpers.property_cache import property_cache
+
+
+def _types(text: str) -> dict:
+    return dict(line.split()[2:4] for line in text.splitlines() if line.startswith("# TYPE "))
+
+
+def test_cache_hit_and_miss_counts_are_prometheus_counters():
+    completion_cache.get("missing-key")
+    property_cache.get("missing-key")
+
+    text = metrics.render_prometheus()
+    types = _types(text)
+
+    for name in ("completion_cache_hits_total", "completion_cache_misses_total",
+                 "property_cache_hits_total", "property_cache_misses_total",
+                 "property_cache_evictions_total", "property_cache_invalidations_total"):
+        assert types[name] == "counter"
+    assert types["completion_cache_entries"] == types["property_cache_bytes"] == "gauge"
+    assert "completion_cache_hits " not in text
@@ -0,0 +1,74 @@
+# tests/test_prompt_compactor.py
+
+import copy
+import pytest
+from config import Config
+from helpers import prompt_compactor
+from helpers.prompt_compactor import SUMMARY_PREFIX, compact_prompt, summary_cache
+
+
+def _turn(n, rows=40):
+    call_id = f"call_{n}"
+    return [
+        {"role": "user", "content": f"question {n}"},
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": "fetch_properties", "arguments": "{}"}},
+        ]},
+        {"role": "tool", "tool_call_id": call_id, "content": '{"total": %d, "rows": "%s"}' % (rows, "x" * 2000)},
+        {"role": "assistant", "content": f"answer {n}"},
+    ]
+
+
+def _conversation(turns):
+    return [{"role": "system", "content": "You are a rental assistant."}] + [m for n in range(turns) for m in _turn(n)]
+
+
+@pytest.fixture
+def compaction(monkeypatch):
+    monkeypatch.setattr(Config, "CONVERSATION_COMPACTION_ENABLED", True)
+    monkeypatch.setattr(Config, "CONVERSATION_KEEP_TURNS", 2)
+    monkeypatch.setattr(Config, "CONVERSATION_SUMMARY_MODEL", "")  # Extractive summaries, no API call
+    summary_cache.clear()
+
+
+def test_short_conversations_are_sent_as_is(compaction):
+    messages = _conversation(2)
+
+    assert compact_prompt(messages) is messages
+
+
+def test_old_tool_outputs_become_references(compaction, monkeypatch):
+    monkeypatch.setattr(Config, "CONVERSATION_TOKEN_BUDGET", 100000)
+    messages = _conversation(4)
+    original = copy.deepcopy(messages)
+
+    prompt = compact_prompt(messages)
+
+    assert messages == original  # The client's history is untouched
+    tool_outputs = [m["content"] for m in prompt if m["role"] == "tool"]
+    assert tool_outputs[:2] == ["[Earlier fetch_properties output omitted (40 results). "
+                                "Call fetch_properties again if the details are needed.]"] * 2
+    assert tool_outputs[2:] == [original[11]["content"], original[15]["content"]]
+
+
+def test_over_budget_history_is_folded_into_a_rolling_summary(compaction, monkeypatch):
+    monkeypatch.setattr(Config, "CONVERSATION_TOKEN_BUDGET", 1200)
+    folded = []
+    real_summarize = prompt_compactor._summarize
+
+    def summarize(previous, messages):
+        folded.append((previous, [m["content"] for m in messages if m["role"] == "user"]))
+        return real_summarize(previous, messages)
+
+    monkeypatch.setattr(prompt_compactor, "_summarize", summarize)
+
+    prompt = compact_prompt(_conversation(5))
+    assert prompt[0]["content"] == "You are a rental assistant."
+    assert prompt[1]["content"].startswith(SUMMARY_PREFIX) and "question 2" in prompt[1]["content"]
+    assert [m["content"] for m in prompt[2:] if m["role"] == "user"] == ["question 3", "question 4"]
+
+    # Next turn: the cached summary is extended by one turn, not rebuilt
+    compact_prompt(_conversation(6))
+    assert folded[0] == (None, ["question 0", "question 1", "question 2"])
+    assert folded[1][0] is not None and folded[1][1] == ["question 3"]
+    assert compact_prompt(_conversation(6)) and len(folded) == 2
@@ -0,0 +1,59 @@
+# tests/test_property_cache.py
+
+from decimal import Decimal
+import pytest
+from benchmarks.bench_fetch_properties import count_statements
+from benchmarks.common import seed_inventory
+from config import Config
+from database import db
+from helpers.property_cache import PropertyResultCache, canonicalize_filters, property_cache
+from helpers.property_helpers import fetch_properties
+from models.sql_models import Property
+
+
+@pytest.mark.parametrize("same", [
+    {"bedrooms": 2.0, "building_name": " IDEO Q ", "amenities": "Gym, pool", "max_price": None},
+    {"building_name": "ideo q", "amenities": ["pool", "gym", "Pool"], "bedrooms": Decimal("2.00")},
+])
+def test_equivalent_filters_share_one_key(same):
+    assert canonicalize_filters(same) == canonicalize_filters(
+        {"bedrooms": 2, "building_name": "Ideo Q", "amenities": ["gym", "pool"]}
+    )
+
+
+def test_different_filters_get_different_keys():
+    assert canonicalize_filters({"bedrooms": 2}) != canonicalize_filters({"bedrooms": 2.5})
+    assert canonicalize_filters({"property_code": "ab1"}) != canonicalize_filters({"property_code": "AB1"})
+
+
+def test_cache_is_bounded_by_bytes_and_ignores_stale_results():
+    cache = PropertyResultCache(max_bytes=10, ttl_seconds=60)
+    cache.put("a", "12345", cache.generation)
+    cache.put("b", "12345", cache.generation)
+    cache.get("a")  # Now the most recently used
+    cache.put("c", "12345", cache.generation)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("12345", None, "12345")
+
+    started_at = cache.generation
+    cache.clear()  # A write committed while that query ran
+    cache.put("d", "1", started_at)
+    assert cache.get("d") is None
+
+
+def test_fetch_properties_is_served_from_cache_until_a_write_commits(app_context, monkeypatch):
+    monkeypatch.setattr(Config, "PROPERTY_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "PROPERTY_INDEX_ENABLED", False)
+    monkeypatch.setattr(Config, "PROPERTY_READ_MODEL_ENABLED", False)
+    seed_inventory(5, 50)
+    property_cache.clear()
+    filters = {"bedrooms": 4, "max_price": 60000}
+
+    first = fetch_properties(filters)
+    assert count_statements(lambda: fetch_properties({"max_price": 60000.0, "bedrooms": 4})) == 0
+
+    db.session.add(Property(property_code="NEW1", building_id=1, unit="9", bedrooms=4, price=20000))
+    db.session.commit()
+
+    assert {row["property_code"] for row in fetch_properties(filters)} == \
+        {row["property_code"] for row in first} | {"NEW1"}
@@ -0,0 +1,63 @@
+# tests/test_property_read_model.py
+
+import pytest
+from sqlalchemy import update
+from benchmarks.bench_fetch_properties import FILTERS
+from benchmarks.common import seed_inventory
+from config import Config
+from database import db
+from helpers.property_helpers import fetch_properties
+from helpers.property_read_model import check_consistency, rebuild
+from models.sql_models import Building, Property
+
+
+@pytest.fixture
+def read_model(app_context, monkeypatch):
+    monkeypatch.setattr(Config, "PROPERTY_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "PROPERTY_INDEX_ENABLED", False)
+    monkeypatch.setattr(Config, "PROPERTY_READ_MODEL_ENABLED", True)
+    seed_inventory(50, 400)  # Bulk inserts: the read model only sees them after a rebuild
+    assert rebuild(batch_size=150)["written"] == 400
+
+
+def _search(filters, monkeypatch, read_model_enabled):
+    monkeypatch.setattr(Config, "PROPERTY_READ_MODEL_ENABLED", read_model_enabled)
+    rows = sorted(fetch_properties(filters), key=lambda row: row["property_code"])
+    monkeypatch.setattr(Config, "PROPERTY_READ_MODEL_ENABLED", True)
+    return rows
+
+
+@pytest.mark.parametrize("filters", FILTERS, ids=str)
+def test_read_model_answers_like_the_base_tables(read_model, monkeypatch, filters):
+    assert _search(filters, monkeypatch, True) == _search(filters, monkeypatch, False)
+
+
+def test_orm_writes_refresh_the_read_model_with_their_transaction(read_model, monkeypatch):
+    building = db.session.get(Building, 1)
+    building.name = "Renamed Tower"
+    db.session.flush()
+    db.session.rollback()
+    assert _search({"building_name": "Renamed Tower"}, monkeypatch, True) == []
+
+    building = db.session.get(Building, 1)
+    building.name = "Renamed Tower"
+    db.session.get(Property, 1).price = 12345
+    db.session.commit()
+
+    assert _search({"building_name": "Renamed Tower"}, monkeypatch, True) == \
+        _search({"building_name": "Renamed Tower"}, monkeypatch, False)
+    assert _search({"property_code": "PC000001"}, monkeypatch, True)[0]["price"] == 12345
+    assert check_consistency()["stale"] == 0
+
+
+def test_consistency_check_finds_and_repairs_bulk_edits(read_model):
+    db.session.execute(update(Property).where(Property.id.in_([3, 4])).values(bedrooms=9))
+    db.session.execute(Property.__table__.delete().where(Property.id == 5))
+    db.session.commit()
+
+    report = check_consistency(repair=True)
+    assert (report["stale"], report["orphans"], report["samples"]["stale"]) == (2, 1, [3, 4])
+    assert report["repaired"]
+
+    report = check_consistency()
+    assert (report["missing"], report["stale"], report["orphans"]) == (0, 0, 0)
@@ -0,0 +1,50 @@
+# tests/test_property_search.py
+
+import pytest
+from benchmarks.common import seed_inventory
+from config import Config
+from helpers.property_helpers import fetch_properties
+
+
+@pytest.fixture
+def client(app, app_context, monkeypatch):
+    monkeypatch.setattr(Config, "PROPERTY_CACHE_ENABLED", False)
+    seed_inventory(20, 300)
+    return app.test_client()
+
+
+def test_batched_search_matches_one_search_per_filter_set(client):
+    filter_sets = [{"bedrooms": 2, "max_price": 50000}, {"building_name": "building 1"}, {"bedrooms": 9}]
+
+    response = client.post("/properties/search", json={"filters": filter_sets + [{"max_price": None}]})
+
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    for result, filters in zip(results, filter_sets):
+        expected = sorted(row["property_code"] for row in fetch_properties(filters))
+        assert sorted(row["property_code"] for row in result["properties"]) == expected
+        assert result["count"] == len(expected)
+    assert results[2]["count"] == 0 and results[3]["count"] == 300
+
+
+@pytest.mark.parametrize("filters, error", [
+    ({"bedrooms": "2"}, "Filter set 1: Invalid value for 'bedrooms'"),
+    ({"bedrooms": True}, "Filter set 1: Invalid value for 'bedrooms'"),
+    ({"bedrooms": 2.5}, "Filter set 1: Invalid value for 'bedrooms'"),
+    ({"building_name": 7}, "Filter set 1: Invalid value for 'building_name'"),
+    ({"amenities": 3}, "Filter set 1: Invalid value for 'amenities'"),
+])
+def test_badly_typed_filter_set_is_rejected(client, filters, error):
+    response = client.post("/properties/search", json={"filters": [{"bedrooms": 2}, filters]})
+
+    assert response.status_code == 400
+    assert response.get_json()["error"] == error
+
+
+def test_filter_set_limit(client, monkeypatch):
+    monkeypatch.setattr(Config, "PROPERTY_SEARCH_MAX_SETS", 2)
+
+    response = client.post("/properties/search", json={"filters": [{}, {}, {}]})
+
+    assert response.status_code == 400
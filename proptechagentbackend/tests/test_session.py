@@ -0,0 +1,12 @@
+# tests/test_session.py
+
+from database import db
+from database.session import SessionFactory
+
+
+def test_session_factory_shares_the_app_engine(app_context):
+    session = SessionFactory()
+    try:
+        assert session.get_bind() is db.engine
+    finally:
+        session.close()
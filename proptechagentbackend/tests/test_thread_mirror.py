@@ -0,0 +1,84 @@
+# tests/test_thread_mirror.py
+
+import threading
+from types import SimpleNamespace
+from helpers.thread_mirror import ThreadMirror
+
+
+class FakeMessages:
+    """Server-side thread messages, listed the way the Assistants API pages them."""
+
+    def __init__(self):
+        self.threads = {}
+        self.calls = []
+
+    def add(self, thread_id, role, text, status="completed"):
+        messages = self.threads.setdefault(thread_id, [])
+        message = SimpleNamespace(id=f"msg_{len(messages)}", role=role, status=status,
+                                  content=[SimpleNamespace(text=SimpleNamespace(value=text))])
+        messages.append(message)
+        return message
+
+    def list(self, thread_id, order, limit, after=None):
+        self.calls.append((thread_id, after))
+        messages = self.threads.get(thread_id, [])
+        start = next(i + 1 for i, m in enumerate(messages) if m.id == after) if after else 0
+        data = messages[start:start + limit]
+        return SimpleNamespace(data=data, has_more=start + limit < len(messages))
+
+
+def _mirror(max_threads=10, page_size=2):
+    messages = FakeMessages()
+    mirror = ThreadMirror(SimpleNamespace(beta=SimpleNamespace(threads=SimpleNamespace(messages=messages))),
+                          max_threads)
+    mirror.PAGE_SIZE = page_size
+    return mirror, messages
+
+
+def test_sync_lists_only_new_messages():
+    mirror, messages = _mirror()
+    for n in range(5):
+        messages.add("t1", "user" if n % 2 == 0 else "assistant", f"m{n}")
+    assert [m["text"] for m in mirror.sync("t1")] == ["m0", "m1", "m2", "m3", "m4"]
+    assert messages.calls == [("t1", None), ("t1", "msg_1"), ("t1", "msg_3")]  # Paged
+
+    messages.calls.clear()
+    messages.add("t1", "assistant", "m5")
+    assert mirror.latest_assistant_text("t1") == "m5"
+    assert messages.calls == [("t1", "msg_4")]
+
+
+def test_unfinished_message_is_fetched_again():
+    mirror, messages = _mirror()
+    messages.add("t1", "user", "2 bed near Asok")
+    reply = messages.add("t1", "assistant", "Here", status="in_progress")
+    mirror.sync("t1")
+
+    reply.status, reply.content[0].text.value = "completed", "Here are 3 units"
+    assert [m["text"] for m in mirror.sync("t1")] == ["2 bed near Asok", "Here are 3 units"]
+    assert messages.calls[-1] == ("t1", "msg_0")
+
+
+def test_concurrent_syncs_do_not_duplicate_messages():
+    mirror, messages = _mirror(page_size=100)
+    for n in range(50):
+        messages.add("t1", "user", f"m{n}")
+    workers = [threading.Thread(target=mirror.sync, args=("t1",)) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert [m["id"] for m in mirror.sync("t1")] == [f"msg_{n}" for n in range(50)]
+
+
+def test_evicted_thread_is_rebuilt_from_the_start():
+    mirror, messages = _mirror(max_threads=1)
+    messages.add("t1", "assistant", "first")
+    messages.add("t2", "assistant", "other")
+    mirror.sync("t1")
+    mirror.sync("t2")  # Evicts t1
+
+    messages.calls.clear()
+    assert mirror.latest_assistant_text("t1") == "first"
+    assert messages.calls == [("t1", None)]
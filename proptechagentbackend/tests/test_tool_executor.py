@@ -0,0 +1,88 @@
+# tests/test_tool_executor.py
+
+import json
+import threading
+from types import SimpleNamespace
+from benchmarks.common import seed_inventory
+from config import Config
+from helpers import tool_executor
+from routes import chat_routes
+
+
+def _call(call_id, name, arguments):
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+
+def test_tool_calls_run_in_parallel_and_answer_in_call_order(app_context, monkeypatch):
+    # Each call only returns once all three are running at the same time
+    barrier = threading.Barrier(3, timeout=5)
+
+    def slow_tool(func_name, args_str):
+        barrier.wait()
+        if func_name == "unknown_tool":
+            raise ValueError("Unknown tool 'unknown_tool' called.")
+        return args_str
+
+    monkeypatch.setattr(tool_executor, "execute_tool_call", slow_tool)
+    calls = [_call("a", "lookup", {"n": 1}), _call("b", "unknown_tool", {}), _call("c", "lookup", {"n": 3})]
+
+    messages = tool_executor.execute_tool_calls(calls)
+
+    assert [m["tool_call_id"] for m in messages] == ["a", "b", "c"]
+    assert [m["content"] for m in messages] == ['{"n": 1}', "Unknown tool 'unknown_tool' called.", '{"n": 3}']
+
+
+def test_fetch_properties_calls_share_one_batched_search(app_context, monkeypatch):
+    monkeypatch.setattr(Config, "PROPERTY_CACHE_ENABLED", False)
+    seed_inventory(20, 200)
+    batches = []
+    real_batch = tool_executor.execute_fetch_properties_batch
+
+    def counting_batch(args_strs):
+        batches.append(len(args_strs))
+        return real_batch(args_strs)
+
+    monkeypatch.setattr(tool_executor, "execute_fetch_properties_batch", counting_batch)
+    calls = [
+        _call("a", "fetch_properties", {"bedrooms": 2}),
+        _call("b", "fetch_properties", {"bedrooms": 3, "max_price": 50000}),
+        _call("c", "fetch_properties", {"bedrooms": 2, "cursor": "garbage"}),
+    ]
+
+    messages = tool_executor.execute_tool_calls(calls)
+
+    assert batches == [3]
+    pages = [json.loads(m["content"]) for m in messages]
+    assert pages[0]["total"] > 0 and pages[0]["total"] == pages[2]["total"]
+    assert pages[1]["rows"] and all(row[2] >= 3 and row[4] <= 50000 for row in pages[1]["rows"])
+
+
+class LoopingCompletions:
+    """A model that asks for a tool on every round it is allowed to."""
+
+    def __init__(self):
+        self.tool_choices = []
+
+    def create(self, **kwargs):
+        self.tool_choices.append(kwargs["tool_choice"])
+        if kwargs["tool_choice"] == "none":
+            message = SimpleNamespace(content="Here is what I found", tool_calls=None)
+        else:
+            function = SimpleNamespace(name="fetch_properties", arguments='{"bedrooms": 2}')
+            call = SimpleNamespace(id=f"call_{len(self.tool_choices)}", type="function", function=function)
+            message = SimpleNamespace(content=None, tool_calls=[call])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_tool_loop_stops_after_the_round_limit(app, app_context, monkeypatch):
+    monkeypatch.setattr(Config, "TOOL_MAX_ROUNDS", 2)
+    monkeypatch.setattr(Config, "COMPLETION_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "CONVERSATION_COMPACTION_ENABLED", False)
+    completions = LoopingCompletions()
+    monkeypatch.setattr(chat_routes, "client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+
+    response = app.test_client().post("/chat", json={"message": "2 bed near Asok"})
+
+    assert response.status_code == 200
+    assert response.get_json()["assistant_message"] == "Here is what I found"
+    assert completions.tool_choices == ["auto", "auto", "none"]
@@ -0,0 +1,73 @@
+# tests/test_upgrade.py
+
+from datetime import datetime
+from sqlalchemy import Column, MetaData, Table, inspect, insert, select
+from database import db
+from database.upgrade import NEW_COLUMNS, NEW_INDEXES, upgrade
+from helpers.geo_index import geo_index
+from helpers.inventory_import import import_inventory
+from models.sql_models import Building, Client, ClientProperty, Property
+
+
+def _create_legacy_tables():
+    """The pre-series tables: current models (with their original unique columns) minus what was added since."""
+    dropped = {(model.__table__.name, name) for model, name in NEW_COLUMNS}
+    legacy = MetaData()
+    for model in (Client, Building, Property, ClientProperty):
+        table = model.__table__
+        Table(table.name, legacy, *[
+            Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable,
+                   unique=column.unique)
+            for column in table.columns if (table.name, column.name) not in dropped
+        ])
+    legacy.create_all(db.engine)
+    return legacy.tables
+
+
+def test_upgrade_brings_legacy_tables_up_to_date(app_context, tmp_path):
+    db.session.remove()
+    db.drop_all()
+    legacy = _create_legacy_tables()
+    now = datetime.utcnow()
+    with db.engine.begin() as connection:
+        connection.execute(insert(legacy["clients"]).values(id=1, code="C1", first_name="A", last_name="B",
+                                                            contact="x", created_at=now))
+        connection.execute(insert(legacy["buildings"]).values(id=1, name="Ideo Q"))
+        connection.execute(insert(legacy["properties"]).values(id=1, property_code="P1", building_id=1, unit="1",
+                                                               created_at=now))
+        connection.execute(insert(legacy["client_properties"]), [
+            {"id": 1, "client_id": 1, "property_id": 1, "is_active": False, "comment": None},
+            {"id": 2, "client_id": 1, "property_id": 1, "is_active": False, "comment": "Viewing Friday"},
+            {"id": 3, "client_id": 1, "property_id": 1, "is_active": False, "comment": None},
+        ])
+
+    first = upgrade(db.engine)
+    second = upgrade(db.engine)
+
+    assert second["columns"] == [] and second["indexes"] == []
+    assert len(first["columns"]) == len(NEW_COLUMNS)
+    inspector = inspect(db.engine)
+    for model, name in NEW_COLUMNS:
+        assert name in {column["name"] for column in inspector.get_columns(model.__tablename__)}
+    for name, table, _, _ in NEW_INDEXES:
+        assert name in {index["name"] for index in inspector.get_indexes(table)}
+
+    # The agent's row survives the dedupe, and the ORM can read every upgraded table
+    assert [row.id for row in db.session.query(ClientProperty)] == [2]
+    assert db.session.get(Client, 1).updated_at == now
+    assert db.session.get(Property, 1).updated_at == now  # The property index's refresh watermark
+    assert db.session.execute(select(Property.property_code)).scalar() == "P1"
+    geo_index.load()
+    assert geo_index.within(13.7370, 100.5603, 1.0) == []  # No coordinates until they are imported
+
+    coordinates = tmp_path / "coordinates.csv"
+    coordinates.write_text("name,latitude,longitude\nIdeo Q,13.7372,100.5605\n")
+    assert import_inventory(str(coordinates), "buildings", create_buildings=False)["upserted"] == 1
+    geo_index.load()
+    assert [building_id for building_id, _ in geo_index.within(13.7370, 100.5603, 1.0)] == [1]
+
+
+def test_upgrade_has_nothing_to_do_on_a_current_schema(app_context):
+    changes = upgrade(db.engine)
+
+    assert (changes["columns"], changes["indexes"]) == ([], [])